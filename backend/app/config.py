@@ -19,6 +19,55 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: Optional[str] = os.getenv("ANTHROPIC_API_KEY")
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
     DONUT_MODEL_PATH: str = os.getenv("DONUT_MODEL_PATH", "naver-clova-ix/donut-base-finetuned-cord-v2")
+    DONUT_BACKEND: str = os.getenv("DONUT_BACKEND", "torch")  # "torch" or "onnx" (ONNX Runtime on CPU)
+    DONUT_MODEL_REVISION: Optional[str] = os.getenv("DONUT_MODEL_REVISION") or None  # Hub branch/tag/commit, None = default
+    DONUT_ONNX_DIR: str = os.getenv("DONUT_ONNX_DIR", "./models/donut_onnx")  # Exported graphs per model + quantization target
+    DONUT_ONNX_QUANTIZE: bool = os.getenv("DONUT_ONNX_QUANTIZE", "True").lower() == "true"  # Dynamic int8
+    DONUT_ONNX_THREADS: int = int(os.getenv("DONUT_ONNX_THREADS", "0"))  # Intra-op threads, 0 = ONNX Runtime default
+    DONUT_BATCH_SIZE: int = int(os.getenv("DONUT_BATCH_SIZE", "4"))  # Concurrent requests per generate() call
+    DONUT_BATCH_MAX_WAIT_MS: float = float(os.getenv("DONUT_BATCH_MAX_WAIT_MS", "25"))  # Wait for stragglers after the first
+    EXTRACTION_POLICY: str = os.getenv("EXTRACTION_POLICY", "throughput")  # "throughput" or "latency" (speculative Donut + OCR)
+    EXTRACTION_FUSE_GRACE_MS: float = float(os.getenv("EXTRACTION_FUSE_GRACE_MS", "50"))  # Wait for the losing path to fuse it
+    FIELD_PATTERN_PACKS_PATH: str = os.getenv("FIELD_PATTERN_PACKS_PATH", "")  # JSON institution pattern packs, empty = defaults only
+    OCR_TESSERACT_POOL_SIZE: int = int(os.getenv("OCR_TESSERACT_POOL_SIZE", "0"))  # Persistent Tesseract handles, 0 = one per core
+    OCR_PADDLE_POOL_SIZE: int = int(os.getenv("OCR_PADDLE_POOL_SIZE", "1"))  # PaddleOCR instances (each holds its models)
+    OCR_HEALTHCHECK_INTERVAL: float = float(os.getenv("OCR_HEALTHCHECK_INTERVAL", "300"))  # Seconds between engine probes
+    OCR_PREPROCESS: bool = os.getenv("OCR_PREPROCESS", "True").lower() == "true"  # DPI normalisation, deskew, crop, binarisation
+    OCR_TARGET_DPI: int = int(os.getenv("OCR_TARGET_DPI", "300"))  # Resolution the OCR engines receive
+    OCR_MAX_SKEW_DEGREES: float = float(os.getenv("OCR_MAX_SKEW_DEGREES", "5"))  # Deskew search range, 0 = off
+    OCR_LAYOUT_ROI: bool = os.getenv("OCR_LAYOUT_ROI", "True").lower() == "true"  # OCR detected text blocks only
+    OCR_MAX_TEXT_BLOCKS: int = int(os.getenv("OCR_MAX_TEXT_BLOCKS", "150"))  # More blocks than this = OCR the whole page
+    
+    # Model Loading
+    MODEL_WARMUP_ON_STARTUP: bool = os.getenv("MODEL_WARMUP_ON_STARTUP", "True").lower() == "true"  # Else load on first use
+    MODEL_LOADER_THREADS: int = int(os.getenv("MODEL_LOADER_THREADS", "2"))  # Models loading in parallel
+    
+    # CPU Resources (shared priority pool for all CPU-bound stages)
+    CPU_WORKERS: int = int(os.getenv("CPU_WORKERS", "0"))  # Pool threads, 0 = available cores
+    CPU_NATIVE_THREADS: int = int(os.getenv("CPU_NATIVE_THREADS", "1"))  # OpenCV/BLAS/OpenMP threads per task
+    TORCH_THREADS: int = int(os.getenv("TORCH_THREADS", "0"))  # torch intra-op threads, 0 = half the cores
+    
+    # Forensics Execution
+    FORENSICS_BACKEND: str = os.getenv("FORENSICS_BACKEND", "thread")  # "thread" or "process"
+    FORENSICS_PROCESS_WORKERS: int = int(os.getenv("FORENSICS_PROCESS_WORKERS", "0"))  # 0 = one per core
+    FORENSICS_EARLY_EXIT: bool = os.getenv("FORENSICS_EARLY_EXIT", "True").lower() == "true"
+    FORENSICS_PYRAMID_LEVEL: int = int(os.getenv("FORENSICS_PYRAMID_LEVEL", "0"))  # Coarse pass at 2**level downscale, 0 = off
+    FORENSICS_TILED_MIN_PIXELS: int = int(os.getenv("FORENSICS_TILED_MIN_PIXELS", "20000000"))  # Tile scans this large, 0 = off
+    FORENSICS_TILE_MEMORY_MB: int = int(os.getenv("FORENSICS_TILE_MEMORY_MB", "128"))  # Working-set ceiling per tile
+    FORENSICS_TIME_BUDGET: float = float(os.getenv("FORENSICS_TIME_BUDGET", "0"))  # Seconds per request, 0 = unlimited
+    COPY_MOVE_BACKEND: str = os.getenv("COPY_MOVE_BACKEND", "sift")  # "sift", "orb" or "akaze"
+    COPY_MOVE_MAX_KEYPOINTS: int = int(os.getenv("COPY_MOVE_MAX_KEYPOINTS", "2000"))
+    
+    # Near-duplicate index of issued certificates' perceptual hashes
+    PHASH_INDEX_PATH: str = os.getenv("PHASH_INDEX_PATH", "./data/phash_index")  # Empty = in-memory only
+    PHASH_MATCH_DISTANCE: int = int(os.getenv("PHASH_MATCH_DISTANCE", "8"))  # Max Hamming distance in bits
+    
+    # Verification Result Cache
+    PIPELINE_VERSION: str = os.getenv("PIPELINE_VERSION", "1")  # Bump when models or scoring change
+    RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "True").lower() == "true"
+    RESULT_CACHE_SIZE: int = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+    RESULT_CACHE_TTL: float = float(os.getenv("RESULT_CACHE_TTL", "3600"))  # Seconds
+    RESULT_CACHE_SQLITE_PATH: str = os.getenv("RESULT_CACHE_SQLITE_PATH", "")  # Empty = memory tier only
     
     # Storage Configuration
     STORAGE_BUCKET: str = os.getenv("STORAGE_BUCKET", "certificates")
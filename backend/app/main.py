@@ -14,6 +14,8 @@ from .services.supabase_client import SupabaseClient
 from .services.simple_fusion_engine import SimpleFusionEngine
 from .services.certificate_issuance import CertificateIssuanceService
 from .services.public_verification import PublicVerificationService
+from .services.model_registry import get_model_registry
+from .services.resource_manager import get_resource_manager
 from .utils.helpers import setup_logging, process_image, generate_secure_token, create_qr_code
 
 # Setup logging
@@ -41,11 +43,27 @@ fusion_engine = SimpleFusionEngine(supabase_client)
 issuance_service = CertificateIssuanceService(supabase_client)
 public_verification_service = PublicVerificationService(supabase_client)
 
+@app.on_event("startup")
+async def warm_up_models():
+    """Start loading registered models in the background (requests use fallbacks meanwhile)"""
+    if settings.MODEL_WARMUP_ON_STARTUP:
+        get_model_registry().warm_up()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "Certificate Verifier API is running"}
 
+@app.get("/health/models")
+async def model_health():
+    """Per-model readiness, load time and memory"""
+    return get_model_registry().snapshot()
+
+@app.get("/health/resources")
+async def resource_health():
+    """CPU pool size, native thread caps and per-stage queue depth and wait times"""
+    return get_resource_manager().snapshot()
+
 @app.get("/test-db-schema")
 async def test_db_schema():
     """Test database schema to see what columns exist"""
@@ -1115,6 +1133,8 @@ async def get_system_health():
             "database": {"status": "healthy"},
             "storage": {"status": "healthy"},
             "api": {"status": "healthy"},
+            "models": get_model_registry().snapshot(),
+            "cpu": get_resource_manager().snapshot(),
             "metrics": {
                 "total_certificates": certs_result.count or 0,
                 "total_verifications": logs_result.count or 0,
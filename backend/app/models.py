@@ -39,6 +39,11 @@ class ExtractionMethod(str, Enum):
     VLM_FALLBACK = "vlm_fallback"
     MANUAL_OVERRIDE = "manual_override"
 
+class ExtractionPolicy(str, Enum):
+    """Scheduling of the Layer 1 extraction paths"""
+    THROUGHPUT = "throughput"  # Donut first, OCR only when Donut is not confident
+    LATENCY = "latency"        # Donut and OCR race, the first confident result wins
+
 class ExtractedFields(BaseModel):
     """Enhanced fields extracted from certificate with forensic metadata"""
     # Core certificate fields
@@ -56,6 +61,7 @@ class ExtractedFields(BaseModel):
     qr_payload: Optional[Dict[str, Any]] = Field(None, description="Decoded QR code data")
     seal_locations: List[List[int]] = Field(default_factory=list, description="Bounding boxes of detected seals")
     signature_locations: List[List[int]] = Field(default_factory=list, description="Bounding boxes of detected signatures")
+    field_boxes: Dict[str, List[int]] = Field(default_factory=dict, description="Bounding box [x1,y1,x2,y2] of the text each OCR field was read from")
     
     # Extraction metadata
     extraction_method: ExtractionMethod = ExtractionMethod.DONUT_PRIMARY
@@ -82,14 +88,22 @@ class ForensicAnalysis(BaseModel):
     sha256_hash: Optional[str] = None
     perceptual_hash: Optional[str] = None
     hash_match: Optional[bool] = None
+    nearest_issued_certificate: Optional[str] = Field(None, description="Closest issued certificate by perceptual hash")
+    perceptual_distance: Optional[int] = Field(None, description="Hamming distance to the closest issued certificate")
+    issued_digest_match: Optional[bool] = Field(None, description="Upload pixels identical to the closest issued certificate (None when its digest is unknown)")
     
     # Regional analysis
     suspicious_regions: List[List[int]] = Field(default_factory=list, description="Suspicious regions [x1,y1,x2,y2]")
+    noise_heatmap: Optional[Dict[str, Any]] = Field(None, description="Per-block noise deviation grid for reviewer overlays")
+    jpeg_grid_offset: Optional[List[int]] = Field(None, description="Dominant 8x8 JPEG grid origin [dy, dx]")
     tamper_types: List[TamperType] = Field(default_factory=list)
     
     # Overall assessment
     tamper_probability: float = Field(0.0, ge=0.0, le=1.0, description="Overall tampering probability")
+    skipped_detectors: Dict[str, str] = Field(default_factory=dict, description="Detectors not run, with the reason (early_exit or deadline)")
+    score_levels: Dict[str, int] = Field(default_factory=dict, description="Pyramid level each score came from (0 = full resolution)")
     analysis_time: Optional[float] = None
+    error_message: Optional[str] = None
 
 class SignatureVerification(BaseModel):
     """Signature and seal verification results"""
@@ -110,6 +124,7 @@ class SignatureVerification(BaseModel):
     qr_issuer_verified: Optional[bool] = None
     
     verification_time: Optional[float] = None
+    error_message: Optional[str] = None
 
 class RiskScore(BaseModel):
     """Enhanced risk scoring with forensic analysis"""
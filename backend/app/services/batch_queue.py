@@ -0,0 +1,143 @@
+"""
+Micro-batching queue for model inference
+Concurrent requests are collected into batches of up to max_batch_size,
+waiting at most max_wait for stragglers after the first request arrives.
+One batch runs at a time in the executor, so results come back in
+submission order, and batch-size / queue-wait metrics are kept for tuning
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BatchMetrics:
+    """Batch sizes, queue waits and batch run times over a sliding window of batches"""
+
+    def __init__(self, window: int = 1024):
+        self.batches = 0
+        self.requests = 0
+        self._sizes: deque = deque(maxlen=window)
+        self._waits: deque = deque(maxlen=window * 8)
+        self._run_times: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, size: int, waits: List[float], run_time: float):
+        with self._lock:
+            self.batches += 1
+            self.requests += size
+            self._sizes.append(size)
+            self._waits.extend(waits)
+            self._run_times.append(run_time)
+
+    @staticmethod
+    def _percentiles_ms(values) -> Dict[str, float]:
+        if not values:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+        values = np.asarray(values) * 1000.0
+        return {
+            "p50": round(float(np.percentile(values, 50)), 2),
+            "p95": round(float(np.percentile(values, 95)), 2),
+            "max": round(float(values.max()), 2)
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current counters and distributions, for monitoring"""
+        with self._lock:
+            sizes = list(self._sizes)
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "mean_batch_size": round(float(np.mean(sizes)), 2) if sizes else 0.0,
+                "batch_size_histogram": dict(sorted(Counter(sizes).items())),
+                "queue_wait_ms": self._percentiles_ms(list(self._waits)),
+                "batch_time_ms": self._percentiles_ms(list(self._run_times))
+            }
+
+
+class MicroBatchQueue:
+    """
+    Collects concurrent submit() calls into batches for a synchronous batch function.
+    process_batch takes a list of items and returns one result per item, in order.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], executor: Executor,
+                 max_batch_size: int = 4, max_wait: float = 0.025, name: str = "batch"):
+        self.process_batch = process_batch
+        self.executor = executor
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.max_wait = max(float(max_wait), 0.0)
+        self.name = name
+        self.metrics = BatchMetrics()
+
+        # Created on first use inside the serving event loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result (exceptions of its batch are re-raised)"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[tuple]:
+        """Block for the first request, then gather more until the batch is full or max_wait passes"""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+
+            # Requests cancelled while queued are dropped before inference
+            batch = [entry for entry in batch if not entry[1].cancelled()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            waits = [started - enqueued for _, _, enqueued in batch]
+            try:
+                results = await self._loop.run_in_executor(
+                    self.executor, self.process_batch, [item for item, _, _ in batch]
+                )
+                if len(results) != len(batch):
+                    raise ValueError(f"{self.name} returned {len(results)} results for {len(batch)} inputs")
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(batch)} failed: {str(e)}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+
+            self.metrics.record(len(batch), waits, time.perf_counter() - started)
@@ -4,6 +4,7 @@ Handles the complete issuance workflow from student data to QR-enabled certifica
 """
 import json
 import time
+import asyncio
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
@@ -15,7 +16,10 @@ from ..models import ExtractedFields, AttestationData
 from ..config import settings
 from .qr_integrity import QRIntegrityService
 from .supabase_client import SupabaseClient
+from .resource_manager import stage_executor
 from ..utils.helpers import generate_image_hash, generate_secure_token
+from ..utils.hash_index import get_phash_index
+from ..utils.fingerprint import compute_fingerprints
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +31,7 @@ class CertificateIssuanceService:
     def __init__(self, supabase_client: SupabaseClient):
         self.supabase_client = supabase_client
         self.qr_service = QRIntegrityService()
+        self.phash_index = get_phash_index(settings.PHASH_INDEX_PATH)
         
         # Certificate template settings
         self.template_width = 2480  # A4 at 300 DPI
@@ -115,9 +120,22 @@ class CertificateIssuanceService:
                 certificate_record, signed_payload, image_hashes
             )
             
+            # Fingerprints of the uploaded certificate: what holders later present for verification
+            certificate_fingerprints = await self._fingerprint_uploaded_certificate(
+                certificate_data.get("image_data")
+            )
+            stored_hashes = dict(image_hashes)
+            if certificate_fingerprints:
+                stored_hashes["certificate"] = certificate_fingerprints
+            
             # Step 9: Update certificate record with final data (use original image URL if available)
             await self._finalize_certificate_record(
-                certificate_record["id"], original_image_url, image_hashes, attestation
+                certificate_record["id"], original_image_url, stored_hashes, attestation
+            )
+            
+            # Register the certificate's perceptual hash for near-duplicate lookups
+            await self._index_perceptual_hashes(
+                normalized_data["certificate_id"], certificate_fingerprints
             )
             
             # Step 9: Generate public verification URL
@@ -449,16 +467,10 @@ class CertificateIssuanceService:
     async def _calculate_image_fingerprints(self, image: Image.Image) -> Dict[str, str]:
         """Calculate image fingerprints for integrity verification"""
         try:
-            # Convert image to bytes for SHA256
-            img_bytes = io.BytesIO()
-            image.save(img_bytes, format='PNG', optimize=True)
-            img_data = img_bytes.getvalue()
-            
-            # Use QR service to calculate comprehensive hashes
+            # Use QR service to calculate comprehensive hashes (hashed from raw pixels, no encode)
             hashes = await self.qr_service.create_integrity_hash(image, {
-                "image_size": len(img_data),
                 "dimensions": image.size,
-                "format": "PNG"
+                "mode": image.mode
             })
             
             return hashes
@@ -467,6 +479,40 @@ class CertificateIssuanceService:
             logger.error(f"Image fingerprinting failed: {str(e)}")
             return {}
     
+    async def _fingerprint_uploaded_certificate(self, image_data: Optional[bytes]) -> Dict[str, str]:
+        """Canonical SHA-256 and perceptual hash of the uploaded certificate image"""
+        if not image_data:
+            return {}
+        try:
+            loop = asyncio.get_event_loop()
+            fingerprints = await loop.run_in_executor(
+                stage_executor("index"),
+                lambda: compute_fingerprints(Image.open(io.BytesIO(image_data)))
+            )
+            return {"sha256": fingerprints["sha256"], "phash": fingerprints["phash"]}
+            
+        except Exception as e:
+            logger.warning(f"Failed to fingerprint uploaded certificate: {str(e)}")
+            return {}
+    
+    async def _index_perceptual_hashes(self, certificate_id: str, certificate_fingerprints: Dict[str, str]):
+        """
+        Add the certificate image's perceptual hash and pixel digest to the near-duplicate index
+        The generated QR image is not indexed: holders never present it, and
+        indexing it would only add unrelated entries under the certificate ID
+        """
+        if not certificate_fingerprints.get("phash"):
+            return
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(
+                stage_executor("index"), self.phash_index.add,
+                certificate_id, certificate_fingerprints["phash"], certificate_fingerprints.get("sha256")
+            )
+            
+        except Exception as e:
+            logger.warning(f"Failed to index perceptual hashes: {str(e)}")
+    
     async def _add_digital_watermark(self, image_data: bytes, watermark_text: str = "VERIFIED") -> bytes:
         """Add digital watermark to certificate image"""
         try:
@@ -0,0 +1,141 @@
+"""
+ONNX Runtime backend for the Donut extractor
+Exports the encoder and decoders to ONNX once (optionally with dynamic int8
+quantization), caches them on disk in a directory keyed on the checkpoint and
+the quantization target, and serves generate() through ONNX Runtime
+sessions tuned for CPU: full graph optimisation and explicit thread counts
+"""
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+from typing import Any, List, Optional
+
+try:
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForVision2Seq, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ONNX_FILES = ("encoder_model.onnx", "decoder_model.onnx", "decoder_with_past_model.onnx")
+QUANTIZED_SUFFIX = "quantized"
+
+
+def _quantization_target() -> str:
+    """Widest integer instruction set of the host CPU that dynamic int8 quantization can target"""
+    flags = ""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        pass
+
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512" in flags:
+        return "avx512"
+    if platform.machine().lower() in ("aarch64", "arm64"):
+        return "arm64"
+    return "avx2"
+
+
+def _quantization_config(target: str):
+    """Dynamic (calibration-free) int8 config for one instruction set"""
+    return getattr(AutoQuantizationConfig, target)(is_static=False, per_channel=False)
+
+
+def _checkpoint_fingerprint(model_path: str) -> List[Any]:
+    """Names, sizes and mtimes of a local checkpoint's files (empty for hub model ids)"""
+    if not os.path.isdir(model_path):
+        return []
+    fingerprint = []
+    for root, _, files in sorted(os.walk(model_path)):
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            fingerprint.append([os.path.relpath(os.path.join(root, name), model_path), stat.st_size, int(stat.st_mtime)])
+    return fingerprint
+
+
+def onnx_export_dir(base_dir: str, model_path: str, quantize: bool = True, revision: Optional[str] = None) -> str:
+    """
+    Export directory under base_dir keyed on the checkpoint (id or local path,
+    revision, local file fingerprint) and the quantization target, so a new
+    model or a host with another instruction set never reuses stale graphs
+    """
+    key = {
+        "model": model_path,
+        "revision": revision,
+        "checkpoint": _checkpoint_fingerprint(model_path),
+        "quantization": _quantization_target() if quantize else None
+    }
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", os.path.basename(model_path.rstrip("/")) or "donut")
+    return os.path.join(base_dir, f"{slug}-{key['quantization'] or 'fp32'}-{digest}")
+
+
+def _quantized_name(file_name: str) -> str:
+    return file_name.replace(".onnx", f"_{QUANTIZED_SUFFIX}.onnx")
+
+
+def export_donut_onnx(model_path: str, base_dir: str, quantize: bool = True, revision: Optional[str] = None) -> str:
+    """
+    Export a Donut checkpoint to ONNX in its keyed directory under base_dir
+    (skipped when already exported) and add int8-quantized copies of every
+    graph. Returns the export directory.
+    """
+    output_dir = onnx_export_dir(base_dir, model_path, quantize, revision)
+    if not all(os.path.exists(os.path.join(output_dir, name)) for name in ONNX_FILES):
+        logger.info(f"Exporting Donut model {model_path} to ONNX in {output_dir}")
+        model = ORTModelForVision2Seq.from_pretrained(model_path, export=True, use_cache=True, revision=revision)
+        model.save_pretrained(output_dir)
+
+    if quantize:
+        config = _quantization_config(_quantization_target())
+        for name in ONNX_FILES:
+            if os.path.exists(os.path.join(output_dir, _quantized_name(name))):
+                continue
+            logger.info(f"Quantizing {name} to int8")
+            quantizer = ORTQuantizer.from_pretrained(output_dir, file_name=name)
+            quantizer.quantize(save_dir=output_dir, quantization_config=config, file_suffix=QUANTIZED_SUFFIX)
+
+    return output_dir
+
+
+def load_donut_onnx(model_path: str, base_dir: str, quantize: bool = True,
+                    intra_op_threads: Optional[int] = None, revision: Optional[str] = None):
+    """ORTModelForVision2Seq over the (exported on first use) Donut graphs, CPU execution"""
+    if not ONNX_AVAILABLE:
+        raise ImportError("optimum[onnxruntime] is required for the ONNX Donut backend")
+
+    output_dir = export_donut_onnx(model_path, base_dir, quantize, revision)
+
+    session_options = onnxruntime.SessionOptions()
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if intra_op_threads:
+        session_options.intra_op_num_threads = intra_op_threads
+        session_options.inter_op_num_threads = 1
+
+    file_names = {
+        "encoder_file_name": ONNX_FILES[0],
+        "decoder_file_name": ONNX_FILES[1],
+        "decoder_with_past_file_name": ONNX_FILES[2]
+    }
+    if quantize:
+        file_names = {key: _quantized_name(name) for key, name in file_names.items()}
+
+    model = ORTModelForVision2Seq.from_pretrained(
+        output_dir,
+        provider="CPUExecutionProvider",
+        session_options=session_options,
+        use_cache=True,
+        **file_names
+    )
+    logger.info(f"Donut ONNX backend loaded ({'int8' if quantize else 'fp32'}, "
+                f"{intra_op_threads or 'default'} intra-op threads)")
+    return model
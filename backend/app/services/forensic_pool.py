@@ -0,0 +1,174 @@
+"""
+Process-pool backend for CPU-bound forensic detectors
+Layer 2/3 sync detectors run in pre-spawned worker processes that already hold
+initialised OpenCV state; image arrays reach them through shared memory, so
+only small descriptors and scalar results cross the process boundary
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..config import settings
+from ..utils.image_bundle import ImageBundle
+from .resource_manager import available_cores
+
+logger = logging.getLogger(__name__)
+
+# name -> (shared memory segment name, shape, dtype string)
+ArrayDescriptor = Tuple[str, Tuple[int, ...], str]
+
+# Per-process service instances, created once by the worker initializer
+_worker_services: Dict[str, Any] = {}
+
+
+def _init_worker():
+    """Worker initializer: pin OpenCV to one thread and build detector state once"""
+    cv2.setNumThreads(1)
+
+    from .layer2_forensics import Layer2ForensicsService
+    _worker_services["layer2"] = Layer2ForensicsService(backend="thread")
+
+    try:
+        from .layer3_signatures import Layer3SignatureService
+        _worker_services["layer3"] = Layer3SignatureService(load_models=False, backend="thread")
+    except Exception as e:
+        # Layer 3 jobs then fail in the worker and fall back to their default results
+        logger.warning(f"Layer 3 detectors unavailable in forensic worker: {str(e)}")
+
+
+def _ping() -> int:
+    """No-op job used to force workers to spawn during warm-up"""
+    return os.getpid()
+
+
+def _run_job(layer: str, job: str, descriptors: Dict[str, ArrayDescriptor], kwargs: Dict[str, Any]) -> Any:
+    """Attach shared arrays, run one detector and detach again"""
+    segments = []
+    arrays = {}
+    try:
+        for name, (segment_name, shape, dtype) in descriptors.items():
+            segment = shared_memory.SharedMemory(name=segment_name)
+            segments.append(segment)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+
+        bundle = ImageBundle.from_arrays(**arrays)
+        result = _worker_services[layer]._process_detector_sync(job, bundle, **kwargs)
+        del bundle
+        return result
+    finally:
+        # Views must be released before the mapping can be closed
+        arrays.clear()
+        for segment in segments:
+            segment.close()
+
+
+def _unlink_segments(segments: Dict[str, shared_memory.SharedMemory]):
+    """Release every shared segment published for one bundle"""
+    for segment in segments.values():
+        try:
+            segment.close()
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+    segments.clear()
+
+
+class ForensicProcessPool:
+    """
+    Pre-spawned process pool for forensic detectors.
+    Arrays are published to shared memory once per bundle and unlinked
+    automatically when the bundle is garbage collected.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or available_cores()
+
+        # spawn avoids forking a parent that already runs executor threads and torch
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+
+        self._published: "weakref.WeakKeyDictionary[ImageBundle, Dict[str, shared_memory.SharedMemory]]" = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+        logger.info(f"Forensic process pool created with {self.max_workers} workers")
+
+    def warm_up(self, timeout: Optional[float] = None):
+        """Spawn every worker up front so the first request does not pay start-up cost"""
+        futures = [self.executor.submit(_ping) for _ in range(self.max_workers)]
+        wait(futures, timeout=timeout)
+        logger.info("Forensic process pool warmed up")
+
+    def _publish(self, bundle: ImageBundle, names: Iterable[str]) -> Dict[str, ArrayDescriptor]:
+        """Copy the requested bundle arrays into shared memory (once per bundle)"""
+        with self._lock:
+            segments = self._published.get(bundle)
+            if segments is None:
+                segments = {}
+                self._published[bundle] = segments
+                weakref.finalize(bundle, _unlink_segments, segments)
+
+            descriptors = {}
+            for name in names:
+                array = getattr(bundle, name)
+                segment = segments.get(name)
+                if segment is None:
+                    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+                    shared[...] = array
+                    del shared
+                    segments[name] = segment
+                descriptors[name] = (segment.name, array.shape, array.dtype.str)
+
+            return descriptors
+
+    async def run(self, layer: str, job: str, bundle: ImageBundle,
+                  arrays: Iterable[str], **kwargs) -> Any:
+        """Run a named layer detector in a worker process"""
+        descriptors = self._publish(bundle, arrays)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, _run_job, layer, job, descriptors, kwargs)
+
+    def release(self, bundle: ImageBundle):
+        """Unlink a bundle's shared arrays before it is garbage collected"""
+        with self._lock:
+            segments = self._published.pop(bundle, None)
+        if segments:
+            _unlink_segments(segments)
+
+    def shutdown(self):
+        """Stop all workers"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[ForensicProcessPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_forensic_pool(backend: Optional[str] = None) -> Optional[ForensicProcessPool]:
+    """
+    Shared process pool when the forensics backend is "process", otherwise None.
+    The pool is created and warmed up on first use.
+    """
+    global _pool
+    backend = (backend or settings.FORENSICS_BACKEND).lower()
+    if backend != "process":
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ForensicProcessPool(settings.FORENSICS_PROCESS_WORKERS or None)
+            _pool.warm_up()
+        return _pool
@@ -0,0 +1,130 @@
+"""
+Cost-aware scheduling for forensic detectors
+Detectors run cheapest first under a concurrency cap; once the outcome is
+decisive (or the request's time budget runs out) the remaining expensive
+detectors are skipped or cancelled and reported as such
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SKIP_EARLY_EXIT = "early_exit"
+SKIP_DEADLINE = "deadline"
+
+
+class DetectorRegistry:
+    """
+    Known detectors with their decision weight and a running cost estimate.
+    Costs start from a prior and follow an exponential moving average of
+    measured wall time, so the schedule adapts to the deployment hardware.
+    """
+
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        self._weights: Dict[str, float] = {}
+        self._costs: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, weight: float, cost: float):
+        """Add a detector with its decision weight and prior cost (seconds)"""
+        self._weights[name] = weight
+        self._costs[name] = cost
+
+    def weight(self, name: str) -> float:
+        return self._weights.get(name, 0.0)
+
+    def cost(self, name: str) -> float:
+        return self._costs.get(name, 0.0)
+
+    def record(self, name: str, seconds: float):
+        """Fold one measured run into the detector's cost estimate"""
+        with self._lock:
+            previous = self._costs.get(name)
+            if previous is None:
+                self._costs[name] = seconds
+            else:
+                self._costs[name] = (1 - self.smoothing) * previous + self.smoothing * seconds
+
+    def by_cost(self, names: Iterable[str]) -> List[str]:
+        """Names ordered cheapest first"""
+        return sorted(names, key=self.cost)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Current weights and cost estimates, for monitoring"""
+        return {
+            name: {"weight": self._weights.get(name, 0.0), "cost": self._costs.get(name, 0.0)}
+            for name in self._costs
+        }
+
+
+class ForensicScheduler:
+    """Runs registered detectors cheapest first with early exit and an optional deadline"""
+
+    def __init__(self, registry: DetectorRegistry, max_concurrency: int = 4):
+        self.registry = registry
+        self.max_concurrency = max(max_concurrency, 1)
+
+    async def run(self, jobs: Dict[str, Callable[[], Awaitable[Any]]],
+                  is_decisive: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                  required: Iterable[str] = (),
+                  time_budget: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Run detector jobs and return (results, skipped).
+        results maps detector name to its result (or the raised exception);
+        skipped maps detector name to SKIP_EARLY_EXIT or SKIP_DEADLINE.
+        Required detectors are never dropped by early exit, only by the deadline.
+        """
+        required = set(required)
+        queue = self.registry.by_cost(jobs)
+        deadline = time.monotonic() + time_budget if time_budget else None
+
+        results: Dict[str, Any] = {}
+        skipped: Dict[str, str] = {}
+        pending: Dict[asyncio.Future, Tuple[str, float]] = {}
+        decided = False
+
+        while queue or pending:
+            while queue and len(pending) < self.max_concurrency:
+                name = queue.pop(0)
+                pending[asyncio.ensure_future(jobs[name]())] = (name, time.monotonic())
+
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                # Time budget exhausted: keep what finished, drop the rest
+                for future, (name, _) in pending.items():
+                    future.cancel()
+                    skipped[name] = SKIP_DEADLINE
+                for name in queue:
+                    skipped[name] = SKIP_DEADLINE
+                logger.warning(f"Forensic time budget exhausted, skipped: {', '.join(skipped)}")
+                break
+
+            for future in done:
+                name, started = pending.pop(future)
+                self.registry.record(name, time.monotonic() - started)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = e
+
+            if not decided and is_decisive is not None and is_decisive(results):
+                decided = True
+                for future, (name, _) in list(pending.items()):
+                    if name not in required:
+                        future.cancel()
+                        del pending[future]
+                        skipped[name] = SKIP_EARLY_EXIT
+                for name in queue:
+                    if name not in required:
+                        skipped[name] = SKIP_EARLY_EXIT
+                queue = [name for name in queue if name in required]
+                if skipped:
+                    logger.info(f"Forensic outcome decisive, skipped: {', '.join(skipped)}")
+
+        return results, skipped
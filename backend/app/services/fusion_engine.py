@@ -5,7 +5,7 @@ Implements conservative decision thresholds and comprehensive risk assessment
 """
 import logging
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 import hashlib
 import json
@@ -14,7 +14,7 @@ from PIL import Image
 from ..models import (
     ExtractedFields, CertificateResponse, VerificationStatus, 
     RiskScore, RiskLevel, VerificationRequest, AttestationData,
-    LayerResults, ForensicAnalysis, SignatureVerification, QRIntegrityCheck
+    LayerResults, ForensicAnalysis, SignatureVerification, QRIntegrityCheck, TamperType
 )
 from .layer1_extraction import Layer1ExtractionService
 from .layer2_forensics import Layer2ForensicsService
@@ -22,9 +22,43 @@ from .layer3_signatures import Layer3SignatureService
 from .qr_integrity import QRIntegrityService
 from .supabase_client import SupabaseClient
 from ..utils.helpers import generate_image_hash, create_qr_code, sign_data
+from ..utils.image_bundle import ImageBundle
+from ..config import settings
+from .result_cache import VerificationResultCache, pipeline_version_tag
+from .model_registry import get_model_registry
+from .forensic_scheduler import SKIP_EARLY_EXIT
 
 logger = logging.getLogger(__name__)
 
+# Settings whose value changes what a verification returns, hashed into the result cache tag
+RESULT_AFFECTING_SETTINGS = (
+    "DONUT_ONNX_QUANTIZE",
+    "EXTRACTION_POLICY",
+    "FIELD_PATTERN_PACKS_PATH",
+    "OCR_PREPROCESS",
+    "OCR_TARGET_DPI",
+    "OCR_MAX_SKEW_DEGREES",
+    "OCR_LAYOUT_ROI",
+    "OCR_MAX_TEXT_BLOCKS",
+    "FORENSICS_EARLY_EXIT",
+    "FORENSICS_PYRAMID_LEVEL",
+    "FORENSICS_TILED_MIN_PIXELS",
+    "FORENSICS_TILE_MEMORY_MB",
+    "FORENSICS_TIME_BUDGET",
+    "COPY_MOVE_BACKEND",
+    "COPY_MOVE_MAX_KEYPOINTS",
+    "PHASH_MATCH_DISTANCE"
+)
+
+# Forensic findings that point at edited content; re-saving, re-compression and
+# scanning alone trigger double compression and resampling
+EDIT_EVIDENCE_TYPES = (
+    TamperType.COPY_MOVE,
+    TamperType.SPLICING,
+    TamperType.ELA_ANOMALY,
+    TamperType.NOISE_INCONSISTENCY
+)
+
 class EnhancedFusionEngine:
     """
     Enhanced 3-Layer Fusion Engine implementing comprehensive certificate verification:
@@ -68,67 +102,44 @@ class EnhancedFusionEngine:
             "signature_validity": 0.20,
             "qr_integrity": 0.10
         }
+        
+        # Content-addressed result cache, tagged with the current pipeline version
+        self.result_cache = None
+        if settings.RESULT_CACHE_ENABLED:
+            self.result_cache = VerificationResultCache(
+                self._pipeline_version(),
+                max_entries=settings.RESULT_CACHE_SIZE,
+                ttl_seconds=settings.RESULT_CACHE_TTL,
+                sqlite_path=settings.RESULT_CACHE_SQLITE_PATH or None
+            )
     
-    async def verify_certificate(self, image_data: bytes, reference_hash: Optional[str] = None) -> CertificateResponse:
-        """Enhanced 3-layer verification pipeline for certificate authentication"""
+    async def verify_certificate(self, image_data: bytes, reference_hash: Optional[str] = None,
+                                 extraction_policy: Optional[str] = None) -> CertificateResponse:
+        """
+        Enhanced 3-layer verification pipeline for certificate authentication
+        extraction_policy overrides settings.EXTRACTION_POLICY ("throughput" or "latency") for this request
+        """
         verification_id = self._generate_verification_id(image_data)
         start_time = time.time()
         
         try:
-            # Convert image data to PIL Image
-            from PIL import Image
-            import io
-            
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Execute all layers in parallel for efficiency
-            layer_start_time = time.time()
-            
-            # Layer 1: Field Extraction
-            layer1_task = self.layer1_service.extract_fields(image)
-            
-            # Layer 2: Forensic Analysis
-            layer2_task = self.layer2_service.analyze_image(image, reference_hash)
-            
-            # Execute layers 1 and 2 in parallel
-            import asyncio
-            layer1_result, layer2_result = await asyncio.gather(layer1_task, layer2_task)
-            
-            # Layer 3: Signature Verification (depends on Layer 1 for extracted fields)
-            layer3_result = await self.layer3_service.verify_seals_and_signatures(
-                image, layer1_result.dict()
-            )
+            # Calculate canonical hash (also the result cache key)
+            canonical_hash = generate_image_hash(image_data)
             
-            # QR Integrity Check (if QR detected in Layer 1)
-            qr_result = QRIntegrityCheck()
-            if layer1_result.qr_payload:
-                qr_result = await self.qr_service.verify_qr_integrity(
-                    json.dumps(layer1_result.qr_payload), 
-                    layer1_result.dict()
+            # Re-uploads of the same file reuse the cached layer results
+            # (the two extraction policies can fuse different fields, so they are cached apart)
+            cache_variant = self._cache_variant(reference_hash, extraction_policy)
+            cached = self._get_cached_result(canonical_hash, cache_variant)
+            if cached is not None:
+                layer_results, risk_score, db_check, image_url = cached
+                self._refresh_issued_match(layer_results.layer2_forensics)
+                logger.info(f"Verification cache hit for {canonical_hash[:16]}")
+            else:
+                layer_results, risk_score, db_check = await self._run_verification_layers(
+                    image_data, reference_hash, extraction_policy
                 )
-            
-            # Create layer results
-            layer_processing_time = time.time() - layer_start_time
-            layer_results = LayerResults(
-                layer1_extraction=layer1_result,
-                layer2_forensics=layer2_result,
-                layer3_signatures=layer3_result,
-                qr_integrity=qr_result,
-                processing_time_ms={
-                    "layer1_ms": layer1_result.extraction_time * 1000 if layer1_result.extraction_time else 0,
-                    "layer2_ms": layer2_result.analysis_time * 1000 if layer2_result.analysis_time else 0,
-                    "layer3_ms": layer3_result.verification_time * 1000 if layer3_result.verification_time else 0,
-                    "total_layers_ms": layer_processing_time * 1000
-                }
-            )
-            
-            # Database verification using extracted fields
-            db_check = await self.supabase_client.check_certificate_database(layer1_result)
-            
-            # Enhanced fusion scoring
-            risk_score = await self._calculate_enhanced_risk_score(
-                layer_results, db_check, image_data
-            )
+                image_url = None
+            layer1_result = layer_results.layer1_extraction
             
             # Decision engine with conservative thresholds
             status, requires_review, escalation_reasons, decision_rationale = self._make_verification_decision(
@@ -156,19 +167,20 @@ class EnhancedFusionEngine:
                 "escalation_reasons": escalation_reasons,
                 "decision_rationale": decision_rationale,
                 "integrity_checks": integrity_checks,
+                "cache_hit": cached is not None,
                 "processed_at": datetime.utcnow().isoformat(),
                 "processing_time_ms": (time.time() - start_time) * 1000
             }
             
             await self.supabase_client.store_verification(verification_data)
             
-            # Upload image and get URL
-            image_url = await self.supabase_client.upload_certificate_image(
-                image_data, f"{verification_id}.jpg"
-            )
-            
-            # Calculate canonical hash for storage
-            canonical_hash = generate_image_hash(image_data)
+            # Upload image and get URL (identical bytes reuse the stored copy)
+            if image_url is None:
+                image_url = await self.supabase_client.upload_certificate_image(
+                    image_data, f"{verification_id}.jpg"
+                )
+                if self._is_result_cacheable(layer_results):
+                    self._cache_result(canonical_hash, cache_variant, layer_results, risk_score, db_check, image_url)
             
             return CertificateResponse(
                 verification_id=verification_id,
@@ -203,6 +215,163 @@ class EnhancedFusionEngine:
             
             raise Exception(f"Enhanced verification failed: {str(e)}")
     
+    async def _run_verification_layers(self, image_data: bytes, reference_hash: Optional[str],
+                                       extraction_policy: Optional[str] = None) -> Tuple[LayerResults, RiskScore, Dict[str, Any]]:
+        """Run all layers, the database check and fusion scoring for one upload"""
+        # Decode once; every layer reads from the same memoized bundle
+        bundle = ImageBundle.from_bytes(image_data)
+        
+        # Execute all layers in parallel for efficiency
+        layer_start_time = time.time()
+        
+        # Layer 1: Field Extraction
+        layer1_task = self.layer1_service.extract_fields(bundle, policy=extraction_policy)
+        
+        # Layer 2: Forensic Analysis
+        layer2_task = self.layer2_service.analyze_image(bundle, reference_hash)
+        
+        # Execute layers 1 and 2 in parallel
+        import asyncio
+        layer1_result, layer2_result = await asyncio.gather(layer1_task, layer2_task)
+        
+        # Layer 3: Signature Verification (depends on Layer 1 for extracted fields)
+        layer3_result = await self.layer3_service.verify_seals_and_signatures(
+            bundle, layer1_result.dict()
+        )
+        
+        # QR Integrity Check (if QR detected in Layer 1)
+        qr_result = QRIntegrityCheck()
+        if layer1_result.qr_payload:
+            qr_result = await self.qr_service.verify_qr_integrity(
+                json.dumps(layer1_result.qr_payload), 
+                layer1_result.dict()
+            )
+        
+        # Create layer results
+        layer_processing_time = time.time() - layer_start_time
+        layer_results = LayerResults(
+            layer1_extraction=layer1_result,
+            layer2_forensics=layer2_result,
+            layer3_signatures=layer3_result,
+            qr_integrity=qr_result,
+            processing_time_ms={
+                "layer1_ms": layer1_result.extraction_time * 1000 if layer1_result.extraction_time else 0,
+                "layer2_ms": layer2_result.analysis_time * 1000 if layer2_result.analysis_time else 0,
+                "layer3_ms": layer3_result.verification_time * 1000 if layer3_result.verification_time else 0,
+                "total_layers_ms": layer_processing_time * 1000
+            }
+        )
+        
+        # Database verification using extracted fields
+        db_check = await self.supabase_client.check_certificate_database(layer1_result)
+        
+        # Enhanced fusion scoring
+        risk_score = await self._calculate_enhanced_risk_score(
+            layer_results, db_check, image_data
+        )
+        
+        return layer_results, risk_score, db_check
+    
+    def _pipeline_version(self) -> str:
+        """Version tag over everything that changes a verification result"""
+        return pipeline_version_tag({
+            "pipeline": settings.PIPELINE_VERSION,
+            "donut_model": settings.DONUT_MODEL_PATH,
+            "donut_revision": settings.DONUT_MODEL_REVISION,
+            # Resolved backend (ONNX falls back to torch when optimum is missing)
+            "donut_backend": self.layer1_service.llm_client.backend,
+            "settings": {name: getattr(settings, name) for name in RESULT_AFFECTING_SETTINGS},
+            "field_pattern_packs": self._file_digest(settings.FIELD_PATTERN_PACKS_PATH),
+            "resampling_crop_side": self.layer2_service.resampling_crop_side,
+            "fusion_weights": self.fusion_weights,
+            "decision_thresholds": self.decision_thresholds,
+            "tamper_weights": self.tamper_weights,
+            "forensic_weights": self.layer2_service.decision_weights,
+            "forensic_thresholds": [
+                self.layer2_service.tamper_decision_threshold,
+                self.layer2_service.clean_decision_threshold
+            ]
+        })
+    
+    @staticmethod
+    def _file_digest(path: str) -> Optional[str]:
+        """SHA-256 of a config file's content (None when unset or unreadable)"""
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+    
+    def invalidate_result_cache(self) -> int:
+        """Re-tag the cache after weights, thresholds or models change; stale entries are dropped"""
+        if self.result_cache is None:
+            return 0
+        return self.result_cache.invalidate(self._pipeline_version())
+    
+    def _cache_variant(self, reference_hash: Optional[str], extraction_policy: Optional[str]) -> str:
+        """Request options that change the result for the same upload"""
+        return f"{reference_hash or ''}:{self.layer1_service.effective_policy(extraction_policy).value}"
+    
+    def _is_result_cacheable(self, layer_results: LayerResults) -> bool:
+        """
+        Only complete results are cached. A verdict reached with models still
+        loading, detectors cut by the deadline or a failed layer would otherwise
+        be replayed for the whole TTL after the pipeline recovers. Early-exit skips
+        are kept: the detectors that ran already settled the verdict.
+        """
+        if not get_model_registry().all_ready():
+            return False
+        forensics = layer_results.layer2_forensics
+        if any(reason != SKIP_EARLY_EXIT for reason in forensics.skipped_detectors.values()):
+            return False
+        return not (
+            forensics.error_message or
+            layer_results.layer3_signatures.error_message or
+            layer_results.layer1_extraction.additional_fields.get("extraction_error")
+        )
+    
+    def _get_cached_result(self, canonical_hash: str, 
+                           variant: str) -> Optional[Tuple[LayerResults, RiskScore, Dict[str, Any], str]]:
+        """(layer_results, risk_score, db_check, image_url) for a previously verified upload"""
+        if self.result_cache is None:
+            return None
+        try:
+            cached = self.result_cache.get(self.result_cache.key(canonical_hash, variant))
+            if cached is None:
+                return None
+            return (
+                LayerResults.parse_obj(cached["layer_results"]),
+                RiskScore.parse_obj(cached["risk_score"]),
+                cached["database_check"],
+                cached["image_url"]
+            )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached verification: {str(e)}")
+            return None
+    
+    def _refresh_issued_match(self, forensics: ForensicAnalysis):
+        """Redo the near-duplicate lookup on a cached analysis: the issued index keeps growing"""
+        issued_match = self.layer2_service.match_issued_certificate(forensics.perceptual_hash, forensics.sha256_hash)
+        for name, value in issued_match.items():
+            setattr(forensics, name, value)
+    
+    def _cache_result(self, canonical_hash: str, variant: str,
+                      layer_results: LayerResults, risk_score: RiskScore,
+                      db_check: Dict[str, Any], image_url: str):
+        if self.result_cache is None:
+            return
+        try:
+            self.result_cache.put(self.result_cache.key(canonical_hash, variant), {
+                "layer_results": json.loads(layer_results.json()),
+                "risk_score": json.loads(risk_score.json()),
+                "database_check": db_check,
+                "image_url": image_url
+            })
+        except Exception as e:
+            logger.warning(f"Failed to cache verification result: {str(e)}")
+    
     async def verify_certificate_by_data(self, request: VerificationRequest) -> CertificateResponse:
         """Verify certificate using manual input or existing data"""
         verification_id = self._generate_verification_id(
@@ -747,6 +916,14 @@ class EnhancedFusionEngine:
         if reference_hash:
             checks["hash_match"] = layer_results.layer2_forensics.hash_match
         
+        # Near-duplicate of an issued certificate: a re-saved, re-compressed or scanned copy keeps
+        # only a nearby perceptual hash (see perceptual_distance), so a differing pixel digest
+        # fails the check only together with forensic evidence of edited content
+        forensics = layer_results.layer2_forensics
+        if forensics.nearest_issued_certificate:
+            edited = any(tamper_type in EDIT_EVIDENCE_TYPES for tamper_type in forensics.tamper_types)
+            checks["matches_issued_certificate"] = bool(forensics.issued_digest_match) or not edited
+        
         # Forensic integrity
         checks["tamper_free"] = layer_results.layer2_forensics.tamper_probability < 0.3
         
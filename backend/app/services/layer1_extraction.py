@@ -5,12 +5,11 @@ Implements Donut primary + OCR fallback + VLM fallback for robust field extracti
 import time
 import asyncio
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Union
 from PIL import Image
 import cv2
 import numpy as np
 import json
-from concurrent.futures import ThreadPoolExecutor
 import re
 from datetime import datetime
 
@@ -34,12 +33,27 @@ try:
 except ImportError:
     VLM_AVAILABLE = False
 
-from ..models import ExtractedFields, ExtractionMethod
+from ..models import ExtractedFields, ExtractionMethod, ExtractionPolicy
 from ..config import settings
+from ..utils.image_bundle import ImageBundle
+from ..utils.layout import detect_text_blocks
+from ..utils.ocr_preprocess import OCRPage
+from ..utils.geometry import merge_overlapping_boxes, non_max_suppression
+from ..utils.field_scanner import DEFAULT_PACK, FieldScannerRegistry, load_pattern_packs
 from .llm_client import LLMClient
+from .model_registry import get_model_registry
+from .resource_manager import available_cores, stage_executor
+from .ocr_pool import (
+    OCREnginePool, TESSEROCR_AVAILABLE, close_tesseract_engine, create_tesseract_engine, tesseract_image_to_string
+)
 
 logger = logging.getLogger(__name__)
 
+VLM_MODEL_NAME = "Salesforce/blip-image-captioning-base"
+
+# Fields a usable extraction must find
+CORE_FIELDS = ('name', 'certificate_id', 'institution')
+
 class Layer1ExtractionService:
     """
     Layer 1: Multi-modal field extraction with fallback mechanisms
@@ -50,74 +64,161 @@ class Layer1ExtractionService:
     
     def __init__(self):
         self.llm_client = LLMClient()
-        self.executor = ThreadPoolExecutor(max_workers=4)
-        
-        # Initialize OCR engines
-        self.paddle_ocr = None
-        self.tesseract_config = r'--oem 3 --psm 6'
+        self.executor = stage_executor("layer1")
         
-        # Initialize VLM (placeholder)
-        self.vlm_processor = None
-        self.vlm_model = None
+        # OCR engine pools and the VLM load lazily through the shared model registry
+        self.tesseract_config = r'--oem 3 --psm 6'  # Per-call CLI fallback when tesserocr is missing
+        self.registry = get_model_registry()
         
         # Confidence thresholds
         self.donut_confidence_threshold = 0.7
         self.ocr_confidence_threshold = 0.6
         
-        self._initialize_engines()
+        # Compiled OCR field patterns, plus institution packs from config
+        self.field_scanners = FieldScannerRegistry(load_pattern_packs(settings.FIELD_PATTERN_PACKS_PATH))
+        
+        # Default scheduling of Donut vs OCR (overridable per request)
+        self.extraction_policy = self._resolve_policy(settings.EXTRACTION_POLICY, ExtractionPolicy.THROUGHPUT)
+        self.fuse_grace = settings.EXTRACTION_FUSE_GRACE_MS / 1000.0
+        
+        self._register_engines()
+    
+    def _register_engines(self):
+        """Register OCR engine pools and the VLM (loaded on first use or warmed up in the background)"""
+        names = []
+        if PADDLE_AVAILABLE:
+            self.registry.register("paddleocr", self._load_paddle_ocr, self._warm_up_ocr_pool)
+            names.append("paddleocr")
+        
+        if TESSEROCR_AVAILABLE:
+            self.registry.register("tesseract", self._load_tesseract, self._warm_up_ocr_pool)
+            names.append("tesseract")
+        elif TESSERACT_AVAILABLE:
+            logger.warning("tesserocr not installed: Tesseract OCR falls back to one CLI process per call "
+                           "(install tesserocr with libtesseract and leptonica to enable the engine pool)")
+        
+        if VLM_AVAILABLE:
+            self.registry.register(VLM_MODEL_NAME, self._load_vlm, self._warm_up_vlm)
+            names.append(VLM_MODEL_NAME)
+        
+        if settings.MODEL_WARMUP_ON_STARTUP:
+            self.registry.warm_up(names)
+    
+    @property
+    def paddle_ocr(self) -> Optional[OCREnginePool]:
+        return self.registry.get("paddleocr")
+    
+    @property
+    def tesseract(self) -> Optional[OCREnginePool]:
+        return self.registry.get("tesseract")
+    
+    def _load_paddle_ocr(self) -> OCREnginePool:
+        pool = OCREnginePool(
+            "PaddleOCR",
+            lambda: paddleocr.PaddleOCR(use_angle_cls=True, lang='en', show_log=False),
+            size=settings.OCR_PADDLE_POOL_SIZE,
+            health_check=lambda engine: engine.ocr(self._ocr_probe_bgr()),
+            check_interval=settings.OCR_HEALTHCHECK_INTERVAL
+        )
+        logger.info("PaddleOCR initialized successfully")
+        return pool
+    
+    def _load_tesseract(self) -> OCREnginePool:
+        # In-process API handles: no temp files, no per-call process or traineddata load
+        return OCREnginePool(
+            "Tesseract",
+            create_tesseract_engine,
+            size=settings.OCR_TESSERACT_POOL_SIZE or available_cores(),
+            health_check=lambda api: tesseract_image_to_string(api, Image.fromarray(self._ocr_probe_bgr()[:, :, ::-1])),
+            close=close_tesseract_engine,
+            check_interval=settings.OCR_HEALTHCHECK_INTERVAL
+        )
     
-    def _initialize_engines(self):
-        """Initialize OCR and VLM engines"""
+    @staticmethod
+    def _ocr_probe_bgr() -> np.ndarray:
+        """Small rendered word, the health-check input for every OCR engine"""
+        probe = np.full((64, 256, 3), 255, dtype=np.uint8)
+        cv2.putText(probe, "CERTIFICATE", (8, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+        return probe
+    
+    def _warm_up_ocr_pool(self, pool: OCREnginePool):
+        pool.check_all()
+    
+    def _load_vlm(self):
+        # BLIP captioning model (placeholder for BLIP-2/LLaVA)
+        processor = BlipProcessor.from_pretrained(VLM_MODEL_NAME)
+        model = BlipForConditionalGeneration.from_pretrained(VLM_MODEL_NAME)
+        logger.info("VLM model initialized successfully")
+        return processor, model
+    
+    def _warm_up_vlm(self, vlm):
+        processor, model = vlm
+        inputs = processor(Image.new("RGB", (384, 384), "white"), return_tensors="pt")
+        model.generate(**inputs, max_length=5)
+    
+    @staticmethod
+    def _resolve_policy(policy: Union[str, ExtractionPolicy], default: ExtractionPolicy) -> ExtractionPolicy:
+        """Parse an extraction policy, falling back to default for unknown values"""
         try:
-            if PADDLE_AVAILABLE:
-                self.paddle_ocr = paddleocr.PaddleOCR(
-                    use_angle_cls=True, 
-                    lang='en',
-                    show_log=False
-                )
-                logger.info("PaddleOCR initialized successfully")
-            
-            if VLM_AVAILABLE:
-                # Initialize BLIP-2 or similar VLM
-                self.vlm_processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-                self.vlm_model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
-                logger.info("VLM model initialized successfully")
-                
-        except Exception as e:
-            logger.warning(f"Error initializing extraction engines: {str(e)}")
+            return ExtractionPolicy(str(policy.value if isinstance(policy, ExtractionPolicy) else policy).lower())
+        except ValueError:
+            logger.warning(f"Unknown extraction policy {policy!r}, using {default.value}")
+            return default
+    
+    def effective_policy(self, policy: Optional[Union[str, ExtractionPolicy]] = None) -> ExtractionPolicy:
+        """Policy a request runs under: its override when valid, else the configured one"""
+        return self._resolve_policy(policy, self.extraction_policy) if policy else self.extraction_policy
     
-    async def extract_fields(self, image: Image.Image, use_fallback: bool = True) -> ExtractedFields:
+    async def extract_fields(self, image: Union[Image.Image, ImageBundle], use_fallback: bool = True,
+                             policy: Optional[Union[str, ExtractionPolicy]] = None) -> ExtractedFields:
         """
-        Main extraction pipeline with progressive fallback
+        Main extraction pipeline with progressive fallback.
+        policy "throughput" runs Donut, then OCR, then VLM; "latency" starts Donut
+        and OCR together and returns the first confident result.
         """
         start_time = time.time()
+        policy = self.effective_policy(policy)
         
         try:
-            # Step 1: Try Donut primary extraction
-            donut_result = await self._extract_with_donut(image)
+            # All steps read from the same decoded bundle
+            bundle = ImageBundle.ensure(image)
+            image = bundle.pil
             
-            # Check if Donut result is confident enough
-            if self._is_extraction_confident(donut_result):
-                donut_result.extraction_time = time.time() - start_time
-                donut_result.extraction_method = ExtractionMethod.DONUT_PRIMARY
-                logger.info("Donut extraction successful with high confidence")
-                return donut_result
-            
-            if not use_fallback:
-                return donut_result
-            
-            # Step 2: OCR ensemble fallback
-            logger.info("Donut confidence low, trying OCR fallback")
-            ocr_result = await self._extract_with_ocr_ensemble(image)
-            
-            # Fuse Donut and OCR results
-            fused_result = self._fuse_extraction_results(donut_result, ocr_result)
-            
-            if self._is_extraction_confident(fused_result):
-                fused_result.extraction_time = time.time() - start_time
-                fused_result.extraction_method = ExtractionMethod.OCR_FALLBACK
-                logger.info("OCR fallback successful")
-                return fused_result
+            if use_fallback and policy == ExtractionPolicy.LATENCY:
+                # Steps 1 and 2 run speculatively side by side
+                fused_result, method = await self._extract_speculative(bundle)
+                
+                if self._is_extraction_confident(fused_result):
+                    fused_result.extraction_time = time.time() - start_time
+                    fused_result.extraction_method = method
+                    logger.info(f"Speculative extraction won by {method.value}")
+                    return fused_result
+            else:
+                # Step 1: Try Donut primary extraction
+                donut_result = await self._extract_with_donut(bundle)
+                
+                # Check if Donut result is confident enough
+                if self._is_extraction_confident(donut_result):
+                    donut_result.extraction_time = time.time() - start_time
+                    donut_result.extraction_method = ExtractionMethod.DONUT_PRIMARY
+                    logger.info("Donut extraction successful with high confidence")
+                    return donut_result
+                
+                if not use_fallback:
+                    return donut_result
+                
+                # Step 2: OCR ensemble fallback
+                logger.info("Donut confidence low, trying OCR fallback")
+                ocr_result = await self._extract_with_ocr_ensemble(bundle)
+                
+                # Fuse Donut and OCR results
+                fused_result = self._fuse_extraction_results(donut_result, ocr_result)
+                
+                if self._is_extraction_confident(fused_result):
+                    fused_result.extraction_time = time.time() - start_time
+                    fused_result.extraction_method = ExtractionMethod.OCR_FALLBACK
+                    logger.info("OCR fallback successful")
+                    return fused_result
             
             # Step 3: VLM extreme fallback for ambiguous cases
             logger.info("OCR confidence still low, trying VLM fallback")
@@ -136,14 +237,58 @@ class Layer1ExtractionService:
             result.additional_fields = {"extraction_error": str(e)}
             return result
     
-    async def _extract_with_donut(self, image: Image.Image) -> ExtractedFields:
+    async def _extract_speculative(self, bundle: ImageBundle) -> Tuple[ExtractedFields, ExtractionMethod]:
+        """
+        Race Donut against the OCR ensemble. The first confident result wins; the
+        other path is fused in if it finishes within the grace period and is
+        cancelled otherwise (queued Donut batches and pool jobs are then dropped).
+        Returns the (possibly fused) result and the method of the winning path.
+        """
+        donut_task = asyncio.ensure_future(self._extract_with_donut(bundle))
+        ocr_task = asyncio.ensure_future(self._extract_with_ocr_ensemble(bundle))
+        methods = {donut_task: ExtractionMethod.DONUT_PRIMARY, ocr_task: ExtractionMethod.OCR_FALLBACK}
+        
+        try:
+            pending = {donut_task, ocr_task}
+            winner = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if self._is_extraction_confident(task.result())), None)
+            
+            if winner is not None and pending:
+                # Keep the slower path only if it is about to finish
+                done, pending = await asyncio.wait(pending, timeout=self.fuse_grace)
+                if pending:
+                    logger.info(f"{methods[winner].value} won, cancelling the slower extraction path")
+                    return winner.result(), methods[winner]
+            
+            try:
+                fused = self._fuse_extraction_results(donut_task.result(), ocr_task.result())
+            except Exception as e:
+                logger.error(f"Fusing speculative results failed: {str(e)}")
+                if winner is not None:
+                    return winner.result(), methods[winner]
+                raise
+            if winner is None:
+                return fused, ExtractionMethod.OCR_FALLBACK
+            if not self._is_extraction_confident(fused):
+                # Fusion never replaces a confident winner with a weaker mix
+                return winner.result(), methods[winner]
+            return fused, methods[winner]
+            
+        finally:
+            for task in (donut_task, ocr_task):
+                if not task.done():
+                    task.cancel()
+    
+    async def _extract_with_donut(self, bundle: ImageBundle) -> ExtractedFields:
         """Extract fields using Donut model with enhanced prompting"""
         try:
             # Use existing LLM client but with enhanced prompting
-            result = await self.llm_client.extract_certificate_fields(image)
+            result = await self.llm_client.extract_certificate_fields(bundle.pil)
             
             # Enhanced post-processing for Donut results
-            result = self._post_process_donut_result(result, image)
+            result = self._post_process_donut_result(result, bundle)
             
             return result
             
@@ -151,28 +296,42 @@ class Layer1ExtractionService:
             logger.error(f"Donut extraction failed: {str(e)}")
             return ExtractedFields()
     
-    async def _extract_with_ocr_ensemble(self, image: Image.Image) -> ExtractedFields:
+    async def _extract_with_ocr_ensemble(self, bundle: ImageBundle) -> ExtractedFields:
         """Extract using OCR ensemble with rule-based processing"""
         try:
-            # Convert PIL to OpenCV format
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # Run OCR engines in parallel
-            tasks = []
-            
-            if self.paddle_ocr:
-                tasks.append(self._run_paddle_ocr(cv_image))
-            
-            if TESSERACT_AVAILABLE:
-                tasks.append(self._run_tesseract_ocr(image))
-            
-            ocr_results = await asyncio.gather(*tasks, return_exceptions=True)
+            # Normalised page (cached on the bundle), raw upload when pre-processing is off
+            page = None
+            if settings.OCR_PREPROCESS:
+                loop = asyncio.get_event_loop()
+                page = await loop.run_in_executor(
+                    self.executor,
+                    bundle.ocr_page,
+                    settings.OCR_TARGET_DPI,
+                    settings.OCR_MAX_SKEW_DEGREES
+                )
             
-            # Combine OCR results
-            combined_text = self._combine_ocr_results(ocr_results)
+            extracted_fields = None
+            if page is not None and settings.OCR_LAYOUT_ROI:
+                extracted_fields = await self._extract_with_roi_ocr(bundle, page)
+                # Crops that yield no core field mean the layout missed text; read the whole page
+                if extracted_fields is not None and not any(getattr(extracted_fields, field) for field in CORE_FIELDS):
+                    logger.info("ROI OCR found no core fields, falling back to whole-page OCR")
+                    extracted_fields = None
+            
+            if extracted_fields is None:
+                # Whole-page OCR; the detector/recogniser expect shading, so PaddleOCR gets the normalised grayscale
+                if page is not None:
+                    combined_text = await self._run_ocr_engines(
+                        cv2.cvtColor(page.gray, cv2.COLOR_GRAY2BGR), Image.fromarray(page.binary)
+                    )
+                else:
+                    combined_text = await self._run_ocr_engines(bundle.bgr, bundle.pil)
+                
+                # Rule-based field extraction
+                extracted_fields = self._extract_fields_from_text(combined_text, bundle)
             
-            # Rule-based field extraction
-            extracted_fields = self._extract_fields_from_text(combined_text, image)
+            if page is not None:
+                extracted_fields.additional_fields["ocr_preprocessing"] = dict(page.params)
             
             return extracted_fields
             
@@ -180,17 +339,97 @@ class Layer1ExtractionService:
             logger.error(f"OCR ensemble extraction failed: {str(e)}")
             return ExtractedFields()
     
+    async def _extract_with_roi_ocr(self, bundle: ImageBundle, page: OCRPage) -> Optional[ExtractedFields]:
+        """
+        OCR only the text blocks found by layout analysis, in parallel, each field
+        keeping the box of the blocks it was read from. None when the layout
+        finds no usable blocks (the caller OCRs the whole page).
+        """
+        loop = asyncio.get_event_loop()
+        locations = await loop.run_in_executor(
+            self.executor, self._detect_object_locations, ExtractedFields(), bundle
+        )
+        
+        # Photo, seal and signature regions are kept out of the layout rather than whited
+        # out of the crops: a stamp crossing a line would take the words under it along
+        regions = [page.to_page(box) for box in
+                   ([locations.photo_bbox] if locations.photo_bbox else []) +
+                   locations.seal_locations + locations.signature_locations]
+        blocks = await loop.run_in_executor(
+            self.executor, detect_text_blocks, page.binary, page.params["page_dpi"], regions
+        )
+        if not blocks or len(blocks) > settings.OCR_MAX_TEXT_BLOCKS:
+            return None
+        
+        # Bounded fan-out: a page never queues more block jobs than the engines can serve
+        block_slots = asyncio.Semaphore(self._ocr_block_concurrency())
+        
+        async def ocr_block(x1: int, y1: int, x2: int, y2: int) -> str:
+            async with block_slots:
+                return await self._run_ocr_engines(
+                    cv2.cvtColor(page.gray[y1:y2, x1:x2], cv2.COLOR_GRAY2BGR),
+                    Image.fromarray(np.ascontiguousarray(page.binary[y1:y2, x1:x2]))
+                )
+        
+        texts = await asyncio.gather(*[ocr_block(*block) for block in blocks])
+        
+        # Blocks are cleaned one by one and joined with single spaces, so the joined text is
+        # already clean and its offsets map straight back to blocks
+        parts, spans, offset = [], [], 0
+        for block, text in zip(blocks, texts):
+            text = self._clean_ocr_text(text)
+            if not text:
+                continue
+            parts.append(text)
+            spans.append((offset, offset + len(text), page.to_original(block)))
+            offset += len(text) + 1
+        
+        fields = self._extract_fields_from_text(" ".join(parts), bundle, spans, locations)
+        
+        ocr_pixels = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in blocks)
+        fields.additional_fields["ocr_layout"] = {
+            "text_blocks": len(blocks),
+            "ocr_pixel_fraction": round(ocr_pixels / float(page.gray.size), 3)
+        }
+        return fields
+    
+    def _ocr_block_concurrency(self) -> int:
+        """Block jobs in flight per page: the largest loaded engine pool, else a share of the cores for CLI Tesseract"""
+        pools = [pool for pool in (self.paddle_ocr, self.tesseract) if pool is not None]
+        if pools:
+            return max(pool.size for pool in pools)
+        return max(available_cores() // 2, 1)
+    
+    async def _run_ocr_engines(self, paddle_image: np.ndarray, tesseract_image: Image.Image) -> str:
+        """OCR one image with every available engine in parallel and combine their text"""
+        tasks = []
+        
+        # PaddleOCR joins once loaded, Tesseract covers until then
+        paddle_ocr = self.paddle_ocr
+        if paddle_ocr:
+            tasks.append(self._run_paddle_ocr(paddle_ocr, paddle_image))
+        
+        if TESSERACT_AVAILABLE or TESSEROCR_AVAILABLE:
+            tasks.append(self._run_tesseract_ocr(tesseract_image))
+        
+        ocr_results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Combine OCR results
+        return self._combine_ocr_results(ocr_results)
+    
     async def _extract_with_vlm(self, image: Image.Image, previous_result: ExtractedFields) -> ExtractedFields:
         """Extract using Vision-Language Model for complex cases"""
         try:
-            if not self.vlm_model or not self.vlm_processor:
-                logger.warning("VLM not available, returning previous result")
+            vlm = self.registry.get(VLM_MODEL_NAME)
+            if vlm is None:
+                logger.warning("VLM not available or still loading, returning previous result")
                 return previous_result
+            vlm_processor, vlm_model = vlm
             
             # Generate descriptive caption
-            inputs = self.vlm_processor(image, return_tensors="pt")
-            out = self.vlm_model.generate(**inputs, max_length=150)
-            caption = self.vlm_processor.decode(out[0], skip_special_tokens=True)
+            inputs = vlm_processor(image, return_tensors="pt")
+            out = vlm_model.generate(**inputs, max_length=150)
+            caption = vlm_processor.decode(out[0], skip_special_tokens=True)
             
             # Use LLM to extract structured fields from caption
             vlm_fields = self._extract_from_caption(caption, previous_result)
@@ -201,13 +440,12 @@ class Layer1ExtractionService:
             logger.error(f"VLM extraction failed: {str(e)}")
             return previous_result
     
-    async def _run_paddle_ocr(self, cv_image: np.ndarray) -> List[Tuple[List, Tuple, str]]:
-        """Run PaddleOCR extraction"""
+    async def _run_paddle_ocr(self, paddle_ocr: OCREnginePool, cv_image: np.ndarray) -> List[Tuple[List, Tuple, str]]:
+        """Run PaddleOCR extraction on a pooled engine"""
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor, 
-                self.paddle_ocr.ocr, 
+            result = await paddle_ocr.run_async(
+                self.executor,
+                lambda engine, image: engine.ocr(image),
                 cv_image
             )
             return result[0] if result and result[0] else []
@@ -216,9 +454,15 @@ class Layer1ExtractionService:
             return []
     
     async def _run_tesseract_ocr(self, image: Image.Image) -> str:
-        """Run Tesseract OCR extraction"""
+        """Run Tesseract OCR extraction (pooled API handles, else one tesseract process per call)"""
         try:
             loop = asyncio.get_event_loop()
+            tesseract = self.tesseract
+            if tesseract is not None:
+                return await tesseract.run_async(self.executor, tesseract_image_to_string, image)
+            
+            if not TESSERACT_AVAILABLE:
+                return ""
             result = await loop.run_in_executor(
                 self.executor,
                 pytesseract.image_to_string,
@@ -248,88 +492,54 @@ class Layer1ExtractionService:
         
         return combined_text
     
-    def _extract_fields_from_text(self, text: str, image: Image.Image) -> ExtractedFields:
-        """Rule-based field extraction from OCR text"""
+    def _extract_fields_from_text(self, text: str, bundle: ImageBundle,
+                                  spans: Optional[List[Tuple[int, int, List[int]]]] = None,
+                                  locations: Optional[ExtractedFields] = None) -> ExtractedFields:
+        """
+        Rule-based field extraction from OCR text.
+        spans are (start, end, box) of the text blocks in the text, giving each
+        field the box it was read from; locations are already detected photo,
+        seal and signature regions.
+        """
         fields = ExtractedFields()
         
         # Clean and normalize text
         text = self._clean_ocr_text(text)
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
-        # Field extraction patterns
-        patterns = {
-            'name': [
-                r'(?:name|student|candidate)[\s:]+([a-zA-Z\s]+)',
-                r'(?:this is to certify that)[\s]*([a-zA-Z\s]+)',
-                r'(?:mr|ms|miss)[\s\.]*([a-zA-Z\s]+)'
-            ],
-            'roll_no': [
-                r'(?:roll|reg|registration)[\s]*(?:no|number)[\s:]*([a-zA-Z0-9]+)',
-                r'(?:student id|id)[\s:]*([a-zA-Z0-9]+)'
-            ],
-            'certificate_id': [
-                r'(?:certificate|cert)[\s]*(?:no|number|id)[\s:]*([a-zA-Z0-9-]+)',
-                r'(?:serial|ref)[\s]*(?:no|number)[\s:]*([a-zA-Z0-9-]+)'
-            ],
-            'course_name': [
-                r'(?:course|program|degree|bachelor|master|diploma)[\s:]*([a-zA-Z\s&]+)',
-                r'(?:in the field of|majoring in)[\s]*([a-zA-Z\s&]+)'
-            ],
-            'institution': [
-                r'(?:university|college|institute|school)[\s]*(?:of|for)?[\s]*([a-zA-Z\s&]+)',
-                r'([a-zA-Z\s&]*university|college|institute)'
-            ],
-            'issue_date': [
-                r'(?:issued|dated|given)[\s]*(?:on|this)?[\s]*([0-9]{1,2}[/-][0-9]{1,2}[/-][0-9]{2,4})',
-                r'([0-9]{1,2}[\s]*(?:st|nd|rd|th)?[\s]*[a-zA-Z]+[\s]*[0-9]{2,4})',
-                r'([0-9]{4}[/-][0-9]{1,2}[/-][0-9]{1,2})'
-            ],
-            'year': [
-                r'(?:year|class of|batch)[\s]*([0-9]{4})',
-                r'(?:academic year)[\s]*([0-9]{4}-?[0-9]{2,4}?)'
-            ],
-            'grade': [
-                r'(?:grade|cgpa|gpa|percentage|marks)[\s:]*([a-zA-Z0-9\.\s%]+)',
-                r'(?:first class|second class|third class|distinction|honors)',
-                r'([0-9]\.[0-9]+)[\s]*(?:cgpa|gpa)'
-            ]
-        }
         
-        # Extract fields using patterns
+        # One pass of the compiled field automaton (institution pack if one matches)
+        matches, pack_name = self.field_scanners.scan(text)
+        
         confidences = {}
+        for field_name, match in matches.items():
+            setattr(fields, field_name, match.value)
+            confidences[field_name] = match.confidence
+            
+            boxes = [box for start, end, box in spans or [] if start < match.end and end > match.start]
+            if boxes:
+                fields.field_boxes[field_name] = [
+                    min(box[0] for box in boxes), min(box[1] for box in boxes),
+                    max(box[2] for box in boxes), max(box[3] for box in boxes)
+                ]
         
-        for field_name, field_patterns in patterns.items():
-            best_match = None
-            best_confidence = 0.0
-            
-            for pattern in field_patterns:
-                for line in lines:
-                    match = re.search(pattern, line, re.IGNORECASE)
-                    if match:
-                        value = match.group(1).strip()
-                        confidence = self._calculate_pattern_confidence(pattern, line, value)
-                        
-                        if confidence > best_confidence:
-                            best_match = value
-                            best_confidence = confidence
-            
-            if best_match:
-                setattr(fields, field_name, best_match)
-                confidences[field_name] = best_confidence
+        if pack_name != DEFAULT_PACK:
+            fields.additional_fields["field_pattern_pack"] = pack_name
         
         fields.field_confidences = confidences
         
         # Detect bounding boxes for important regions
-        fields = self._detect_object_locations(fields, image)
+        if locations is not None:
+            fields.photo_bbox = locations.photo_bbox
+            fields.seal_locations = locations.seal_locations
+            fields.signature_locations = locations.signature_locations
+        else:
+            fields = self._detect_object_locations(fields, bundle)
         
         return fields
     
-    def _detect_object_locations(self, fields: ExtractedFields, image: Image.Image) -> ExtractedFields:
+    def _detect_object_locations(self, fields: ExtractedFields, bundle: ImageBundle) -> ExtractedFields:
         """Detect locations of photos, seals, signatures using simple heuristics"""
         try:
-            # Convert to OpenCV format
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+            gray = bundle.gray
             
             # Detect potential photo regions (rectangular dark regions)
             photo_bbox = self._detect_photo_region(gray)
@@ -402,7 +612,12 @@ class Layer1ExtractionService:
                 circles = np.round(circles[0, :]).astype("int")
                 for (x, y, r) in circles:
                     # Convert circle to bounding box
-                    seal_locations.append([x - r, y - r, x + r, y + r])
+                    seal_locations.append([int(x - r), int(y - r), int(x + r), int(y + r)])
+                
+                # Concentric rings of one stamp produce stacked circles; keep the
+                # strongest (HoughCircles returns them by accumulator votes)
+                keep = non_max_suppression(seal_locations, iou_threshold=0.3)
+                seal_locations = [seal_locations[i] for i in keep]
             
         except Exception:
             pass
@@ -434,15 +649,18 @@ class Layer1ExtractionService:
                 if aspect_ratio > 2.0 and 500 <= area <= 10000:
                     signature_locations.append([x, y, x + w, y + h])
             
+            # Join stroke fragments of the same signature
+            signature_locations = merge_overlapping_boxes(signature_locations)
+            
         except Exception:
             pass
         
         return signature_locations
     
-    def _post_process_donut_result(self, result: ExtractedFields, image: Image.Image) -> ExtractedFields:
+    def _post_process_donut_result(self, result: ExtractedFields, bundle: ImageBundle) -> ExtractedFields:
         """Post-process Donut results with image analysis"""
         # Add object detection to Donut results
-        result = self._detect_object_locations(result, image)
+        result = self._detect_object_locations(result, bundle)
         
         # Normalize field values
         result = self._normalize_field_values(result)
@@ -498,34 +716,15 @@ class Layer1ExtractionService:
         text = re.sub(r'\s+', ' ', text)
         return text.strip()
     
-    def _calculate_pattern_confidence(self, pattern: str, line: str, value: str) -> float:
-        """Calculate confidence score for pattern match"""
-        base_confidence = 0.5
-        
-        # Boost confidence based on pattern specificity
-        if 'certificate' in pattern.lower():
-            base_confidence += 0.2
-        if 'name' in pattern.lower():
-            base_confidence += 0.15
-        
-        # Boost confidence based on value quality
-        if len(value) > 3:
-            base_confidence += 0.1
-        if re.match(r'^[A-Za-z\s]+$', value):  # Only letters and spaces
-            base_confidence += 0.1
-        
-        return min(base_confidence, 1.0)
-    
     def _is_extraction_confident(self, fields: ExtractedFields) -> bool:
         """Check if extraction results are confident enough"""
         if not fields.field_confidences:
             return False
         
         # Check if we have core fields with good confidence
-        core_fields = ['name', 'certificate_id', 'institution']
         confident_core_fields = 0
         
-        for field in core_fields:
+        for field in CORE_FIELDS:
             if hasattr(fields, field) and getattr(fields, field):
                 confidence = fields.field_confidences.get(field, 0.0)
                 if confidence >= 0.7:
@@ -557,14 +756,22 @@ class Layer1ExtractionService:
             elif ocr_value:
                 setattr(fused, field, ocr_value)
                 fused.field_confidences[field] = ocr_conf
+                if field in ocr_result.field_boxes:
+                    fused.field_boxes[field] = ocr_result.field_boxes[field]
         
         # Merge location data
         fused.photo_bbox = donut_result.photo_bbox or ocr_result.photo_bbox
-        fused.seal_locations = list(set(donut_result.seal_locations + ocr_result.seal_locations))
-        fused.signature_locations = list(set(donut_result.signature_locations + ocr_result.signature_locations))
+        fused.seal_locations = self._unique_boxes(donut_result.seal_locations + ocr_result.seal_locations)
+        fused.signature_locations = self._unique_boxes(donut_result.signature_locations + ocr_result.signature_locations)
+        fused.additional_fields = {**donut_result.additional_fields, **ocr_result.additional_fields}
         
         return fused
     
+    @staticmethod
+    def _unique_boxes(boxes: List[List[int]]) -> List[List[int]]:
+        """Boxes without exact duplicates, in first-seen order (boxes are lists, so unhashable)"""
+        return [list(box) for box in dict.fromkeys(tuple(box) for box in boxes)]
+    
     def _extract_from_caption(self, caption: str, previous_result: ExtractedFields) -> ExtractedFields:
         """Extract fields from VLM caption (placeholder implementation)"""
         # This would use the caption to fill missing fields or correct existing ones
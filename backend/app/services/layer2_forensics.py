@@ -1,22 +1,20 @@
 """
 Layer 2 - Image Forensics Service
 Implements comprehensive tamper detection using multiple techniques:
-- Copy-move detection (SIFT/ORB)
+- Copy-move detection (SIFT/ORB/AKAZE)
 - Error Level Analysis (ELA)
 - Double compression detection
 - Noise analysis and PRNU
 - Hash integrity checks
 """
+import math
 import time
 import logging
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw
-import hashlib
-import imagehash
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Union
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from scipy import ndimage
 from skimage import feature, measure
 import warnings
@@ -24,6 +22,20 @@ warnings.filterwarnings('ignore')
 
 from ..models import ForensicAnalysis, TamperType
 from ..config import settings
+from ..utils.block_dct import BlockDCT, compute_block_dct
+from ..utils.local_stats import LocalStatistics, StitchedStatistics
+from ..utils.image_bundle import ImageBundle
+from ..utils.copy_move import CopyMoveDetector
+from ..utils.ela import ErrorLevelMap, recompression_error, tile_means
+from ..utils.spectrum import power_of_two_square, radial_log_spectrum
+from ..utils.block_grid import GradientField, GridAlignment, boundary_sums
+from ..utils.tiling import Tile, tile_layout, tile_side_for_budget
+from ..utils.geometry import merge_overlapping_boxes
+from ..utils.hash_index import PerceptualHashIndex, get_phash_index
+from ..utils.fingerprint import compute_fingerprints
+from .forensic_pool import get_forensic_pool
+from .forensic_scheduler import DetectorRegistry, ForensicScheduler, SKIP_DEADLINE
+from .resource_manager import stage_executor
 
 logger = logging.getLogger(__name__)
 
@@ -33,61 +45,188 @@ class Layer2ForensicsService:
     Implements multiple complementary techniques for robust analysis
     """
     
-    def __init__(self):
-        self.executor = ThreadPoolExecutor(max_workers=4)
+    def __init__(self, backend: Optional[str] = None):
+        self.executor = stage_executor("layer2")
         
-        # Initialize feature detectors
-        try:
-            self.sift_detector = cv2.SIFT_create()
-            self.orb_detector = cv2.ORB_create()
-        except AttributeError:
-            # Fallback for older OpenCV versions
-            self.sift_detector = cv2.xfeatures2d.SIFT_create()
-            self.orb_detector = cv2.ORB_create()
+        # Optional process pool for the CPU-bound detectors (settings.FORENSICS_BACKEND)
+        self.process_pool = get_forensic_pool(backend)
+        
+        # Keypoint-based copy-move engine (bounded pyramid, cached matcher)
+        self.copy_move_detector = CopyMoveDetector(
+            backend=settings.COPY_MOVE_BACKEND,
+            max_keypoints=settings.COPY_MOVE_MAX_KEYPOINTS
+        )
+        
+        # Near-duplicate lookup against issued certificates (index loaded on first lookup)
+        self.phash_match_distance = settings.PHASH_MATCH_DISTANCE
         
         # Forensic analysis parameters
         self.copy_move_threshold = 0.7
         self.ela_threshold = 30
+        self.ela_quality = 90
+        self.ela_tile_size = 32
+        self.ela_region_threshold = 3.0  # Standard deviations above the mean tile error
+        self.resampling_crop_side = 1024  # Native-resolution centre crop for the spectrum (None = largest square)
+        self.grid_tile_size = 128
+        self.grid_min_contrast = 0.15  # Local grid must stand out by 15% to count as misaligned
+        self.grid_min_energy = 0.1  # ...and by 0.1 gray levels per boundary pixel (blank tiles sit near 0.02)
         self.compression_threshold = 0.8
+        self.dct_histogram_bins = 100
+        self.dct_histogram_range = (-50, 50)
         self.noise_threshold = 0.6
         
+        # Noise block grids: (block size, stride)
+        self.noise_score_grid = (64, 32)
+        self.noise_region_grid = (32, 16)
+        self.noise_region_threshold = 2.0  # Standard deviations above mean
+        
+        # Decision weights of the scored detectors in the tamper probability
+        self.decision_weights = {
+            'copy_move': 0.25,
+            'ela': 0.20,
+            'double_compression': 0.15,
+            'noise': 0.20,
+            'resampling': 0.10,
+            'jpeg_artifacts': 0.10
+        }
+        
+        # Early exit once the probability is bound to land above/below these
+        self.early_exit = settings.FORENSICS_EARLY_EXIT
+        self.tamper_decision_threshold = 0.5
+        self.clean_decision_threshold = 0.3
+        self.time_budget = settings.FORENSICS_TIME_BUDGET or None  # Seconds per request
+        
+        # Detector registry with prior costs (seconds), refined from measured runs
+        self.detector_registry = DetectorRegistry()
+        detector_costs = {
+            'noise': 0.01,
+            'resampling': 0.02,
+            'hashes': 0.05,
+            'double_compression': 0.08,
+            'jpeg_artifacts': 0.10,
+            'ela': 0.10,
+            'copy_move': 0.50
+        }
+        for name, cost in detector_costs.items():
+            self.detector_registry.register(name, self.decision_weights.get(name, 0.0), cost)
+        
+        # Shared-memory arrays each detector needs in the process backend
+        self.process_job_arrays = {
+            'copy_move': ("gray",),
+            'ela': ("rgb",),
+            'double_compression': ("y_channel",),
+            'hashes': ("rgb",),
+            'resampling': ("gray",),
+            'jpeg_artifacts': ("gray",)
+        }
+        
+        # Coarse-to-fine mode: the expensive copy-move pass screens a 2**level downscale
+        # and escalates to full resolution. Hashes and the detectors tied to the 8x8
+        # JPEG lattice, to the compression history (ELA) or to interpolation traces
+        # are meaningless on a resized image, and noise is cheap, so those always see
+        # the original.
+        self.pyramid_level = settings.FORENSICS_PYRAMID_LEVEL
+        self.full_resolution_detectors = ('hashes', 'noise', 'ela', 'double_compression', 'jpeg_artifacts', 'resampling')
+        self.pyramid_escalation_thresholds = {  # Coarse score that triggers a full-resolution re-run
+            'copy_move': 0.5
+        }
+        
+        # Tiled mode for very large scans: noise, ELA, block DCT and blocking analysis run
+        # on overlapping tiles in parallel and are stitched back into global scores and maps,
+        # so no stage allocates full-frame float copies
+        self.tiled_min_pixels = settings.FORENSICS_TILED_MIN_PIXELS
+        self.tile_alignment = math.lcm(16, self.ela_tile_size, self.grid_tile_size)  # JPEG MCU, ELA and grid tiles
+        self.tile_halo = 80  # Largest noise block plus filter support, on the MCU grid
+        self.tile_bytes_per_pixel = 48  # Working set of the heaviest per-tile stage
+        self.tile_size = tile_side_for_budget(
+            settings.FORENSICS_TILE_MEMORY_MB * 2 ** 20, self.tile_bytes_per_pixel, self.tile_halo, self.tile_alignment
+        )
+        self.tile_job_arrays = {
+            'noise_tile': ("gray",),
+            'ela_tile': ("rgb",),
+            'dct_tile': ("y_channel",),
+            'jpeg_tile': ("gray",)
+        }
+        
+        concurrency = self.process_pool.max_workers if self.process_pool else self.executor.max_workers
+        self.scheduler = ForensicScheduler(self.detector_registry, max_concurrency=concurrency)
+        
         logger.info("Layer 2 Forensics Service initialized")
     
-    async def analyze_image(self, image: Image.Image, reference_hash: Optional[str] = None) -> ForensicAnalysis:
+    async def analyze_image(self, image: Union[Image.Image, ImageBundle], reference_hash: Optional[str] = None,
+                            time_budget: Optional[float] = None,
+                            pyramid_level: Optional[int] = None) -> ForensicAnalysis:
         """
-        Comprehensive forensic analysis of certificate image
+        Comprehensive forensic analysis of certificate image.
+        Detectors run cheapest first; expensive ones are skipped once the outcome
+        is decisive or the time budget (seconds) runs out, and are listed in
+        skipped_detectors.
+        With pyramid_level > 0 the scale-tolerant detectors screen a 2**level
+        downscale first and only escalate to full resolution where needed;
+        score_levels records the level behind each score.
         """
         start_time = time.time()
+        if time_budget is None:
+            time_budget = self.time_budget
+        if pyramid_level is None:
+            pyramid_level = self.pyramid_level
         
         try:
-            # Convert image to different formats needed for analysis
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            gray_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-            
-            # Run all forensic analyses in parallel
-            tasks = [
-                self._detect_copy_move(gray_image),
-                self._error_level_analysis(image),
-                self._detect_double_compression(cv_image),
-                self._analyze_noise_patterns(gray_image),
-                self._calculate_image_hashes(image),
-                self._detect_resampling(gray_image),
-                self._analyze_jpeg_artifacts(cv_image)
-            ]
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # Every representation comes from the shared per-request bundle
+            bundle = ImageBundle.ensure(image)
+            gray_image = bundle.gray
+            coarse = bundle.downscaled(pyramid_level)
+            
+            # Shared integral-image statistics of the noise residual
+            if self._use_tiles(bundle):
+                noise_stats = await self._tiled_noise_statistics(bundle)
+            else:
+                loop = asyncio.get_event_loop()
+                noise_stats = await loop.run_in_executor(self.executor, self._compute_noise_statistics, gray_image)
+            
+            # Coarse pass (or the only pass at level 0)
+            jobs = self._build_detector_jobs(coarse, noise_stats)
+            if pyramid_level > 0:
+                full_jobs = self._build_detector_jobs(bundle, noise_stats)
+                jobs.update({name: full_jobs[name] for name in self.full_resolution_detectors})
+            
+            # Run the detectors through the cost-aware scheduler
+            remaining_budget = None
+            if time_budget:
+                remaining_budget = max(time_budget - (time.time() - start_time), 0.0)
+            
+            results, skipped = await self.scheduler.run(
+                jobs,
+                is_decisive=(lambda done: self._is_decisive(done, reference_hash)) if self.early_exit else None,
+                required=('hashes', 'noise'),
+                time_budget=remaining_budget
+            )
             
-            # Process results
-            copy_move_score = results[0] if not isinstance(results[0], Exception) else 0.0
-            ela_score = results[1] if not isinstance(results[1], Exception) else 0.0
-            compression_score = results[2] if not isinstance(results[2], Exception) else 0.0
-            noise_score = results[3] if not isinstance(results[3], Exception) else 0.0
-            hashes = results[4] if not isinstance(results[4], Exception) else {}
-            resampling_score = results[5] if not isinstance(results[5], Exception) else 0.0
-            jpeg_score = results[6] if not isinstance(results[6], Exception) else 0.0
+            score_levels = {
+                name: 0 if name in self.full_resolution_detectors else pyramid_level
+                for name in self.decision_weights if name in results
+            }
             
-            # Detect suspicious regions
-            suspicious_regions = await self._find_suspicious_regions(cv_image, gray_image)
+            # Escalate suspicious coarse results to full resolution (not once the budget is spent)
+            if pyramid_level > 0:
+                copy_move = results.get('copy_move')
+                if isinstance(copy_move, dict) and copy_move.get('regions'):
+                    results['copy_move'] = dict(copy_move, regions=self._scale_regions(copy_move['regions'], 2 ** pyramid_level))
+                
+                if SKIP_DEADLINE not in skipped.values():
+                    await self._escalate_to_full_resolution(bundle, results, score_levels)
+            
+            # Process results (skipped or failed detectors fall back to neutral defaults)
+            copy_move = self._detector_result(results, 'copy_move', {})
+            copy_move_score = copy_move.get('score', 0.0)
+            ela = self._detector_result(results, 'ela', {})
+            ela_score = ela.get('score', 0.0)
+            compression_score = self._detector_result(results, 'double_compression', 0.0)
+            noise_score = self._detector_result(results, 'noise', 0.0)
+            hashes = self._detector_result(results, 'hashes', {})
+            resampling_score = self._detector_result(results, 'resampling', 0.0)
+            jpeg = self._detector_result(results, 'jpeg_artifacts', {})
+            jpeg_score = jpeg.get('score', 0.0)
             
             # Determine tamper types
             tamper_types = self._classify_tamper_types(
@@ -95,6 +234,13 @@ class Layer2ForensicsService:
                 noise_score, resampling_score
             )
             
+            # Detect suspicious regions (duplicated boxes only once copy-move is flagged,
+            # repeated certificate text produces small displacement clusters on its own)
+            copy_move_regions = copy_move.get('regions', []) if TamperType.COPY_MOVE in tamper_types else []
+            suspicious_regions = await self._find_suspicious_regions(
+                noise_stats, copy_move_regions, ela.get('regions', []), jpeg.get('regions', [])
+            )
+            
             # Check hash integrity
             hash_match = None
             if reference_hash and hashes.get('sha256'):
@@ -102,6 +248,9 @@ class Layer2ForensicsService:
                 if not hash_match:
                     tamper_types.append(TamperType.HASH_MISMATCH)
             
+            # Closest issued original (a re-edited copy keeps a nearby perceptual hash)
+            issued_match = self.match_issued_certificate(hashes.get('phash'), hashes.get('sha256'))
+            
             # Calculate overall tamper probability
             tamper_probability = self._calculate_tamper_probability(
                 copy_move_score, ela_score, compression_score, 
@@ -117,9 +266,14 @@ class Layer2ForensicsService:
                 sha256_hash=hashes.get('sha256'),
                 perceptual_hash=hashes.get('phash'),
                 hash_match=hash_match,
+                **issued_match,
                 suspicious_regions=suspicious_regions,
+                noise_heatmap=noise_stats.heatmap(*self.noise_score_grid),
+                jpeg_grid_offset=jpeg.get('grid_offset'),
                 tamper_types=tamper_types,
                 tamper_probability=tamper_probability,
+                skipped_detectors=skipped,
+                score_levels=score_levels,
                 analysis_time=time.time() - start_time
             )
             
@@ -130,12 +284,177 @@ class Layer2ForensicsService:
             logger.error(f"Forensic analysis failed: {str(e)}")
             return ForensicAnalysis(
                 tamper_probability=0.5,  # Uncertain due to error
-                analysis_time=time.time() - start_time
+                analysis_time=time.time() - start_time,
+                error_message=str(e)
             )
     
-    async def _detect_copy_move(self, gray_image: np.ndarray) -> float:
+    async def _escalate_to_full_resolution(self, bundle: ImageBundle, results: Dict[str, Any],
+                                           score_levels: Dict[str, int]):
+        """
+        Re-run coarse detectors whose score passes its escalation threshold on the
+        whole full-resolution image. Updates results and score_levels in place.
+        """
+        rerun = sorted(
+            name for name, threshold in self.pyramid_escalation_thresholds.items()
+            if name in results and self._detector_score(results[name]) >= threshold
+        )
+        if not rerun:
+            return
+        
+        full_jobs = self._build_detector_jobs(bundle, None)
+        rerun_results = await asyncio.gather(*(full_jobs[name]() for name in rerun), return_exceptions=True)
+        for name, result in zip(rerun, rerun_results):
+            results[name] = result
+            score_levels[name] = 0
+        
+        logger.info(f"Pyramid escalation: re-ran {rerun}")
+    
+    def _scale_regions(self, regions: List[List[int]], scale: int) -> List[List[int]]:
+        """Map coarse-level boxes back to full-resolution coordinates"""
+        return [[int(v) * scale for v in box] for box in regions]
+    
+    def _build_detector_jobs(self, bundle: ImageBundle, noise_stats: LocalStatistics) -> Dict[str, Any]:
+        """Coroutine factories for every detector, keyed by registry name"""
+        if self.process_pool is not None:
+            # Worker processes read the image arrays from shared memory
+            pool = self.process_pool
+            jobs = {
+                name: (lambda name=name, arrays=arrays: pool.run("layer2", name, bundle, arrays))
+                for name, arrays in self.process_job_arrays.items()
+            }
+        else:
+            jobs = {
+                'copy_move': lambda: self._detect_copy_move(bundle.gray),
+                'ela': lambda: self._error_level_analysis(bundle),
+                'double_compression': lambda: self._detect_double_compression(bundle.y_channel),
+                'hashes': lambda: self._calculate_image_hashes(bundle.rgb),
+                'resampling': lambda: self._detect_resampling(self._resampling_plane(bundle)),
+                'jpeg_artifacts': lambda: self._analyze_jpeg_artifacts(bundle.gray)
+            }
+        
+        if self._use_tiles(bundle):
+            # Large scans: the full-frame float stages run tile by tile instead
+            jobs.update({
+                'ela': lambda: self._tiled_error_level_analysis(bundle),
+                'double_compression': lambda: self._tiled_double_compression(bundle),
+                'jpeg_artifacts': lambda: self._tiled_jpeg_artifacts(bundle)
+            })
+        
+        # Noise scoring reuses the statistics already built for regions and the heatmap
+        jobs['noise'] = lambda: self._analyze_noise_patterns(noise_stats)
+        return jobs
+    
+    def _use_tiles(self, bundle: ImageBundle) -> bool:
+        """Tiled execution for scans above the pixel threshold"""
+        width, height = bundle.size
+        return bool(self.tiled_min_pixels) and width * height >= self.tiled_min_pixels
+    
+    async def _run_tiles(self, bundle: ImageBundle, job: str) -> List[Tuple[Tile, Any]]:
+        """Run one per-tile job over every tile of the image in parallel, (tile, result) in order"""
+        width, height = bundle.size
+        tiles = tile_layout(width, height, self.tile_size, self.tile_halo)
+        
+        if self.process_pool is not None:
+            arrays = self.tile_job_arrays[job]
+            runs = [self.process_pool.run("layer2", job, bundle, arrays, tile=tile) for tile in tiles]
+        else:
+            loop = asyncio.get_event_loop()
+            runs = [loop.run_in_executor(self.executor, self._process_detector_sync, job, bundle, tile) for tile in tiles]
+        
+        return list(zip(tiles, await asyncio.gather(*runs)))
+    
+    @property
+    def phash_index(self) -> PerceptualHashIndex:
+        """
+        Issued-certificate index, loaded on first use: only the serving process
+        looks matches up, so forensic worker processes never load the snapshot
+        """
+        return get_phash_index(settings.PHASH_INDEX_PATH)
+    
+    def match_issued_certificate(self, phash: Optional[str], sha256: Optional[str]) -> Dict[str, Any]:
+        """
+        ForensicAnalysis near-duplicate fields for an upload. Depends on the live index,
+        so cached analyses are refreshed with it rather than trusted.
+        """
+        nearest_match = self._find_nearest_issued(phash)
+        return {
+            'nearest_issued_certificate': nearest_match[0] if nearest_match else None,
+            'perceptual_distance': nearest_match[1] if nearest_match else None,
+            'issued_digest_match': self._issued_digest_match(nearest_match[0] if nearest_match else None, sha256)
+        }
+    
+    def _find_nearest_issued(self, phash: Optional[str]) -> Optional[Tuple[str, int]]:
+        """(certificate_id, distance) of the closest indexed certificate, if within range"""
+        if not phash:
+            return None
+        try:
+            return self.phash_index.nearest(phash, self.phash_match_distance)
+        except Exception as e:
+            logger.error(f"Perceptual hash lookup failed: {str(e)}")
+            return None
+    
+    def _issued_digest_match(self, certificate_id: Optional[str], sha256: Optional[str]) -> Optional[bool]:
+        """Whether the upload is pixel-identical to the matched certificate (None when its digest is unknown)"""
+        if not certificate_id or not sha256:
+            return None
+        try:
+            digests = self.phash_index.digests(certificate_id)
+        except Exception as e:
+            logger.error(f"Issued digest lookup failed: {str(e)}")
+            return None
+        return sha256 in digests if digests else None
+    
+    def _detector_result(self, results: Dict[str, Any], name: str, default: Any) -> Any:
+        """Detector output, or the default when it was skipped or raised"""
+        result = results.get(name, default)
+        return default if isinstance(result, Exception) else result
+    
+    def _detector_score(self, result: Any) -> float:
+        """Scalar score of a detector output (dict results carry a 'score' key)"""
+        if isinstance(result, dict):
+            return result.get('score', 0.0)
+        if isinstance(result, (int, float)):
+            return float(result)
+        return 0.0
+    
+    def _is_decisive(self, results: Dict[str, Any], reference_hash: Optional[str]) -> bool:
+        """True once the detectors still outstanding can no longer change the verdict"""
+        # A hash mismatch settles integrity on its own
+        hashes = results.get('hashes')
+        if reference_hash and isinstance(hashes, dict) and hashes.get('sha256'):
+            if hashes['sha256'] != reference_hash:
+                return True
+        
+        # Bound the tamper probability by the weights still outstanding
+        known, outstanding = 0.0, 0.0
+        for name, weight in self.decision_weights.items():
+            if name in results:
+                known += weight * self._detector_score(results[name])
+            else:
+                outstanding += weight
+        
+        return known >= self.tamper_decision_threshold or known + outstanding < self.clean_decision_threshold
+    
+    def _process_detector_sync(self, job: str, bundle: ImageBundle, tile: Optional[Tile] = None) -> Any:
+        """Entry point for pooled worker processes: run one detector (or one tile of it) on a shared-memory bundle"""
+        jobs = {
+            "copy_move": lambda: self._copy_move_detection_sync(bundle.gray),
+            "ela": lambda: self._ela_analysis_sync(bundle),
+            "double_compression": lambda: self._double_compression_sync(compute_block_dct(bundle.y_channel)),
+            "hashes": lambda: self._calculate_hashes_sync(bundle.rgb),
+            "resampling": lambda: self._resampling_detection_sync(self._resampling_plane(bundle)),
+            "jpeg_artifacts": lambda: self._jpeg_artifacts_sync(bundle.gray),
+            "noise": lambda: self._noise_analysis_sync(self._compute_noise_statistics(bundle.gray)),
+            "noise_tile": lambda: self._noise_tile_sync(bundle.gray, tile),
+            "ela_tile": lambda: self._ela_tile_sync(bundle.rgb, tile),
+            "dct_tile": lambda: self._dct_tile_sync(bundle.y_channel, tile),
+            "jpeg_tile": lambda: self._jpeg_tile_sync(bundle.gray, tile),
+        }
+        return jobs[job]()
+    
+    async def _detect_copy_move(self, gray_image: np.ndarray) -> Dict[str, Any]:
         """
-        Detect copy-move tampering using SIFT feature matching
+        Detect copy-move tampering using keypoint self-matching
         """
         try:
             loop = asyncio.get_event_loop()
@@ -146,54 +465,17 @@ class Layer2ForensicsService:
             )
         except Exception as e:
             logger.error(f"Copy-move detection failed: {str(e)}")
-            return 0.0
+            return {}
     
-    def _copy_move_detection_sync(self, gray_image: np.ndarray) -> float:
+    def _copy_move_detection_sync(self, gray_image: np.ndarray) -> Dict[str, Any]:
         """Synchronous copy-move detection"""
         try:
-            # Extract SIFT features
-            keypoints, descriptors = self.sift_detector.detectAndCompute(gray_image, None)
-            
-            if descriptors is None or len(descriptors) < 10:
-                return 0.0
-            
-            # Create FLANN matcher
-            FLANN_INDEX_KDTREE = 1
-            index_params = dict(algorithm=FLANN_INDEX_KDTREE, trees=5)
-            search_params = dict(checks=50)
-            flann = cv2.FlannBasedMatcher(index_params, search_params)
-            
-            # Match features against themselves
-            matches = flann.knnMatch(descriptors, descriptors, k=3)
-            
-            # Filter good matches (excluding self-matches)
-            good_matches = []
-            for match_group in matches:
-                if len(match_group) >= 2:
-                    m, n = match_group[0], match_group[1]
-                    # Exclude self-matches and apply Lowe's ratio test
-                    if m.queryIdx != m.trainIdx and m.distance < 0.7 * n.distance:
-                        good_matches.append(m)
-            
-            # Calculate copy-move score based on number of suspicious matches
-            total_features = len(keypoints)
-            suspicious_matches = len(good_matches)
-            
-            if total_features == 0:
-                return 0.0
-            
-            copy_move_ratio = suspicious_matches / total_features
-            
-            # Apply threshold and normalize
-            copy_move_score = min(copy_move_ratio * 2.0, 1.0)
-            
-            return copy_move_score
-            
+            return self.copy_move_detector.detect(gray_image)
         except Exception as e:
-            logger.error(f"SIFT copy-move detection error: {str(e)}")
-            return 0.0
+            logger.error(f"Copy-move detection error: {str(e)}")
+            return {}
     
-    async def _error_level_analysis(self, image: Image.Image) -> float:
+    async def _error_level_analysis(self, bundle: ImageBundle) -> Dict[str, Any]:
         """
         Error Level Analysis to detect manipulated regions
         """
@@ -202,55 +484,56 @@ class Layer2ForensicsService:
             return await loop.run_in_executor(
                 self.executor, 
                 self._ela_analysis_sync, 
-                image
+                bundle
             )
         except Exception as e:
             logger.error(f"ELA analysis failed: {str(e)}")
-            return 0.0
+            return {}
     
-    def _ela_analysis_sync(self, image: Image.Image) -> float:
-        """Synchronous ELA analysis"""
+    def _ela_analysis_sync(self, bundle: ImageBundle) -> Dict[str, Any]:
+        """Synchronous ELA analysis: one recompression feeds the score and the regions"""
         try:
-            # Save image at different quality levels
-            import io
-            
-            # Original image
-            original_buffer = io.BytesIO()
-            image.save(original_buffer, format='JPEG', quality=90)
-            original_size = len(original_buffer.getvalue())
-            
-            # Re-compressed image
-            temp_buffer = io.BytesIO()
-            image.save(temp_buffer, format='JPEG', quality=90)
-            temp_buffer.seek(0)
-            recompressed = Image.open(temp_buffer)
-            
-            # Convert to numpy arrays
-            original_array = np.array(image)
-            recompressed_array = np.array(recompressed)
-            
-            # Calculate difference
-            if original_array.shape != recompressed_array.shape:
-                return 0.0
+            ela_map = ErrorLevelMap(bundle.pil, bundle.rgb, self.ela_quality, self.ela_tile_size)
             
-            # Calculate ELA
-            ela_diff = np.abs(original_array.astype(np.float32) - recompressed_array.astype(np.float32))
+            return {
+                'score': ela_map.score(),  # Normalize to 0-1
+                'regions': ela_map.anomalous_regions(self.ela_region_threshold)
+            }
             
-            # Calculate statistics
-            mean_error = np.mean(ela_diff)
-            max_error = np.max(ela_diff)
-            std_error = np.std(ela_diff)
+        except Exception as e:
+            logger.error(f"ELA analysis error: {str(e)}")
+            return {}
+    
+    async def _tiled_error_level_analysis(self, bundle: ImageBundle) -> Dict[str, Any]:
+        """ELA over image tiles, stitched into the full-image tile grid and mean error"""
+        try:
+            width, height = bundle.size
+            t = self.ela_tile_size
+            tiles = np.zeros((height // t, width // t), dtype=np.float32)
+            error_sum = 0.0
             
-            # Normalize ELA score
-            ela_score = min(mean_error / 50.0, 1.0)  # Normalize to 0-1
+            for tile, (tile_error_sum, means) in await self._run_tiles(bundle, 'ela_tile'):
+                error_sum += tile_error_sum
+                row, col = tile.core[1] // t, tile.core[0] // t
+                tiles[row:row + means.shape[0], col:col + means.shape[1]] = means
             
-            return ela_score
+            ela_map = ErrorLevelMap.from_tiles(tiles, error_sum / max(width * height, 1), self.ela_quality, t)
+            return {
+                'score': ela_map.score(),
+                'regions': ela_map.anomalous_regions(self.ela_region_threshold)
+            }
             
         except Exception as e:
-            logger.error(f"ELA analysis error: {str(e)}")
-            return 0.0
+            logger.error(f"Tiled ELA analysis failed: {str(e)}")
+            return {}
+    
+    def _ela_tile_sync(self, rgb: np.ndarray, tile: Tile) -> Tuple[float, np.ndarray]:
+        """Recompression error sum and ELA tile means over one tile core"""
+        crop = np.ascontiguousarray(tile.crop(rgb))
+        error = recompression_error(Image.fromarray(crop), crop, self.ela_quality)[tile.core_slices]
+        return float(error.sum(dtype=np.float64)), tile_means(error, self.ela_tile_size)
     
-    async def _detect_double_compression(self, cv_image: np.ndarray) -> float:
+    async def _detect_double_compression(self, y_channel: np.ndarray) -> float:
         """
         Detect double JPEG compression artifacts
         """
@@ -258,36 +541,20 @@ class Layer2ForensicsService:
             loop = asyncio.get_event_loop()
             return await loop.run_in_executor(
                 self.executor, 
-                self._double_compression_sync, 
-                cv_image
+                lambda: self._double_compression_sync(compute_block_dct(y_channel))
             )
         except Exception as e:
             logger.error(f"Double compression detection failed: {str(e)}")
             return 0.0
     
-    def _double_compression_sync(self, cv_image: np.ndarray) -> float:
+    def _double_compression_sync(self, block_dct: BlockDCT) -> float:
         """Synchronous double compression detection"""
         try:
-            # Convert to YUV color space
-            yuv_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2YUV)
-            y_channel = yuv_image[:, :, 0]
-            
-            # Apply DCT to 8x8 blocks
-            h, w = y_channel.shape
-            dct_coeffs = []
-            
-            for i in range(0, h - 8, 8):
-                for j in range(0, w - 8, 8):
-                    block = y_channel[i:i+8, j:j+8].astype(np.float32)
-                    dct_block = cv2.dct(block)
-                    dct_coeffs.append(dct_block.flatten())
-            
-            if not dct_coeffs:
+            if block_dct.num_blocks == 0:
                 return 0.0
             
-            # Analyze DCT coefficient histogram
-            all_coeffs = np.concatenate(dct_coeffs)
-            hist, bins = np.histogram(all_coeffs, bins=100, range=(-50, 50))
+            # Analyze DCT coefficient histogram pooled over all frequencies
+            hist = block_dct.histogram(bins=self.dct_histogram_bins, value_range=self.dct_histogram_range)
             
             # Look for periodic patterns indicating double compression
             # This is a simplified approach - in practice, you'd use more sophisticated methods
@@ -299,37 +566,67 @@ class Layer2ForensicsService:
             logger.error(f"Double compression analysis error: {str(e)}")
             return 0.0
     
-    def _detect_periodicity(self, histogram: np.ndarray) -> float:
-        """Detect periodic patterns in DCT coefficient histogram"""
+    async def _tiled_double_compression(self, bundle: ImageBundle) -> float:
+        """Double compression score from block DCT histograms summed over image tiles"""
+        try:
+            hist = sum(partial for _, partial in await self._run_tiles(bundle, 'dct_tile'))
+            if not np.any(hist):
+                return 0.0
+            
+            return min(self._detect_periodicity(hist), 1.0)
+            
+        except Exception as e:
+            logger.error(f"Tiled double compression detection failed: {str(e)}")
+            return 0.0
+    
+    def _dct_tile_sync(self, y_channel: np.ndarray, tile: Tile) -> np.ndarray:
+        """Pooled DCT coefficient histogram of the 8x8 blocks in one tile core"""
+        x1, y1, x2, y2 = tile.core
+        block_dct = compute_block_dct(y_channel[y1:y2, x1:x2])
+        return block_dct.histogram(bins=self.dct_histogram_bins, value_range=self.dct_histogram_range)
+    
+    def _detect_periodicity(self, histograms: np.ndarray) -> np.ndarray:
+        """
+        Detect periodic patterns in DCT coefficient histograms.
+        Accepts one histogram (returns a float) or a (K, bins) stack (returns K scores).
+        """
         try:
-            # Simple approach: look for regular patterns
-            # Calculate autocorrelation
-            autocorr = np.correlate(histogram, histogram, mode='full')
-            autocorr = autocorr[autocorr.size // 2:]
+            single = np.ndim(histograms) == 1
+            hists = np.atleast_2d(np.asarray(histograms, dtype=np.float64))
+            n_bins = hists.shape[1]
             
             # Find peaks indicating periodicity
-            if len(autocorr) < 10:
-                return 0.0
+            if n_bins < 10:
+                return 0.0 if single else np.zeros(hists.shape[0])
+            
+            # Non-negative lags of the autocorrelation for every histogram at once
+            n_fft = 1 << int(np.ceil(np.log2(2 * n_bins - 1)))
+            spectrum = np.fft.rfft(hists, n=n_fft, axis=1)
+            autocorr = np.fft.irfft(spectrum * np.conj(spectrum), n=n_fft, axis=1)[:, :n_bins]
             
             # Normalize and look for secondary peaks
-            autocorr_norm = autocorr / autocorr[0] if autocorr[0] > 0 else autocorr
+            zero_lag = autocorr[:, :1]
+            autocorr_norm = np.divide(autocorr, zero_lag, out=autocorr.copy(), where=zero_lag > 0)
             
-            # Simple peak detection
-            peaks = []
-            for i in range(1, min(20, len(autocorr_norm) - 1)):
-                if (autocorr_norm[i] > autocorr_norm[i-1] and 
-                    autocorr_norm[i] > autocorr_norm[i+1] and 
-                    autocorr_norm[i] > 0.1):
-                    peaks.append(autocorr_norm[i])
+            # Simple peak detection over lags 1..19
+            last = min(20, n_bins - 1)
+            centre = autocorr_norm[:, 1:last]
+            is_peak = ((centre > autocorr_norm[:, 0:last - 1]) &
+                       (centre > autocorr_norm[:, 2:last + 1]) &
+                       (centre > 0.1))
             
-            # Score based on peak strength
-            periodicity_score = sum(peaks) / len(peaks) if peaks else 0.0
-            return min(periodicity_score * 2.0, 1.0)
+            # Score based on mean peak strength
+            peak_counts = is_peak.sum(axis=1)
+            peak_sums = np.where(is_peak, centre, 0.0).sum(axis=1)
+            periodicity = np.divide(peak_sums, peak_counts, out=np.zeros_like(peak_sums), where=peak_counts > 0)
+            scores = np.minimum(periodicity * 2.0, 1.0)
+            
+            return float(scores[0]) if single else scores
             
         except Exception:
             return 0.0
     
-    async def _analyze_noise_patterns(self, gray_image: np.ndarray) -> float:
+    async def _analyze_noise_patterns(self, noise_stats: LocalStatistics) -> float:
         """
         Analyze noise patterns for inconsistencies indicating tampering
         """
@@ -338,30 +635,39 @@ class Layer2ForensicsService:
             return await loop.run_in_executor(
                 self.executor, 
                 self._noise_analysis_sync, 
-                gray_image
+                noise_stats
             )
         except Exception as e:
             logger.error(f"Noise analysis failed: {str(e)}")
             return 0.0
     
-    def _noise_analysis_sync(self, gray_image: np.ndarray) -> float:
+    def _compute_noise_statistics(self, gray_image: np.ndarray) -> LocalStatistics:
+        """Extract the noise residual once and build its summed-area tables"""
+        return LocalStatistics(self._extract_noise(gray_image))
+    
+    def _stitched_noise_statistics(self, shape: Tuple[int, int]) -> StitchedStatistics:
+        return StitchedStatistics(shape, (self.noise_score_grid, self.noise_region_grid))
+    
+    async def _tiled_noise_statistics(self, bundle: ImageBundle) -> StitchedStatistics:
+        """Noise residual statistics gathered tile by tile, without a full-frame residual"""
+        width, height = bundle.size
+        noise_stats = self._stitched_noise_statistics((height, width))
+        for _, partial in await self._run_tiles(bundle, 'noise_tile'):
+            noise_stats.add(partial)
+        return noise_stats
+    
+    def _noise_tile_sync(self, gray_image: np.ndarray, tile: Tile) -> Dict[str, Any]:
+        """Noise residual moments one tile contributes (residual taken over the padded crop)"""
+        noise_stats = self._stitched_noise_statistics(gray_image.shape)
+        return noise_stats.tile_partial(self._extract_noise(tile.crop(gray_image)), tile)
+    
+    def _noise_analysis_sync(self, noise_stats: LocalStatistics) -> float:
         """Synchronous noise pattern analysis"""
         try:
-            # Apply noise extraction filter
-            noise = self._extract_noise(gray_image)
+            # Noise variance of every block in the grid
+            noise_variances = noise_stats.variance_map(*self.noise_score_grid)
             
-            # Divide image into blocks and analyze noise variance
-            h, w = gray_image.shape
-            block_size = 64
-            noise_variances = []
-            
-            for i in range(0, h - block_size, block_size // 2):
-                for j in range(0, w - block_size, block_size // 2):
-                    noise_block = noise[i:i+block_size, j:j+block_size]
-                    variance = np.var(noise_block)
-                    noise_variances.append(variance)
-            
-            if not noise_variances:
+            if noise_variances.size == 0:
                 return 0.0
             
             # Calculate coefficient of variation
@@ -396,51 +702,37 @@ class Layer2ForensicsService:
         except Exception:
             return np.zeros_like(gray_image, dtype=np.float32)
     
-    async def _calculate_image_hashes(self, image: Image.Image) -> Dict[str, str]:
+    async def _calculate_image_hashes(self, rgb: np.ndarray) -> Dict[str, str]:
         """Calculate various image hashes for integrity checking"""
         try:
             loop = asyncio.get_event_loop()
             return await loop.run_in_executor(
                 self.executor, 
                 self._calculate_hashes_sync, 
-                image
+                rgb
             )
         except Exception as e:
             logger.error(f"Hash calculation failed: {str(e)}")
             return {}
     
-    def _calculate_hashes_sync(self, image: Image.Image) -> Dict[str, str]:
-        """Synchronous hash calculation"""
+    def _calculate_hashes_sync(self, rgb: np.ndarray) -> Dict[str, str]:
+        """Synchronous hash calculation (canonical pixel fingerprints, same as issuance)"""
         try:
-            # Convert image to bytes for SHA256
-            import io
-            img_bytes = io.BytesIO()
-            image.save(img_bytes, format='PNG')
-            img_data = img_bytes.getvalue()
-            
-            # Calculate SHA256
-            sha256_hash = hashlib.sha256(img_data).hexdigest()
-            
-            # Calculate perceptual hash
-            phash = str(imagehash.phash(image))
-            
-            # Calculate average hash
-            ahash = str(imagehash.average_hash(image))
-            
-            # Calculate difference hash
-            dhash = str(imagehash.dhash(image))
-            
-            return {
-                'sha256': sha256_hash,
-                'phash': phash,
-                'ahash': ahash,
-                'dhash': dhash
-            }
+            return compute_fingerprints(rgb)
             
         except Exception as e:
             logger.error(f"Hash calculation error: {str(e)}")
             return {}
     
+    def _resampling_plane(self, bundle: ImageBundle) -> np.ndarray:
+        """
+        Grayscale plane for the resampling spectrum: a power-of-two centre
+        square at native resolution. Never resized, interpolation would wipe
+        out the periodic traces the detector looks for; cropping keeps them and
+        the cost independent of the scan size.
+        """
+        return power_of_two_square(bundle.gray, self.resampling_crop_side)
+    
     async def _detect_resampling(self, gray_image: np.ndarray) -> float:
         """
         Detect image resampling artifacts
@@ -459,45 +751,24 @@ class Layer2ForensicsService:
     def _resampling_detection_sync(self, gray_image: np.ndarray) -> float:
         """Synchronous resampling detection"""
         try:
-            # Apply second derivative to detect linear dependencies
-            laplacian = cv2.Laplacian(gray_image, cv2.CV_64F)
-            
-            # Calculate variance of Laplacian
-            variance = cv2.Laplacian(gray_image, cv2.CV_64F).var()
-            
-            # Apply FFT to detect periodic patterns
-            f_transform = np.fft.fft2(gray_image)
-            f_shift = np.fft.fftshift(f_transform)
-            magnitude_spectrum = 20 * np.log(np.abs(f_shift) + 1)
-            
-            # Look for grid patterns in frequency domain
-            h, w = magnitude_spectrum.shape
-            center_h, center_w = h // 2, w // 2
-            
-            # Sample radial lines from center
-            radial_profiles = []
-            for angle in range(0, 180, 15):
-                rad = np.radians(angle)
-                for r in range(1, min(center_h, center_w)):
-                    y = int(center_h + r * np.sin(rad))
-                    x = int(center_w + r * np.cos(rad))
-                    if 0 <= y < h and 0 <= x < w:
-                        radial_profiles.append(magnitude_spectrum[y, x])
+            # Sample radial lines of the windowed, padded half-spectrum to look
+            # for grid patterns in the frequency domain
+            radial_profiles = radial_log_spectrum(gray_image)
             
             # Calculate periodicity in radial profiles
-            if radial_profiles:
+            if radial_profiles.size:
                 profile_variance = np.var(radial_profiles)
                 resampling_score = min(profile_variance / 1000.0, 1.0)
             else:
                 resampling_score = 0.0
             
-            return resampling_score
+            return float(resampling_score)
             
         except Exception as e:
             logger.error(f"Resampling detection error: {str(e)}")
             return 0.0
     
-    async def _analyze_jpeg_artifacts(self, cv_image: np.ndarray) -> float:
+    async def _analyze_jpeg_artifacts(self, gray_image: np.ndarray) -> Dict[str, Any]:
         """
         Analyze JPEG compression artifacts for inconsistencies
         """
@@ -506,112 +777,147 @@ class Layer2ForensicsService:
             return await loop.run_in_executor(
                 self.executor, 
                 self._jpeg_artifacts_sync, 
-                cv_image
+                gray_image
             )
         except Exception as e:
             logger.error(f"JPEG artifacts analysis failed: {str(e)}")
-            return 0.0
+            return {}
     
-    def _jpeg_artifacts_sync(self, cv_image: np.ndarray) -> float:
+    def _jpeg_artifacts_sync(self, gray_image: np.ndarray) -> Dict[str, Any]:
         """Synchronous JPEG artifacts analysis"""
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+            # Gradients shared by the blocking and ringing checks
+            gradients = GradientField(gray_image)
             
-            # Detect blocking artifacts
-            blocking_score = self._detect_blocking_artifacts(gray)
+            # Detect blocking artifacts on the dominant 8x8 grid
+            grid = GridAlignment(gradients, tile_size=self.grid_tile_size)
+            blocking_score = self._detect_blocking_artifacts(grid)
             
             # Detect ringing artifacts
-            ringing_score = self._detect_ringing_artifacts(gray)
+            ringing_score = self._detect_ringing_artifacts(gray_image, gradients)
             
-            # Combine scores
-            jpeg_score = (blocking_score + ringing_score) / 2.0
-            
-            return jpeg_score
+            return self._jpeg_artifacts_result(grid, blocking_score, ringing_score)
             
         except Exception as e:
             logger.error(f"JPEG artifacts analysis error: {str(e)}")
-            return 0.0
+            return {}
     
-    def _detect_blocking_artifacts(self, gray_image: np.ndarray) -> float:
-        """Detect JPEG blocking artifacts"""
+    def _jpeg_artifacts_result(self, grid: GridAlignment, blocking_score: float, ringing_score: float) -> Dict[str, Any]:
+        # Combine scores
+        jpeg_score = (blocking_score + ringing_score) / 2.0
+        
+        return {
+            'score': jpeg_score,
+            'grid_offset': list(grid.offset),
+            'regions': grid.misaligned_regions(self.grid_min_contrast, self.grid_min_energy)
+        }
+    
+    async def _tiled_jpeg_artifacts(self, bundle: ImageBundle) -> Dict[str, Any]:
+        """JPEG artifacts from grid boundary sums and ringing moments stitched over image tiles"""
         try:
-            h, w = gray_image.shape
-            
-            # Calculate horizontal and vertical differences at 8-pixel intervals
-            horizontal_diffs = []
-            vertical_diffs = []
-            
-            # Horizontal blocking
-            for i in range(0, h, 8):
-                if i + 1 < h:
-                    diff = np.mean(np.abs(gray_image[i, :].astype(np.float32) - 
-                                        gray_image[i+1, :].astype(np.float32)))
-                    horizontal_diffs.append(diff)
-            
-            # Vertical blocking
-            for j in range(0, w, 8):
-                if j + 1 < w:
-                    diff = np.mean(np.abs(gray_image[:, j].astype(np.float32) - 
-                                        gray_image[:, j+1].astype(np.float32)))
-                    vertical_diffs.append(diff)
-            
-            # Calculate blocking score
-            if horizontal_diffs and vertical_diffs:
-                avg_h_diff = np.mean(horizontal_diffs)
-                avg_v_diff = np.mean(vertical_diffs)
-                blocking_score = (avg_h_diff + avg_v_diff) / 100.0
-                return min(blocking_score, 1.0)
+            width, height = bundle.size
+            t = self.grid_tile_size
+            sums = {
+                'col_sums': np.zeros(width),
+                'row_sums': np.zeros(height),
+                'tile_col_energy': np.zeros((height // t, width // t, 8), dtype=np.float32),
+                'tile_row_energy': np.zeros((height // t, width // t, 8), dtype=np.float32)
+            }
+            ringing = np.zeros(3)
+            
+            for tile, partial in await self._run_tiles(bundle, 'jpeg_tile'):
+                x1, y1, x2, y2 = tile.core
+                sums['col_sums'][x1:x2] += partial['col_sums']
+                sums['row_sums'][y1:y2] += partial['row_sums']
+                for key in ('tile_col_energy', 'tile_row_energy'):
+                    rows, cols = partial[key].shape[:2]
+                    sums[key][y1 // t:y1 // t + rows, x1 // t:x1 // t + cols] = partial[key]
+                ringing += partial['ringing']
+            
+            grid = GridAlignment.from_sums(sums, (height, width), t)
+            return self._jpeg_artifacts_result(
+                grid, self._detect_blocking_artifacts(grid), self._ringing_score(*ringing)
+            )
             
-            return 0.0
+        except Exception as e:
+            logger.error(f"Tiled JPEG artifacts analysis failed: {str(e)}")
+            return {}
+    
+    def _jpeg_tile_sync(self, gray_image: np.ndarray, tile: Tile) -> Dict[str, Any]:
+        """Grid boundary sums and ringing moments over one tile core"""
+        crop = tile.crop(gray_image)
+        gradients = GradientField(crop)
+        partial = boundary_sums(gradients, self.grid_tile_size, region=tile.core_slices)
+        partial['ringing'] = self._ringing_moments(crop, gradients, tile.core_slices)
+        return partial
+    
+    def _detect_blocking_artifacts(self, grid: GridAlignment) -> float:
+        """Detect JPEG blocking artifacts"""
+        try:
+            # Excess boundary energy on the dominant grid over the other 7 phases per axis
+            return min(grid.blockiness(), 1.0)
             
         except Exception:
             return 0.0
     
-    def _detect_ringing_artifacts(self, gray_image: np.ndarray) -> float:
+    def _detect_ringing_artifacts(self, gray_image: np.ndarray, gradients: GradientField) -> float:
         """Detect JPEG ringing artifacts"""
         try:
-            # Apply edge detection
-            edges = cv2.Canny(gray_image, 50, 150)
-            
-            # Dilate edges to create regions
-            kernel = np.ones((3, 3), np.uint8)
-            dilated_edges = cv2.dilate(edges, kernel, iterations=1)
-            
-            # Calculate gradient magnitude near edges
-            grad_x = cv2.Sobel(gray_image, cv2.CV_64F, 1, 0, ksize=3)
-            grad_y = cv2.Sobel(gray_image, cv2.CV_64F, 0, 1, ksize=3)
-            gradient_magnitude = np.sqrt(grad_x**2 + grad_y**2)
-            
-            # Calculate ringing measure
-            edge_pixels = dilated_edges > 0
-            if np.sum(edge_pixels) > 0:
-                edge_gradients = gradient_magnitude[edge_pixels]
-                ringing_score = np.std(edge_gradients) / 100.0
-                return min(ringing_score, 1.0)
-            
-            return 0.0
+            return self._ringing_score(*self._ringing_moments(gray_image, gradients))
             
         except Exception:
             return 0.0
     
-    async def _find_suspicious_regions(self, cv_image: np.ndarray, gray_image: np.ndarray) -> List[List[int]]:
+    def _ringing_moments(self, gray_image: np.ndarray, gradients: GradientField,
+                         region: Optional[Tuple[slice, slice]] = None) -> Tuple[int, float, float]:
+        """Count, sum and sum of squares of the gradient magnitude near edges (within region)"""
+        # Apply edge detection
+        edges = cv2.Canny(gray_image, 50, 150)
+        
+        # Dilate edges to create regions
+        kernel = np.ones((3, 3), np.uint8)
+        dilated_edges = cv2.dilate(edges, kernel, iterations=1)
+        
+        # Gradient magnitude near edges
+        gradient_magnitude = gradients.magnitude
+        if region is not None:
+            dilated_edges, gradient_magnitude = dilated_edges[region], gradient_magnitude[region]
+        
+        edge_gradients = gradient_magnitude[dilated_edges > 0].astype(np.float64)
+        return edge_gradients.size, float(edge_gradients.sum()), float(np.square(edge_gradients).sum())
+    
+    def _ringing_score(self, count: float, total: float, sq_total: float) -> float:
+        """Calculate ringing measure: spread of the gradient magnitude near edges"""
+        if count == 0:
+            return 0.0
+        
+        mean = total / count
+        ringing_score = np.sqrt(max(sq_total / count - mean ** 2, 0.0)) / 100.0
+        return min(float(ringing_score), 1.0)
+    
+    async def _find_suspicious_regions(self, noise_stats: LocalStatistics,
+                                       copy_move_regions: List[List[int]],
+                                       ela_regions: List[List[int]],
+                                       grid_regions: List[List[int]]) -> List[List[int]]:
         """
         Find regions that appear suspicious based on multiple criteria
         """
         try:
-            suspicious_regions = []
+            # Duplicated source/target regions from copy-move clustering
+            suspicious_regions = list(copy_move_regions)
             
             # Find regions with inconsistent noise
-            noise_regions = await self._find_noise_inconsistent_regions(gray_image)
+            noise_regions = await self._find_noise_inconsistent_regions(noise_stats)
             suspicious_regions.extend(noise_regions)
             
-            # Find regions with ELA anomalies
-            ela_regions = await self._find_ela_anomalous_regions(cv_image)
+            # Tiles with anomalous ELA error
             suspicious_regions.extend(ela_regions)
             
-            # Merge overlapping regions
-            merged_regions = self._merge_overlapping_regions(suspicious_regions)
+            # Tiles whose JPEG grid disagrees with the rest of the image
+            suspicious_regions.extend(grid_regions)
+            
+            # Merge overlapping regions (including transitive chains)
+            merged_regions = merge_overlapping_boxes(suspicious_regions)
             
             return merged_regions
             
@@ -619,85 +925,24 @@ class Layer2ForensicsService:
             logger.error(f"Suspicious region detection failed: {str(e)}")
             return []
     
-    async def _find_noise_inconsistent_regions(self, gray_image: np.ndarray) -> List[List[int]]:
+    async def _find_noise_inconsistent_regions(self, noise_stats: LocalStatistics) -> List[List[int]]:
         """Find regions with inconsistent noise patterns"""
         try:
-            regions = []
-            noise = self._extract_noise(gray_image)
-            
-            h, w = gray_image.shape
-            block_size = 32
-            threshold = 2.0  # Standard deviations above mean
-            
-            # Calculate global noise statistics
-            global_noise_std = np.std(noise)
-            
-            for i in range(0, h - block_size, block_size // 2):
-                for j in range(0, w - block_size, block_size // 2):
-                    block_noise = noise[i:i+block_size, j:j+block_size]
-                    block_std = np.std(block_noise)
-                    
-                    # Check if block noise is significantly different
-                    if abs(block_std - global_noise_std) > threshold * global_noise_std:
-                        regions.append([j, i, j + block_size, i + block_size])
-            
-            return regions
-            
-        except Exception:
-            return []
-    
-    async def _find_ela_anomalous_regions(self, cv_image: np.ndarray) -> List[List[int]]:
-        """Find regions with ELA anomalies"""
-        try:
-            # This is a placeholder implementation
-            # In practice, you would analyze the ELA image for high-error regions
-            regions = []
-            
-            # Convert to PIL for ELA analysis
-            pil_image = Image.fromarray(cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB))
-            
-            # Perform simplified ELA region analysis
-            # This would be more sophisticated in a production system
-            h, w = cv_image.shape[:2]
+            block_size, stride = self.noise_region_grid
+            ys, xs = noise_stats.block_origins(block_size, stride)
             
-            # Sample a few regions for demonstration
-            if h > 100 and w > 100:
-                # Add a placeholder suspicious region
-                regions.append([w//4, h//4, 3*w//4, 3*h//4])
+            # Blocks whose noise std is significantly different from the global std
+            mask = noise_stats.deviation_mask(block_size, stride, self.noise_region_threshold)
+            rows, cols = np.nonzero(mask)
             
-            return regions
+            return [
+                [int(x), int(y), int(x) + block_size, int(y) + block_size]
+                for y, x in zip(ys[rows], xs[cols])
+            ]
             
         except Exception:
             return []
     
-    def _merge_overlapping_regions(self, regions: List[List[int]]) -> List[List[int]]:
-        """Merge overlapping bounding boxes"""
-        if not regions:
-            return []
-        
-        # Sort by x-coordinate
-        regions.sort(key=lambda x: x[0])
-        
-        merged = [regions[0]]
-        
-        for current in regions[1:]:
-            last = merged[-1]
-            
-            # Check for overlap
-            if (current[0] <= last[2] and current[1] <= last[3] and
-                current[2] >= last[0] and current[3] >= last[1]):
-                # Merge regions
-                merged[-1] = [
-                    min(last[0], current[0]),
-                    min(last[1], current[1]),
-                    max(last[2], current[2]),
-                    max(last[3], current[3])
-                ]
-            else:
-                merged.append(current)
-        
-        return merged
-    
     def _classify_tamper_types(self, copy_move_score: float, ela_score: float, 
                               compression_score: float, noise_score: float, 
                               resampling_score: float) -> List[TamperType]:
@@ -726,22 +971,15 @@ class Layer2ForensicsService:
                                     resampling_score: float, jpeg_score: float) -> float:
         """Calculate overall probability of tampering"""
         # Weighted combination of scores
-        weights = {
-            'copy_move': 0.25,
-            'ela': 0.20,
-            'compression': 0.15,
-            'noise': 0.20,
-            'resampling': 0.10,
-            'jpeg': 0.10
-        }
+        weights = self.decision_weights
         
         weighted_score = (
             copy_move_score * weights['copy_move'] +
             ela_score * weights['ela'] +
-            compression_score * weights['compression'] +
+            compression_score * weights['double_compression'] +
             noise_score * weights['noise'] +
             resampling_score * weights['resampling'] +
-            jpeg_score * weights['jpeg']
+            jpeg_score * weights['jpeg_artifacts']
         )
         
         return min(weighted_score, 1.0)
@@ -11,9 +11,8 @@ import logging
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import json
 import base64
 from pyzbar import pyzbar
@@ -37,6 +36,11 @@ except ImportError:
 from ..models import SignatureVerification, QRIntegrityCheck, TamperType
 from ..config import settings
 from ..utils.helpers import verify_signature
+from ..utils.image_bundle import ImageBundle
+from ..utils.geometry import non_max_suppression
+from .forensic_pool import get_forensic_pool
+from .model_registry import get_model_registry
+from .resource_manager import stage_executor
 
 logger = logging.getLogger(__name__)
 
@@ -46,16 +50,20 @@ class Layer3SignatureService:
     Detects and verifies seals, signatures, and QR codes for authenticity
     """
     
-    def __init__(self):
-        self.executor = ThreadPoolExecutor(max_workers=2)
+    def __init__(self, load_models: bool = True, backend: Optional[str] = None):
+        self.executor = stage_executor("layer3")
+        self.load_models = load_models
+        
+        # Optional process pool for the traditional CV detectors (settings.FORENSICS_BACKEND)
+        self.process_pool = get_forensic_pool(backend)
         
         # Initialize object detection models
         self.yolo_model = None
         self.seal_detector = None
         self.signature_detector = None
         
-        # Initialize verification models
-        self.siamese_model = None
+        # Initialize verification models (Siamese network via the shared model registry)
+        self.registry = get_model_registry()
         self.seal_classifier = None
         
         # Load known templates and signatures
@@ -79,10 +87,13 @@ class Layer3SignatureService:
                 # self.yolo_model = YOLO('path/to/trained_model.pt')
                 logger.info("YOLO model ready for initialization")
             
-            # Initialize Siamese network for signature verification
-            if TORCH_AVAILABLE:
-                self.siamese_model = self._create_siamese_model()
-                logger.info("Siamese model initialized")
+            # Register the Siamese network for signature verification, built on
+            # first use or in the background (pool workers only run the
+            # traditional detectors and skip it)
+            if TORCH_AVAILABLE and self.load_models:
+                self.registry.register("siamese-signature", self._create_siamese_model, self._warm_up_siamese_model)
+                if settings.MODEL_WARMUP_ON_STARTUP:
+                    self.registry.warm_up(["siamese-signature"])
             
             # Load institution public keys
             self._load_institution_keys()
@@ -90,31 +101,35 @@ class Layer3SignatureService:
         except Exception as e:
             logger.warning(f"Model initialization warning: {str(e)}")
     
+    @property
+    def siamese_model(self):
+        if not self.load_models:
+            return None
+        return self.registry.get("siamese-signature")
+    
     def _create_siamese_model(self):
         """Create Siamese network for signature verification"""
-        if not TORCH_AVAILABLE:
-            return None
+        # Simple Siamese network based on ResNet
+        class SiameseNetwork(torch.nn.Module):
+            def __init__(self):
+                super(SiameseNetwork, self).__init__()
+                self.backbone = resnet18(pretrained=True)
+                self.backbone.fc = torch.nn.Linear(self.backbone.fc.in_features, 256)
+                
+            def forward(self, x1, x2):
+                output1 = self.backbone(x1)
+                output2 = self.backbone(x2)
+                return output1, output2
         
-        try:
-            # Simple Siamese network based on ResNet
-            class SiameseNetwork(torch.nn.Module):
-                def __init__(self):
-                    super(SiameseNetwork, self).__init__()
-                    self.backbone = resnet18(pretrained=True)
-                    self.backbone.fc = torch.nn.Linear(self.backbone.fc.in_features, 256)
-                    
-                def forward(self, x1, x2):
-                    output1 = self.backbone(x1)
-                    output2 = self.backbone(x2)
-                    return output1, output2
-            
-            model = SiameseNetwork()
-            model.eval()
-            return model
-            
-        except Exception as e:
-            logger.error(f"Failed to create Siamese model: {str(e)}")
-            return None
+        model = SiameseNetwork()
+        model.eval()
+        logger.info("Siamese model initialized")
+        return model
+    
+    def _warm_up_siamese_model(self, model):
+        sample = torch.zeros(1, 3, 224, 224)
+        with torch.inference_mode():
+            model(sample, sample)
     
     def _load_institution_keys(self):
         """Load institution public keys for QR verification"""
@@ -128,7 +143,7 @@ class Layer3SignatureService:
         except Exception as e:
             logger.error(f"Failed to load institution keys: {str(e)}")
     
-    async def verify_seals_and_signatures(self, image: Image.Image, 
+    async def verify_seals_and_signatures(self, image: Union[Image.Image, ImageBundle], 
                                          extracted_fields: Dict[str, Any]) -> SignatureVerification:
         """
         Main verification pipeline for seals and signatures
@@ -136,13 +151,16 @@ class Layer3SignatureService:
         start_time = time.time()
         
         try:
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            # Reuse the per-request decoded views instead of reconverting
+            bundle = ImageBundle.ensure(image)
+            cv_image = bundle.bgr
+            gray = bundle.gray
             
             # Run detection and verification in parallel
             tasks = [
-                self._detect_seals(cv_image),
-                self._detect_signatures(cv_image),
-                self._detect_and_verify_qr(image, extracted_fields)
+                self._detect_seals(bundle),
+                self._detect_signatures(bundle),
+                self._detect_and_verify_qr(bundle, extracted_fields)
             ]
             
             results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -153,7 +171,7 @@ class Layer3SignatureService:
             qr_results = results[2] if not isinstance(results[2], Exception) else {}
             
             # Verify detected seals
-            seal_matches = await self._verify_detected_seals(cv_image, seal_results.get('detections', []))
+            seal_matches = await self._verify_detected_seals(gray, seal_results.get('detections', []))
             
             # Verify detected signatures
             signature_matches = await self._verify_detected_signatures(cv_image, signature_results.get('detections', []))
@@ -181,20 +199,27 @@ class Layer3SignatureService:
         except Exception as e:
             logger.error(f"Signature verification failed: {str(e)}")
             return SignatureVerification(
-                verification_time=time.time() - start_time
+                verification_time=time.time() - start_time,
+                error_message=str(e)
             )
     
-    async def _detect_seals(self, cv_image: np.ndarray) -> Dict[str, Any]:
+    def _process_detector_sync(self, job: str, bundle: ImageBundle, **kwargs) -> Any:
+        """Entry point for pooled worker processes: run one detector on a shared-memory bundle"""
+        jobs = {
+            "seals": lambda: self._traditional_seal_detection_sync(bundle.gray),
+            "signatures": lambda: self._traditional_signature_detection_sync(bundle.gray),
+            "qr": lambda: self._qr_detection_and_verification_sync(bundle.gray, kwargs["extracted_fields"]),
+        }
+        return jobs[job]()
+    
+    async def _detect_seals(self, bundle: ImageBundle) -> Dict[str, Any]:
         """Detect seals using object detection and traditional CV"""
         try:
-            # Convert to PIL for processing
-            pil_image = Image.fromarray(cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB))
-            
             # Method 1: YOLO detection (if available)
-            yolo_detections = await self._yolo_detect_seals(cv_image)
+            yolo_detections = await self._yolo_detect_seals(bundle.bgr)
             
             # Method 2: Traditional CV detection
-            cv_detections = await self._traditional_seal_detection(cv_image)
+            cv_detections = await self._traditional_seal_detection(bundle)
             
             # Combine and filter detections
             all_detections = yolo_detections + cv_detections
@@ -209,14 +234,14 @@ class Layer3SignatureService:
             logger.error(f"Seal detection failed: {str(e)}")
             return {'detections': []}
     
-    async def _detect_signatures(self, cv_image: np.ndarray) -> Dict[str, Any]:
+    async def _detect_signatures(self, bundle: ImageBundle) -> Dict[str, Any]:
         """Detect signatures using multiple methods"""
         try:
             # Method 1: YOLO detection (if available)
-            yolo_detections = await self._yolo_detect_signatures(cv_image)
+            yolo_detections = await self._yolo_detect_signatures(bundle.bgr)
             
             # Method 2: Traditional CV detection
-            cv_detections = await self._traditional_signature_detection(cv_image)
+            cv_detections = await self._traditional_signature_detection(bundle)
             
             # Combine and filter detections
             all_detections = yolo_detections + cv_detections
@@ -303,24 +328,26 @@ class Layer3SignatureService:
             logger.error(f"YOLO signature detection sync failed: {str(e)}")
             return []
     
-    async def _traditional_seal_detection(self, cv_image: np.ndarray) -> List[Dict[str, Any]]:
+    async def _traditional_seal_detection(self, bundle: ImageBundle) -> List[Dict[str, Any]]:
         """Detect seals using traditional computer vision"""
         try:
+            if self.process_pool is not None:
+                return await self.process_pool.run("layer3", "seals", bundle, ("gray",))
+            
             loop = asyncio.get_event_loop()
             return await loop.run_in_executor(
                 self.executor,
                 self._traditional_seal_detection_sync,
-                cv_image
+                bundle.gray
             )
         except Exception as e:
             logger.error(f"Traditional seal detection failed: {str(e)}")
             return []
     
-    def _traditional_seal_detection_sync(self, cv_image: np.ndarray) -> List[Dict[str, Any]]:
+    def _traditional_seal_detection_sync(self, gray: np.ndarray) -> List[Dict[str, Any]]:
         """Synchronous traditional seal detection"""
         try:
             detections = []
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
             
             # Method 1: Circle detection for circular seals
             circles = cv2.HoughCircles(
@@ -427,24 +454,26 @@ class Layer3SignatureService:
         except Exception:
             return False
     
-    async def _traditional_signature_detection(self, cv_image: np.ndarray) -> List[Dict[str, Any]]:
+    async def _traditional_signature_detection(self, bundle: ImageBundle) -> List[Dict[str, Any]]:
         """Detect signatures using traditional computer vision"""
         try:
+            if self.process_pool is not None:
+                return await self.process_pool.run("layer3", "signatures", bundle, ("gray",))
+            
             loop = asyncio.get_event_loop()
             return await loop.run_in_executor(
                 self.executor,
                 self._traditional_signature_detection_sync,
-                cv_image
+                bundle.gray
             )
         except Exception as e:
             logger.error(f"Traditional signature detection failed: {str(e)}")
             return []
     
-    def _traditional_signature_detection_sync(self, cv_image: np.ndarray) -> List[Dict[str, Any]]:
+    def _traditional_signature_detection_sync(self, gray: np.ndarray) -> List[Dict[str, Any]]:
         """Synchronous traditional signature detection"""
         try:
             detections = []
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
             
             # Apply morphological operations to find signature-like regions
             kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
@@ -515,29 +544,30 @@ class Layer3SignatureService:
         except Exception:
             return False
     
-    async def _detect_and_verify_qr(self, image: Image.Image, extracted_fields: Dict[str, Any]) -> Dict[str, Any]:
+    async def _detect_and_verify_qr(self, bundle: ImageBundle, extracted_fields: Dict[str, Any]) -> Dict[str, Any]:
         """Detect and verify QR codes in the certificate"""
         try:
+            if self.process_pool is not None:
+                return await self.process_pool.run("layer3", "qr", bundle, ("gray",),
+                                                   extracted_fields=extracted_fields)
+            
             loop = asyncio.get_event_loop()
             return await loop.run_in_executor(
                 self.executor,
                 self._qr_detection_and_verification_sync,
-                image,
+                bundle.gray,
                 extracted_fields
             )
         except Exception as e:
             logger.error(f"QR detection and verification failed: {str(e)}")
             return {}
     
-    def _qr_detection_and_verification_sync(self, image: Image.Image, 
+    def _qr_detection_and_verification_sync(self, gray: np.ndarray, 
                                           extracted_fields: Dict[str, Any]) -> Dict[str, Any]:
         """Synchronous QR detection and verification"""
         try:
-            # Convert to OpenCV format
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # Detect QR codes using pyzbar
-            qr_codes = pyzbar.decode(cv_image)
+            # Detect QR codes using pyzbar (zbar scans luminance only)
+            qr_codes = pyzbar.decode(gray)
             
             if not qr_codes:
                 return {
@@ -663,61 +693,14 @@ class Layer3SignatureService:
         if not detections:
             return []
         
-        # Sort by confidence
-        detections.sort(key=lambda x: x.get('confidence', 0), reverse=True)
-        
-        filtered = []
-        
-        for detection in detections:
-            bbox1 = detection['bbox']
-            is_duplicate = False
-            
-            for existing in filtered:
-                bbox2 = existing['bbox']
-                
-                # Calculate IoU
-                iou = self._calculate_iou(bbox1, bbox2)
-                
-                if iou > overlap_threshold:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                filtered.append(detection)
-        
-        return filtered
-    
-    def _calculate_iou(self, bbox1: List[int], bbox2: List[int]) -> float:
-        """Calculate Intersection over Union of two bounding boxes"""
-        try:
-            x1_1, y1_1, x2_1, y2_1 = bbox1
-            x1_2, y1_2, x2_2, y2_2 = bbox2
-            
-            # Calculate intersection
-            x1_i = max(x1_1, x1_2)
-            y1_i = max(y1_1, y1_2)
-            x2_i = min(x2_1, x2_2)
-            y2_i = min(y2_1, y2_2)
-            
-            if x2_i <= x1_i or y2_i <= y1_i:
-                return 0.0
-            
-            intersection = (x2_i - x1_i) * (y2_i - y1_i)
-            
-            # Calculate union
-            area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-            area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-            union = area1 + area2 - intersection
-            
-            if union == 0:
-                return 0.0
-            
-            return intersection / union
-            
-        except Exception:
-            return 0.0
+        keep = non_max_suppression(
+            [detection['bbox'] for detection in detections],
+            [detection.get('confidence', 0) for detection in detections],
+            overlap_threshold
+        )
+        return [detections[i] for i in keep]
     
-    async def _verify_detected_seals(self, cv_image: np.ndarray, 
+    async def _verify_detected_seals(self, gray: np.ndarray, 
                                    detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Verify detected seals against known templates"""
         try:
@@ -728,7 +711,7 @@ class Layer3SignatureService:
                 x1, y1, x2, y2 = bbox
                 
                 # Extract seal region
-                seal_region = cv_image[y1:y2, x1:x2]
+                seal_region = gray[y1:y2, x1:x2]
                 
                 if seal_region.size == 0:
                     continue
@@ -785,16 +768,13 @@ class Layer3SignatureService:
             logger.error(f"Signature verification failed: {str(e)}")
             return []
     
-    async def _match_seal_template(self, seal_region: np.ndarray) -> float:
+    async def _match_seal_template(self, gray_seal: np.ndarray) -> float:
         """Match seal against known templates"""
         try:
             # Placeholder for template matching
             # In production, this would use sophisticated template matching
             # or learned classifiers
             
-            # Simple template matching approach
-            gray_seal = cv2.cvtColor(seal_region, cv2.COLOR_BGR2GRAY)
-            
             # Resize to standard size
             standard_size = (64, 64)
             resized_seal = cv2.resize(gray_seal, standard_size)
@@ -6,111 +6,192 @@ from transformers import DonutProcessor, VisionEncoderDecoderModel
 from PIL import Image
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 from ..config import settings
 from ..models import ExtractedFields
+from .batch_queue import MicroBatchQueue
+from .donut_onnx import ONNX_AVAILABLE, load_donut_onnx
+from .model_registry import get_model_registry
+from .resource_manager import stage_executor
 
 logger = logging.getLogger(__name__)
 
 class LLMClient:
     """Client for Donut model and other LLM services"""
     
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.processor = None
-        self.model = None
-        self.executor = ThreadPoolExecutor(max_workers=2)
-        self._load_donut_model()
+        self.backend = (backend or settings.DONUT_BACKEND).lower()
+        if self.backend == "onnx":
+            if ONNX_AVAILABLE:
+                # Quantized ONNX Runtime graphs run on CPU
+                self.device = "cpu"
+            else:
+                logger.warning("optimum[onnxruntime] not installed, falling back to the PyTorch Donut backend")
+                self.backend = "torch"
+        self.executor = stage_executor("donut")
+        
+        # Loaded lazily (or warmed up in the background) through the shared registry
+        self.registry = get_model_registry()
+        self.model_name = f"donut-{self.backend}"
+        self.registry.register(self.model_name, self._load_donut_model, self._warm_up_donut)
+        if settings.MODEL_WARMUP_ON_STARTUP:
+            self.registry.warm_up([self.model_name])
+        
+        # Concurrent extractions share padded generate() batches
+        self.batch_queue = MicroBatchQueue(
+            self._extract_fields_batch_sync,
+            self.executor,
+            max_batch_size=settings.DONUT_BATCH_SIZE,
+            max_wait=settings.DONUT_BATCH_MAX_WAIT_MS / 1000.0,
+            name="Donut"
+        )
+    
+    @property
+    def processor(self) -> Optional[DonutProcessor]:
+        donut = self.registry.get(self.model_name)
+        return donut[0] if donut else None
+    
+    @property
+    def model(self):
+        donut = self.registry.get(self.model_name)
+        return donut[1] if donut else None
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the Donut model has loaded (for scripts), True if it is usable"""
+        return self.registry.get(self.model_name, wait=True, timeout=timeout) is not None
     
     def _load_donut_model(self):
-        """Load the Donut model for document understanding"""
-        try:
-            logger.info(f"Loading Donut model: {settings.DONUT_MODEL_PATH}")
-            self.processor = DonutProcessor.from_pretrained(settings.DONUT_MODEL_PATH)
-            self.model = VisionEncoderDecoderModel.from_pretrained(settings.DONUT_MODEL_PATH)
-            
-            if self.device == "cuda":
-                self.model.half()
-            
-            self.model.to(self.device)
-            self.model.eval()
-            logger.info("Donut model loaded successfully")
-            
-        except Exception as e:
-            logger.error(f"Failed to load Donut model: {str(e)}")
-            self.processor = None
-            self.model = None
+        """Load the Donut processor and model for document understanding"""
+        logger.info(f"Loading Donut model: {settings.DONUT_MODEL_PATH}")
+        processor = DonutProcessor.from_pretrained(settings.DONUT_MODEL_PATH, revision=settings.DONUT_MODEL_REVISION)
+        
+        if self.backend == "onnx":
+            # Exported once, then cached
+            model = load_donut_onnx(
+                settings.DONUT_MODEL_PATH,
+                settings.DONUT_ONNX_DIR,
+                quantize=settings.DONUT_ONNX_QUANTIZE,
+                intra_op_threads=settings.DONUT_ONNX_THREADS or None,
+                revision=settings.DONUT_MODEL_REVISION
+            )
+            logger.info("Donut model loaded successfully (ONNX Runtime)")
+            return processor, model
+        
+        model = VisionEncoderDecoderModel.from_pretrained(settings.DONUT_MODEL_PATH, revision=settings.DONUT_MODEL_REVISION)
+        
+        if self.device == "cuda":
+            model.half()
+        
+        model.to(self.device)
+        model.eval()
+        logger.info("Donut model loaded successfully")
+        return processor, model
+    
+    def _warm_up_donut(self, donut):
+        """Short generate() on a blank page so the first request does not pay kernel set-up"""
+        processor, model = donut
+        pixel_values = processor(Image.new("RGB", (640, 480), "white"), return_tensors="pt").pixel_values
+        pixel_values = pixel_values.to(self.device)
+        if self.device == "cuda":
+            pixel_values = pixel_values.half()
+        
+        decoder_input_ids = processor.tokenizer(
+            "<s_certificate>", add_special_tokens=False, return_tensors="pt"
+        ).input_ids.to(self.device)
+        with torch.inference_mode():
+            model.generate(
+                pixel_values,
+                decoder_input_ids=decoder_input_ids,
+                max_length=decoder_input_ids.shape[-1] + 4,
+                pad_token_id=processor.tokenizer.pad_token_id,
+                eos_token_id=processor.tokenizer.eos_token_id,
+                use_cache=True
+            )
     
     async def extract_certificate_fields(self, image: Image.Image) -> ExtractedFields:
         """Extract fields from certificate image using Donut"""
-        if not self.model or not self.processor:
-            logger.warning("Donut model not available, returning empty fields")
+        if not self.registry.get(self.model_name):
+            # Still loading (or failed): callers fall back to OCR instead of waiting
+            logger.warning("Donut model not ready, returning empty fields")
             return ExtractedFields()
         
         try:
-            # Run extraction in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor, 
-                self._extract_fields_sync, 
-                image
-            )
-            return result
+            # Queued into the next Donut batch, inference runs in the thread pool
+            return await self.batch_queue.submit(image)
             
         except Exception as e:
             logger.error(f"Error extracting fields with Donut: {str(e)}")
             return ExtractedFields()
     
+    def batch_metrics(self) -> Dict[str, Any]:
+        """Batch-size and queue-wait statistics of the Donut batching queue"""
+        return self.batch_queue.metrics.snapshot()
+    
     def _extract_fields_sync(self, image: Image.Image) -> ExtractedFields:
         """Synchronous field extraction"""
+        return self._extract_fields_batch_sync([image])[0]
+    
+    def _extract_fields_batch_sync(self, images: List[Image.Image]) -> List[ExtractedFields]:
+        """Synchronous field extraction for a batch of images, one generate() call"""
         try:
-            # Prepare image for Donut
-            pixel_values = self.processor(image, return_tensors="pt").pixel_values
+            # Prepare images for Donut (resized and padded to one input size)
+            pixel_values = self.processor([image.convert("RGB") for image in images], return_tensors="pt").pixel_values
             pixel_values = pixel_values.to(self.device)
             
             if self.device == "cuda":
                 pixel_values = pixel_values.half()
             
-            # Task prompt for certificate parsing
+            # Task prompt for certificate parsing, repeated per image
             task_prompt = "<s_certificate>"
             decoder_input_ids = self.processor.tokenizer(
                 task_prompt, 
                 add_special_tokens=False, 
                 return_tensors="pt"
             ).input_ids
-            decoder_input_ids = decoder_input_ids.to(self.device)
+            decoder_input_ids = decoder_input_ids.repeat(len(images), 1).to(self.device)
             
-            # Generate
-            outputs = self.model.generate(
-                pixel_values,
-                decoder_input_ids=decoder_input_ids,
-                max_length=self.model.decoder.config.max_position_embeddings,
-                pad_token_id=self.processor.tokenizer.pad_token_id,
-                eos_token_id=self.processor.tokenizer.eos_token_id,
-                use_cache=True,
-                bad_words_ids=[[self.processor.tokenizer.unk_token_id]],
-                return_dict_in_generate=True,
-            )
+            # Generate (finished sequences are padded until the longest one ends)
+            with torch.inference_mode():
+                outputs = self.model.generate(
+                    pixel_values,
+                    decoder_input_ids=decoder_input_ids,
+                    max_length=self.model.config.decoder.max_position_embeddings,
+                    pad_token_id=self.processor.tokenizer.pad_token_id,
+                    eos_token_id=self.processor.tokenizer.eos_token_id,
+                    use_cache=True,
+                    bad_words_ids=[[self.processor.tokenizer.unk_token_id]],
+                    return_dict_in_generate=True,
+                )
             
             # Decode output
-            sequence = self.processor.batch_decode(outputs.sequences)[0]
-            sequence = sequence.replace(self.processor.tokenizer.eos_token, "").replace(self.processor.tokenizer.pad_token, "")
-            sequence = sequence.replace(task_prompt, "")
+            return [
+                self._parse_sequence(sequence, task_prompt)
+                for sequence in self.processor.batch_decode(outputs.sequences)
+            ]
             
-            # Parse JSON output
-            try:
-                parsed_data = json.loads(sequence)
-                return self._map_to_extracted_fields(parsed_data)
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse Donut output as JSON: {sequence}")
-                return self._extract_fallback_fields(sequence)
-                
         except Exception as e:
+            if len(images) > 1:
+                # One bad input must not fail the whole batch
+                logger.warning(f"Batched Donut extraction failed, retrying per image: {str(e)}")
+                return [self._extract_fields_sync(image) for image in images]
             logger.error(f"Error in synchronous field extraction: {str(e)}")
-            return ExtractedFields()
+            return [ExtractedFields()]
+    
+    def _parse_sequence(self, sequence: str, task_prompt: str) -> ExtractedFields:
+        """Map one decoded Donut sequence to fields"""
+        sequence = sequence.replace(self.processor.tokenizer.eos_token, "").replace(self.processor.tokenizer.pad_token, "")
+        sequence = sequence.replace(task_prompt, "")
+        
+        # Parse JSON output
+        try:
+            parsed_data = json.loads(sequence)
+            return self._map_to_extracted_fields(parsed_data)
+        except json.JSONDecodeError:
+            logger.warning(f"Failed to parse Donut output as JSON: {sequence}")
+            return self._extract_fallback_fields(sequence)
     
     def _map_to_extracted_fields(self, parsed_data: Dict[str, Any]) -> ExtractedFields:
         """Map Donut output to ExtractedFields model"""
@@ -172,8 +253,3 @@ class LLMClient:
         except Exception as e:
             logger.error(f"Error in LLM validation: {str(e)}")
             return 0.5  # Default confidence
-    
-    def __del__(self):
-        """Cleanup resources"""
-        if hasattr(self, 'executor'):
-            self.executor.shutdown(wait=False)
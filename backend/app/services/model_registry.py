@@ -0,0 +1,209 @@
+"""
+Lazy model registry
+Heavy models (Donut, BLIP, PaddleOCR, the Siamese signature network) are
+registered with a loader instead of being built in service constructors.
+They load on first use or in a background warm-up, run one warm-up inference
+to prime kernels before they are marked ready, and callers that arrive
+earlier get None and take their fallback path instead of blocking.
+Readiness, load time and memory per model are kept for the health endpoint
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ..config import settings
+from .ocr_pool import OCREnginePool
+
+logger = logging.getLogger(__name__)
+
+REGISTERED = "registered"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux), None where unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _tensor_bytes(model: Any) -> Optional[int]:
+    """Parameter and buffer bytes of torch modules (also inside tuples/dicts), None for other objects"""
+    if isinstance(model, (tuple, list)):
+        sizes = [_tensor_bytes(part) for part in model]
+    elif isinstance(model, dict):
+        sizes = [_tensor_bytes(part) for part in model.values()]
+    elif hasattr(model, "parameters") and hasattr(model, "buffers"):
+        try:
+            tensors = list(model.parameters()) + list(model.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        except Exception:
+            return None
+    else:
+        return None
+
+    sizes = [size for size in sizes if size is not None]
+    return sum(sizes) if sizes else None
+
+
+class ModelEntry:
+    """One registered model: loader, optional warm-up and load state"""
+
+    def __init__(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+
+        self.status = REGISTERED
+        self.model: Any = None
+        self.error: Optional[str] = None
+        self.load_time: Optional[float] = None
+        self.warmup_time: Optional[float] = None
+        self.memory_bytes: Optional[int] = None
+        self.ready_at: Optional[float] = None
+
+        self.future: Optional[Future] = None
+        self.done = threading.Event()
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {
+            "status": self.status,
+            "ready": self.status == READY,
+            "load_time_s": round(self.load_time, 3) if self.load_time is not None else None,
+            "warmup_time_s": round(self.warmup_time, 3) if self.warmup_time is not None else None,
+            "memory_mb": round(self.memory_bytes / 2 ** 20, 1) if self.memory_bytes is not None else None,
+            "ready_at": self.ready_at,
+            "error": self.error
+        }
+        if isinstance(self.model, OCREnginePool):
+            snapshot["pool"] = self.model.snapshot()
+        return snapshot
+
+
+class ModelRegistry:
+    """
+    Named models loaded on demand in background threads.
+    get() never blocks unless asked to: it returns the model once ready and
+    otherwise starts (or keeps) the background load and returns None.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-loader")
+
+    def register(self, name: str, loader: Callable[[], Any],
+                 warmup: Optional[Callable[[Any], None]] = None) -> ModelEntry:
+        """Register a model under name (first registration wins, so services can share it)"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = ModelEntry(name, loader, warmup)
+                self._entries[name] = entry
+            return entry
+
+    def _start(self, entry: ModelEntry) -> Future:
+        with self._lock:
+            if entry.future is None:
+                entry.status = LOADING
+                entry.future = self.executor.submit(self._load, entry)
+            return entry.future
+
+    def _load(self, entry: ModelEntry):
+        logger.info(f"Loading model {entry.name}")
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            model = entry.loader()
+            if model is None:
+                raise RuntimeError("loader returned no model")
+            entry.load_time = time.perf_counter() - start
+
+            # RSS delta is approximate when several models load at once
+            entry.memory_bytes = _tensor_bytes(model)
+            if entry.memory_bytes is None and rss_before is not None:
+                rss_after = _rss_bytes()
+                entry.memory_bytes = max(rss_after - rss_before, 0) if rss_after is not None else None
+
+            if entry.warmup is not None:
+                warmup_start = time.perf_counter()
+                try:
+                    entry.warmup(model)
+                except Exception as e:
+                    # A failed warm-up only costs the first real request some latency
+                    logger.warning(f"Warm-up inference for {entry.name} failed: {str(e)}")
+                entry.warmup_time = time.perf_counter() - warmup_start
+
+            entry.model = model
+            entry.ready_at = time.time()
+            entry.status = READY
+            logger.info(f"Model {entry.name} ready in {entry.load_time:.1f}s")
+        except Exception as e:
+            entry.load_time = time.perf_counter() - start
+            entry.error = str(e)
+            entry.status = FAILED
+            logger.error(f"Failed to load model {entry.name}: {str(e)}")
+        finally:
+            entry.done.set()
+
+    def get(self, name: str, wait: bool = False, timeout: Optional[float] = None) -> Any:
+        """
+        The model if it is ready, else None. Unloaded models start loading in the
+        background; wait=True blocks until the load finishes (or timeout passes).
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        if entry.status == READY:
+            return entry.model
+
+        self._start(entry)
+        if wait:
+            entry.done.wait(timeout)
+        return entry.model if entry.status == READY else None
+
+    def is_ready(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.status == READY
+
+    def all_ready(self) -> bool:
+        """Whether every registered model has finished loading"""
+        with self._lock:
+            entries = list(self._entries.values())
+        return all(entry.status == READY for entry in entries)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> List[Future]:
+        """Start background loads (all registered models by default) without waiting"""
+        with self._lock:
+            entries = [self._entries[name] for name in (names or list(self._entries)) if name in self._entries]
+        return [self._start(entry) for entry in entries]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-model readiness, load time and memory, for monitoring"""
+        with self._lock:
+            entries = list(self._entries.values())
+        models = {entry.name: entry.snapshot() for entry in entries}
+        return {
+            "ready": all(model["ready"] for model in models.values()),
+            "models": models
+        }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Process-wide model registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(max(settings.MODEL_LOADER_THREADS, 1))
+        return _registry
@@ -0,0 +1,191 @@
+"""
+Persistent OCR engine pool
+Keeps initialised OCR engines (Tesseract API handles, PaddleOCR instances)
+alive across requests so images are handed over in memory instead of paying
+process start-up and language/model loading on every call. Each engine is
+used by one thread at a time; engines are health-checked on a probe image
+periodically and after errors, and replaced when the check fails
+"""
+import asyncio
+import functools
+import logging
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# tesseract CLI --psm / --oem values for the API handles
+TESSERACT_PSM = 6  # Assume a single uniform block of text
+TESSERACT_OEM = 3  # Default engine (LSTM where available)
+
+
+class _PooledEngine:
+    __slots__ = ("engine", "created_at", "last_check", "uses", "failures")
+
+    def __init__(self, engine: Any):
+        self.engine = engine
+        self.created_at = time.monotonic()
+        self.last_check = self.created_at
+        self.uses = 0
+        self.failures = 0
+
+
+class OCREnginePool:
+    """
+    Fixed number of engines built by factory, checked out one per call.
+    health_check(engine) must raise when the engine is unusable.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], size: int = 1,
+                 health_check: Optional[Callable[[Any], Any]] = None,
+                 close: Optional[Callable[[Any], Any]] = None,
+                 check_interval: float = 300.0, checkout_timeout: float = 30.0):
+        self.name = name
+        self.factory = factory
+        self.size = max(int(size), 1)
+        self.health_check = health_check
+        self.close = close
+        self.check_interval = check_interval
+        self.checkout_timeout = checkout_timeout
+
+        self.calls = 0
+        self.errors = 0
+        self.replaced = 0
+        self._idle: "queue.LifoQueue[_PooledEngine]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        # Per event loop: admits at most size jobs, so executor threads never wait for an engine
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+        # Engines are built up front (the pool itself is loaded in the background)
+        for _ in range(self.size):
+            self._idle.put(_PooledEngine(self.factory()))
+        logger.info(f"{self.name} pool ready with {self.size} engines")
+
+    def _healthy(self, pooled: _PooledEngine) -> bool:
+        pooled.last_check = time.monotonic()
+        if self.health_check is None:
+            return True
+        try:
+            self.health_check(pooled.engine)
+            return True
+        except Exception as e:
+            logger.warning(f"{self.name} engine failed its health check: {str(e)}")
+            return False
+
+    def _replace(self, pooled: _PooledEngine) -> _PooledEngine:
+        """Close a broken engine and build a fresh one (kept if rebuilding fails)"""
+        try:
+            fresh = _PooledEngine(self.factory())
+        except Exception as e:
+            logger.error(f"Could not rebuild {self.name} engine: {str(e)}")
+            return pooled
+        if self.close is not None:
+            try:
+                self.close(pooled.engine)
+            except Exception:
+                pass
+        with self._lock:
+            self.replaced += 1
+        logger.info(f"{self.name} engine replaced")
+        return fresh
+
+    @contextmanager
+    def engine(self):
+        """Check out one engine for the duration of the block"""
+        try:
+            pooled = self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No {self.name} engine free within {self.checkout_timeout:.0f}s")
+
+        try:
+            if time.monotonic() - pooled.last_check > self.check_interval and not self._healthy(pooled):
+                pooled = self._replace(pooled)
+
+            with self._lock:
+                self.calls += 1
+            pooled.uses += 1
+            try:
+                yield pooled.engine
+            except Exception:
+                pooled.failures += 1
+                with self._lock:
+                    self.errors += 1
+                # A failing call may mean a wedged engine: verify before reuse
+                if not self._healthy(pooled):
+                    pooled = self._replace(pooled)
+                raise
+        finally:
+            self._idle.put(pooled)
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """fn(engine, *args, **kwargs) on a checked-out engine"""
+        with self.engine() as engine:
+            return fn(engine, *args, **kwargs)
+
+    async def run_async(self, executor: Executor, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        run() on executor once an engine is free. Callers queue here, on the
+        event loop, instead of holding executor threads blocked on checkout.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._slots.get(loop)
+            if slots is None:
+                slots = self._slots[loop] = asyncio.Semaphore(self.size)
+        async with slots:
+            return await loop.run_in_executor(executor, functools.partial(self.run, fn, *args, **kwargs))
+
+    def check_all(self):
+        """Health-check every idle engine now (used as the warm-up)"""
+        checked = []
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            checked.append(pooled if self._healthy(pooled) else self._replace(pooled))
+        for pooled in checked:
+            self._idle.put(pooled)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "engines": self.size,
+                "idle": self._idle.qsize(),
+                "calls": self.calls,
+                "errors": self.errors,
+                "replaced": self.replaced
+            }
+
+
+def create_tesseract_engine(lang: str = "eng"):
+    """Persistent Tesseract API handle with the CLI's --psm 6 --oem 3 settings"""
+    return tesserocr.PyTessBaseAPI(
+        lang=lang,
+        psm=TESSERACT_PSM,
+        oem=TESSERACT_OEM
+    )
+
+
+def tesseract_image_to_string(api, image) -> str:
+    """OCR a PIL image on an API handle, in memory"""
+    try:
+        api.SetImage(image)
+        return api.GetUTF8Text()
+    finally:
+        api.Clear()
+
+
+def close_tesseract_engine(api):
+    api.End()
@@ -19,7 +19,8 @@ import io
 
 from ..models import QRIntegrityCheck
 from ..config import settings
-from ..utils.helpers import sign_data, verify_signature, generate_key_pair, generate_image_hash
+from ..utils.helpers import sign_data, verify_signature, generate_key_pair
+from ..utils.fingerprint import compute_fingerprints
 
 logger = logging.getLogger(__name__)
 
@@ -450,12 +451,10 @@ class QRIntegrityService:
                                   certificate_data: Dict[str, Any]) -> Dict[str, str]:
         """Create integrity hashes for image and data"""
         try:
-            # Generate image hash
-            img_hash = generate_image_hash(image.tobytes())
-            
-            # Generate perceptual hash
-            import imagehash
-            phash = str(imagehash.phash(image))
+            # Canonical pixel fingerprints (same as Layer 2 verification)
+            fingerprints = compute_fingerprints(image)
+            img_hash = fingerprints["sha256"]
+            phash = fingerprints["phash"]
             
             # Generate data hash
             data_string = json.dumps(certificate_data, sort_keys=True)
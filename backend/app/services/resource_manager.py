@@ -0,0 +1,301 @@
+"""
+Shared CPU resource manager
+All CPU-bound pipeline stages submit to one priority thread pool sized from
+the cores actually available to the process (affinity and cgroup quota),
+instead of each service owning its own pool. Native libraries (OpenCV, BLAS,
+OpenMP/Tesseract, torch) are capped so pool threads times library threads
+stays close to the core count. Queued work runs by priority class, FIFO
+within a class, and queue depth and wait/run times are kept per stage
+"""
+import itertools
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+try:
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    THREADPOOLCTL_AVAILABLE = False
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, lower runs first
+PRIORITY_CRITICAL = 0    # Last stage of a request, finishes work already in flight
+PRIORITY_STANDARD = 1    # Extraction and forensics
+PRIORITY_BACKGROUND = 2  # Work no request is waiting on
+
+STAGE_PRIORITIES = {
+    "donut": PRIORITY_STANDARD,
+    "layer1": PRIORITY_STANDARD,
+    "layer2": PRIORITY_STANDARD,
+    "layer3": PRIORITY_CRITICAL,
+    "index": PRIORITY_BACKGROUND
+}
+
+# Environment caps for OpenMP/BLAS pools, also inherited by spawned workers and Tesseract
+NATIVE_THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "OMP_THREAD_LIMIT")
+
+
+def available_cores() -> int:
+    """Cores this process may use: CPU affinity, capped by a cgroup v2 CPU quota"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cores = min(cores, max(math.ceil(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+
+    return max(cores, 1)
+
+
+def limit_native_threads(threads: int, torch_threads: int):
+    """Cap the internal thread pools of OpenCV, BLAS/OpenMP and torch (explicit env settings win)"""
+    for variable in NATIVE_THREAD_VARIABLES:
+        os.environ.setdefault(variable, str(threads))
+
+    cv2.setNumThreads(threads)
+    if THREADPOOLCTL_AVAILABLE:
+        # Already-loaded BLAS libraries ignore the environment variables
+        threadpool_limits(limits=threads)
+
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+
+def _percentiles_ms(values) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    values = np.asarray(values) * 1000.0
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "max": round(float(values.max()), 2)
+    }
+
+
+class StageMetrics:
+    """Queue depth, in-flight count and wait/run times of one stage over a sliding window"""
+
+    def __init__(self, priority: int, window: int = 2048):
+        self.priority = priority
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.queued = 0
+        self.running = 0
+        self._waits: deque = deque(maxlen=window)
+        self._run_times: deque = deque(maxlen=window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "priority": self.priority,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_depth": self.queued,
+            "running": self.running,
+            "queue_wait_ms": _percentiles_ms(list(self._waits)),
+            "run_time_ms": _percentiles_ms(list(self._run_times))
+        }
+
+
+class _WorkItem:
+    __slots__ = ("future", "fn", "args", "kwargs", "stage", "enqueued")
+
+    def __init__(self, future: Future, fn: Callable, args: tuple, kwargs: dict, stage: str):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.stage = stage
+        self.enqueued = time.perf_counter()
+
+
+class PriorityThreadPool:
+    """Fixed-size thread pool over a priority queue, with per-stage accounting"""
+
+    def __init__(self, max_workers: int, name: str = "cpu"):
+        self.max_workers = max(int(max_workers), 1)
+        self.name = name
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._stages: Dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._shutdown = False
+
+    def _start_threads(self):
+        # Caller holds the lock; threads start with the first submission
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._work, name=f"{self.name}-{len(self._threads)}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, stage: str, priority: int, fn: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        item = _WorkItem(future, fn, args, kwargs, stage)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError(f"{self.name} pool has been shut down")
+            metrics = self._stages.get(stage)
+            if metrics is None:
+                metrics = self._stages[stage] = StageMetrics(priority)
+            metrics.submitted += 1
+            metrics.queued += 1
+            self._start_threads()
+        self._queue.put((priority, next(self._sequence), item))
+        return future
+
+    def _work(self):
+        while True:
+            _, _, item = self._queue.get()
+            if item is None:
+                return
+
+            started = time.perf_counter()
+            with self._lock:
+                metrics = self._stages[item.stage]
+                metrics.queued -= 1
+                metrics._waits.append(started - item.enqueued)
+                if not item.future.set_running_or_notify_cancel():
+                    continue
+                metrics.running += 1
+
+            try:
+                result = item.fn(*item.args, **item.kwargs)
+            except BaseException as e:
+                item.future.set_exception(e)
+                failed = True
+            else:
+                item.future.set_result(result)
+                failed = False
+            finally:
+                del item
+
+            with self._lock:
+                metrics.running -= 1
+                metrics.completed += 1
+                metrics.failed += int(failed)
+                metrics._run_times.append(time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_depth": sum(metrics.queued for metrics in self._stages.values()),
+                "stages": {stage: metrics.snapshot() for stage, metrics in sorted(self._stages.items())}
+            }
+
+    def shutdown(self):
+        """Stop the workers once the queued work has run"""
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put((math.inf, next(self._sequence), None))
+
+
+class StageExecutor(Executor):
+    """
+    concurrent.futures view of the shared pool for one stage, usable with
+    loop.run_in_executor. Shutting it down leaves the shared pool running.
+    """
+
+    def __init__(self, pool: PriorityThreadPool, stage: str, priority: int):
+        self.pool = pool
+        self.stage = stage
+        self.priority = priority
+
+    @property
+    def max_workers(self) -> int:
+        return self.pool.max_workers
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        return self.pool.submit(self.stage, self.priority, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        pass
+
+
+class CPUResourceManager:
+    """Sizes the shared pool from the available cores and hands out per-stage executors"""
+
+    def __init__(self, workers: Optional[int] = None, native_threads: Optional[int] = None,
+                 torch_threads: Optional[int] = None):
+        self.cores = available_cores()
+        self.workers = workers or self.cores
+        self.native_threads = native_threads or 1
+        self.torch_threads = torch_threads or max(self.cores // 2, 1)
+
+        limit_native_threads(self.native_threads, self.torch_threads)
+        self.pool = PriorityThreadPool(self.workers, name="cpu")
+        self._executors: Dict[str, StageExecutor] = {}
+        self._lock = threading.Lock()
+
+        logger.info(f"CPU resource manager: {self.cores} cores, {self.workers} workers, "
+                    f"{self.native_threads} native / {self.torch_threads} torch threads")
+
+    def executor(self, stage: str, priority: Optional[int] = None) -> StageExecutor:
+        """Executor for a pipeline stage (priority defaults to the stage's class)"""
+        if priority is None:
+            priority = STAGE_PRIORITIES.get(stage, PRIORITY_STANDARD)
+        key = f"{stage}:{priority}"
+        with self._lock:
+            if key not in self._executors:
+                self._executors[key] = StageExecutor(self.pool, stage, priority)
+            return self._executors[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pool size, thread caps and per-stage queue metrics, for monitoring"""
+        snapshot = self.pool.snapshot()
+        snapshot.update({
+            "cores": self.cores,
+            "native_threads": self.native_threads,
+            "torch_threads": self.torch_threads
+        })
+        return snapshot
+
+
+_manager: Optional[CPUResourceManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_resource_manager() -> CPUResourceManager:
+    """Process-wide resource manager, created (and native threads capped) on first use"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = CPUResourceManager(
+                settings.CPU_WORKERS or None,
+                settings.CPU_NATIVE_THREADS or None,
+                settings.TORCH_THREADS or None
+            )
+        return _manager
+
+
+def stage_executor(stage: str) -> StageExecutor:
+    """Shorthand for get_resource_manager().executor(stage)"""
+    return get_resource_manager().executor(stage)
@@ -0,0 +1,136 @@
+"""
+Content-addressed cache of verification results
+Keyed by the SHA-256 of the uploaded bytes plus a pipeline-version tag, so a
+re-uploaded certificate skips every model. Two tiers: an in-process LRU with
+TTL and an optional SQLite file shared across workers and restarts.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def pipeline_version_tag(components: Dict[str, Any]) -> str:
+    """Short stable tag over everything that changes results (weights, thresholds, model versions)"""
+    encoded = json.dumps(components, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class VerificationResultCache:
+    """
+    Two-tier result cache. Values are JSON-serialisable dicts; the caller
+    rebuilds models from them. Entries from other pipeline versions are never
+    returned, and invalidate() purges them.
+    """
+
+    def __init__(self, version: str, max_entries: int = 512, ttl_seconds: float = 3600,
+                 sqlite_path: Optional[str] = None):
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = None
+        if sqlite_path:
+            try:
+                self._db = sqlite3.connect(sqlite_path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS verification_cache ("
+                    "key TEXT PRIMARY KEY, version TEXT NOT NULL, "
+                    "payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_verification_cache_version "
+                                 "ON verification_cache(version)")
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache SQLite tier unavailable: {str(e)}")
+                self._db = None
+
+        logger.info(f"Verification result cache ready (version {version}, "
+                    f"{'memory + sqlite' if self._db else 'memory only'})")
+
+    def key(self, content_hash: str, variant: str = "") -> str:
+        """Cache key for one upload under the current pipeline version"""
+        return f"{self.version}:{content_hash}:{variant}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    return json.loads(payload)
+                del self._memory[key]
+
+            if self._db is None:
+                return None
+
+            row = self._db.execute(
+                "SELECT payload, expires_at FROM verification_cache WHERE key = ? AND version = ?",
+                (key, self.version)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, expires_at = row
+            if expires_at <= now:
+                self._db.execute("DELETE FROM verification_cache WHERE key = ?", (key,))
+                return None
+
+            # Promote to the memory tier
+            self._store_memory(key, payload, expires_at)
+            return json.loads(payload)
+
+    def put(self, key: str, value: Dict[str, Any]):
+        payload = json.dumps(value, default=str)
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store_memory(key, payload, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO verification_cache (key, version, payload, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, self.version, payload, expires_at)
+                )
+
+    def _store_memory(self, key: str, payload: str, expires_at: float):
+        self._memory[key] = (expires_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def invalidate(self, version: Optional[str] = None) -> int:
+        """
+        Switch to a new pipeline version (if given) and drop every entry from
+        other versions plus anything expired. Returns the number of SQLite rows removed.
+        """
+        with self._lock:
+            if version is not None:
+                self.version = version
+            prefix = f"{self.version}:"
+            for key in [k for k in self._memory if not k.startswith(prefix)]:
+                del self._memory[key]
+
+            if self._db is None:
+                return 0
+            cursor = self._db.execute(
+                "DELETE FROM verification_cache WHERE version != ? OR expires_at <= ?",
+                (self.version, time.time())
+            )
+            return cursor.rowcount
+
+    def clear(self):
+        """Drop every entry in both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM verification_cache")
@@ -0,0 +1,91 @@
+"""
+Block transform engine for JPEG-domain forensics
+Turns a luminance plane into a strided (N, 8, 8) block view and applies
+one batched 2D DCT, so every block-based check shares the same tensor
+"""
+import numpy as np
+from typing import Tuple
+
+BLOCK_SIZE = 8
+
+
+def _dct_matrix(n: int = BLOCK_SIZE) -> np.ndarray:
+    """Orthonormal DCT-II basis (same scaling as cv2.dct)"""
+    k = np.arange(n).reshape(-1, 1)
+    i = np.arange(n).reshape(1, -1)
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0, :] = np.sqrt(1.0 / n)
+    return matrix.astype(np.float32)
+
+
+DCT_MATRIX = _dct_matrix()
+
+
+def block_view(plane: np.ndarray, block_size: int = BLOCK_SIZE) -> np.ndarray:
+    """
+    Zero-copy (rows, cols, block, block) view over the complete blocks of a 2D plane.
+    Partial blocks on the right/bottom edges are dropped.
+    """
+    h, w = plane.shape[:2]
+    rows, cols = h // block_size, w // block_size
+    plane = plane[:rows * block_size, :cols * block_size]
+    s0, s1 = plane.strides
+    return np.lib.stride_tricks.as_strided(
+        plane,
+        shape=(rows, cols, block_size, block_size),
+        strides=(s0 * block_size, s1 * block_size, s0, s1),
+        writeable=False
+    )
+
+
+class BlockDCT:
+    """
+    Precomputed 8x8 block DCT of a luminance plane.
+    Holds the spatial block view and the coefficient tensor so that
+    double-compression and periodicity checks never re-slice the image.
+    """
+
+    def __init__(self, plane: np.ndarray):
+        self.blocks = block_view(plane)
+        self.grid_shape: Tuple[int, int] = self.blocks.shape[:2]
+
+        # One batched transform: C = D @ B @ D^T for every block
+        pixels = self.blocks.reshape(-1, BLOCK_SIZE, BLOCK_SIZE).astype(np.float32)
+        self.coefficients = DCT_MATRIX @ pixels @ DCT_MATRIX.T
+
+    @property
+    def num_blocks(self) -> int:
+        return self.coefficients.shape[0]
+
+    def frequency_histograms(self, bins: int = 100,
+                             value_range: Tuple[float, float] = (-50, 50)) -> np.ndarray:
+        """
+        Per-frequency coefficient histograms, shape (64, bins).
+        Row k is the histogram of coefficient (k // 8, k % 8) across all blocks;
+        binning matches np.histogram (last bin is closed on the right).
+        """
+        if self.num_blocks == 0:
+            return np.zeros((BLOCK_SIZE * BLOCK_SIZE, bins), dtype=np.int64)
+
+        low, high = value_range
+        coeffs = self.coefficients.reshape(self.num_blocks, -1)
+        in_range = (coeffs >= low) & (coeffs <= high)
+
+        bin_idx = np.floor((coeffs - low) * (bins / (high - low))).astype(np.int64)
+        np.clip(bin_idx, 0, bins - 1, out=bin_idx)
+
+        # Offset each frequency into its own slice so one bincount covers all 64 histograms
+        offsets = np.arange(coeffs.shape[1], dtype=np.int64) * bins
+        flat_idx = (bin_idx + offsets)[in_range]
+        counts = np.bincount(flat_idx, minlength=coeffs.shape[1] * bins)
+        return counts.reshape(coeffs.shape[1], bins)
+
+    def histogram(self, bins: int = 100,
+                  value_range: Tuple[float, float] = (-50, 50)) -> np.ndarray:
+        """Histogram of all coefficients pooled across frequencies"""
+        return self.frequency_histograms(bins, value_range).sum(axis=0)
+
+
+def compute_block_dct(plane: np.ndarray) -> BlockDCT:
+    """Build the shared block DCT for a single-channel plane"""
+    return BlockDCT(np.ascontiguousarray(plane))
@@ -0,0 +1,193 @@
+"""
+JPEG grid alignment analysis
+Measures gradient energy on every candidate 8x8 grid offset at once, so
+cropped or shifted JPEGs are analysed on their real grid, and tiles whose
+local grid disagrees with the dominant one can be reported as regions
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .block_dct import BLOCK_SIZE
+
+
+class GradientField:
+    """
+    Gradients of a grayscale plane, computed once and shared by the JPEG checks:
+    Sobel derivatives for edge/ringing analysis and forward differences for
+    block-boundary energy (Sobel's 3-tap support smears the 1-pixel grid step).
+    """
+
+    def __init__(self, gray_image: np.ndarray):
+        self.gray = gray_image
+        self._gx = self._gy = self._magnitude = None
+        self._dx = self._dy = None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.gray.shape[:2]
+
+    @property
+    def gx(self) -> np.ndarray:
+        if self._gx is None:
+            self._gx = cv2.Sobel(self.gray, cv2.CV_32F, 1, 0, ksize=3)
+        return self._gx
+
+    @property
+    def gy(self) -> np.ndarray:
+        if self._gy is None:
+            self._gy = cv2.Sobel(self.gray, cv2.CV_32F, 0, 1, ksize=3)
+        return self._gy
+
+    @property
+    def magnitude(self) -> np.ndarray:
+        if self._magnitude is None:
+            self._magnitude = cv2.magnitude(self.gx, self.gy)
+        return self._magnitude
+
+    @property
+    def dx(self) -> np.ndarray:
+        """|I[y, x] - I[y, x-1]|, column 0 is zero so index x is the boundary left of x"""
+        if self._dx is None:
+            plane = self.gray.astype(np.float32)
+            self._dx = np.zeros_like(plane)
+            np.abs(plane[:, 1:] - plane[:, :-1], out=self._dx[:, 1:])
+        return self._dx
+
+    @property
+    def dy(self) -> np.ndarray:
+        """|I[y, x] - I[y-1, x]|, row 0 is zero so index y is the boundary above y"""
+        if self._dy is None:
+            plane = self.gray.astype(np.float32)
+            self._dy = np.zeros_like(plane)
+            np.abs(plane[1:, :] - plane[:-1, :], out=self._dy[1:, :])
+        return self._dy
+
+
+def _phase_energy(profile: np.ndarray) -> np.ndarray:
+    """Mean boundary energy for each of the 8 grid phases along the last axis"""
+    n = (profile.shape[-1] // BLOCK_SIZE) * BLOCK_SIZE
+    return profile[..., :n].reshape(profile.shape[:-1] + (n // BLOCK_SIZE, BLOCK_SIZE)).mean(axis=-2)
+
+
+def boundary_sums(gradients: GradientField, tile_size: int = 128, edge_clip: float = 16.0,
+                  region: Optional[Tuple[slice, slice]] = None) -> Dict[str, Any]:
+    """
+    Additive pieces of the grid analysis over one (rows, cols) region of the gradients:
+    clipped boundary-step sums per column and per row, and per-tile phase energies.
+    Summing them over regions that partition an image gives the full-image analysis.
+    """
+    # Block steps are small; clipping keeps text and stroke edges from
+    # dictating the phase on document images
+    dx = np.minimum(gradients.dx, edge_clip)
+    dy = np.minimum(gradients.dy, edge_clip)
+    if region is not None:
+        dx, dy = dx[region], dy[region]
+
+    # Per-tile phase energies, shape (tiles_y, tiles_x, 8)
+    h, w = dx.shape
+    rows, cols = h // tile_size, w // tile_size
+    t = tile_size
+    tiled_dx = dx[:rows * t, :cols * t].reshape(rows, t, cols, t)
+    tiled_dy = dy[:rows * t, :cols * t].reshape(rows, t, cols, t)
+
+    return {
+        "col_sums": dx.sum(axis=0, dtype=np.float64),
+        "row_sums": dy.sum(axis=1, dtype=np.float64),
+        "tile_col_energy": _phase_energy(tiled_dx.mean(axis=1)),
+        "tile_row_energy": _phase_energy(tiled_dy.mean(axis=3).transpose(0, 2, 1))
+    }
+
+
+class GridAlignment:
+    """
+    8x8 grid alignment over all 64 (dy, dx) offsets.
+    The 2D offset energy is separable: row-boundary energy from vertical
+    differences plus column-boundary energy from horizontal differences,
+    combined by broadcasting.
+    """
+
+    def __init__(self, gradients: GradientField, tile_size: int = 128, edge_clip: float = 16.0):
+        self._set_sums(boundary_sums(gradients, tile_size, edge_clip), gradients.shape, tile_size)
+
+    @classmethod
+    def from_sums(cls, sums: Dict[str, Any], shape: Tuple[int, int], tile_size: int = 128) -> "GridAlignment":
+        """Alignment over boundary_sums already stitched together for an image of the given shape"""
+        grid = cls.__new__(cls)
+        grid._set_sums(sums, shape, tile_size)
+        return grid
+
+    def _set_sums(self, sums: Dict[str, Any], shape: Tuple[int, int], tile_size: int):
+        self.tile_size = tile_size
+        h, w = shape
+
+        self.col_energy = _phase_energy(sums["col_sums"] / max(h, 1))
+        self.row_energy = _phase_energy(sums["row_sums"] / max(w, 1))
+
+        # (8, 8) table indexed by (dy, dx)
+        self.offset_energy = self.row_energy[:, None] + self.col_energy[None, :]
+
+        self.tile_col_energy = sums["tile_col_energy"]
+        self.tile_row_energy = sums["tile_row_energy"]
+
+    @property
+    def offset(self) -> Tuple[int, int]:
+        """Dominant grid origin (dy, dx)"""
+        dy, dx = np.unravel_index(np.argmax(self.offset_energy), self.offset_energy.shape)
+        return int(dy), int(dx)
+
+    @staticmethod
+    def _contrast(energy: np.ndarray) -> np.ndarray:
+        """Relative excess of the strongest phase over the mean phase energy"""
+        mean = energy.mean(axis=-1)
+        return np.where(mean > 0, energy.max(axis=-1) / np.maximum(mean, 1e-12) - 1.0, 0.0)
+
+    def blockiness(self) -> float:
+        """How strongly gradient energy concentrates on the dominant grid lines"""
+        return float((self._contrast(self.row_energy) + self._contrast(self.col_energy)) / 2.0)
+
+    @staticmethod
+    def _excess(energy: np.ndarray) -> np.ndarray:
+        """Absolute excess of the strongest phase over the mean phase energy (gray levels)"""
+        return energy.max(axis=-1) - energy.mean(axis=-1)
+
+    def misaligned_mask(self, min_contrast: float, min_energy: float = 0.0) -> np.ndarray:
+        """
+        Tiles with a clear local grid that differs from the dominant offset on both axes
+        (a single long rule or table line shifts only one axis's phase).
+        The grid step must also exceed min_energy: on near-blank tiles a few
+        rounding steps give an arbitrary phase a large contrast.
+        """
+        dy, dx = self.offset
+        local_dy = np.argmax(self.tile_row_energy, axis=-1)
+        local_dx = np.argmax(self.tile_col_energy, axis=-1)
+
+        confident = (self._contrast(self.tile_row_energy) > min_contrast) & \
+                    (self._contrast(self.tile_col_energy) > min_contrast) & \
+                    (self._excess(self.tile_row_energy) > min_energy) & \
+                    (self._excess(self.tile_col_energy) > min_energy)
+        return confident & (local_dy != dy) & (local_dx != dx)
+
+    def misaligned_regions(self, min_contrast: float, min_energy: float = 0.0,
+                           min_tiles: int = 2) -> List[List[int]]:
+        """
+        [x1, y1, x2, y2] boxes around connected groups of tiles whose grid disagrees
+        with the rest of the image (a lone tile is usually crossing rules at a corner)
+        """
+        mask = self.misaligned_mask(min_contrast, min_energy)
+        if not mask.any():
+            return []
+
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8), connectivity=8)
+
+        # Label 0 is the background
+        stats = stats[1:]
+        stats = stats[stats[:, cv2.CC_STAT_AREA] >= min_tiles]
+
+        t = self.tile_size
+        x1 = stats[:, cv2.CC_STAT_LEFT] * t
+        y1 = stats[:, cv2.CC_STAT_TOP] * t
+        x2 = x1 + stats[:, cv2.CC_STAT_WIDTH] * t
+        y2 = y1 + stats[:, cv2.CC_STAT_HEIGHT] * t
+        return np.stack([x1, y1, x2, y2], axis=1).astype(int).tolist()
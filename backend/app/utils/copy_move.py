@@ -0,0 +1,368 @@
+"""
+Copy-move detection engine
+Keypoints are extracted on a bounded downscale pyramid under a fixed budget,
+self-matched with a cached matcher, spatially filtered and clustered by
+displacement so duplicated regions come back as boxes rather than a bare count.
+Documents repeat glyphs and words at arbitrary offsets, so a cluster only
+counts as a duplicated region when its keypoints form one compact patch of
+some size whose pixels match the patch at the offset, and text-sized clusters
+shifted by a whole line pitch are dropped; the score is the share of the
+page those regions cover
+"""
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COPY_MOVE_BACKENDS = ("sift", "orb", "akaze")
+
+# Pixel correlation between source and target patch for a cluster to be a copy
+# (repeated words match at their keypoints, not across the box around them)
+MIN_PATCH_CORRELATION = 0.9
+MIN_PATCH_VARIANCE = 4.0  # Gray levels squared; below this a strip is blank paper
+
+# Row-profile autocorrelation a page needs at its line spacing to count as set in regular lines
+LINE_PITCH_MIN_CORRELATION = 0.3
+LINE_PITCH_DRIFT = 0.01  # Tolerated pitch error, share of the offset
+
+
+class CopyMoveDetector:
+    """
+    Keypoint-based copy-move detector with a predictable worst case:
+    the working image is capped at max_side, and at most max_keypoints
+    descriptors (split across pyramid levels) ever reach the matcher.
+    """
+
+    def __init__(self, backend: str = "sift", max_keypoints: int = 2000, max_side: int = 1024,
+                 pyramid_levels: int = 2, ratio: float = 0.6, min_distance: float = 40.0,
+                 cluster_tolerance: float = 8.0, min_cluster_size: int = 4,
+                 min_region_fraction: float = 0.02, link_fraction: float = 0.06,
+                 full_score_area: float = 0.01):
+        backend = backend.lower()
+        if backend not in COPY_MOVE_BACKENDS:
+            raise ValueError(f"Unknown copy-move backend '{backend}', expected one of {COPY_MOVE_BACKENDS}")
+
+        self.backend = backend
+        self.max_keypoints = max_keypoints
+        self.max_side = max_side
+        self.pyramid_levels = max(pyramid_levels, 1)
+        self.ratio = ratio
+        self.min_distance = min_distance            # Full-resolution pixels
+        self.cluster_tolerance = cluster_tolerance  # Full-resolution pixels
+        self.min_cluster_size = min_cluster_size
+        self.min_region_fraction = min_region_fraction  # Shortest region side, share of the longer image side
+        self.link_fraction = link_fraction              # Keypoint spacing within one region, same unit
+        self.full_score_area = full_score_area          # Duplicated share of the page that scores 1.0
+
+        self._local = threading.local()
+
+    def _create_extractor(self):
+        if self.backend == "sift":
+            try:
+                return cv2.SIFT_create(nfeatures=self.max_keypoints)
+            except AttributeError:
+                # Fallback for older OpenCV versions
+                return cv2.xfeatures2d.SIFT_create(nfeatures=self.max_keypoints)
+        if self.backend == "orb":
+            return cv2.ORB_create(nfeatures=self.max_keypoints)
+        try:
+            return cv2.AKAZE_create()
+        except AttributeError:
+            # OpenCV 5 moved AKAZE to the contrib modules
+            return cv2.xfeatures2d.AKAZE_create()
+
+    def _create_matcher(self):
+        if self.backend == "sift":
+            FLANN_INDEX_KDTREE = 1
+            index_params = dict(algorithm=FLANN_INDEX_KDTREE, trees=5)
+            search_params = dict(checks=50)
+            return cv2.FlannBasedMatcher(index_params, search_params)
+        # ORB and AKAZE produce binary descriptors
+        return cv2.BFMatcher(cv2.NORM_HAMMING)
+
+    @property
+    def extractor(self):
+        """Per-thread feature extractor, created once"""
+        extractor = getattr(self._local, "extractor", None)
+        if extractor is None:
+            extractor = self._local.extractor = self._create_extractor()
+        return extractor
+
+    @property
+    def matcher(self):
+        """Per-thread descriptor matcher, created once"""
+        matcher = getattr(self._local, "matcher", None)
+        if matcher is None:
+            matcher = self._local.matcher = self._create_matcher()
+        return matcher
+
+    def _pyramid(self, gray_image: np.ndarray) -> List[Tuple[np.ndarray, float]]:
+        """(level image, scale back to full resolution) pairs, coarsest level last"""
+        h, w = gray_image.shape[:2]
+        longest = max(h, w)
+        if longest > self.max_side:
+            scale = self.max_side / float(longest)
+            size = (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1))
+            level = cv2.resize(gray_image, size, interpolation=cv2.INTER_AREA)
+        else:
+            level = gray_image
+
+        levels = [(level, w / float(level.shape[1]))]
+        for _ in range(self.pyramid_levels - 1):
+            if min(level.shape[:2]) < 64:
+                break
+            level = cv2.pyrDown(level)
+            levels.append((level, w / float(level.shape[1])))
+        return levels
+
+    def extract(self, gray_image: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Keypoint positions in full-resolution pixels (N, 2) and their descriptors,
+        keeping the strongest responses within the budget at each pyramid level
+        """
+        levels = self._pyramid(gray_image)
+        budget = max(self.max_keypoints // len(levels), 1)
+
+        points, descriptors = [], []
+        for level, scale in levels:
+            keypoints = self.extractor.detect(level, None)
+            if not keypoints:
+                continue
+            keypoints = sorted(keypoints, key=lambda kp: kp.response, reverse=True)[:budget]
+            keypoints, level_descriptors = self.extractor.compute(level, keypoints)
+            if level_descriptors is None or len(keypoints) == 0:
+                continue
+            points.append(np.array([kp.pt for kp in keypoints], dtype=np.float32) * scale)
+            descriptors.append(level_descriptors)
+
+        if not descriptors:
+            return np.empty((0, 2), dtype=np.float32), None
+        return np.vstack(points), np.vstack(descriptors)
+
+    def _match_pairs(self, points: np.ndarray, descriptors: np.ndarray) -> np.ndarray:
+        """Unique (i, j) index pairs that pass the spatial filter and the ratio test"""
+        # Extra neighbours cover the self-match and the same corner on other pyramid levels
+        matches = self.matcher.knnMatch(descriptors, descriptors, k=self.pyramid_levels + 2)
+
+        pairs = []
+        for query_idx, match_group in enumerate(matches):
+            # Neighbours inside min_distance are the keypoint itself or local texture,
+            # not duplication, so they are dropped before the ratio test
+            origin = points[query_idx]
+            candidates = [
+                m for m in match_group
+                if np.hypot(*(points[m.trainIdx] - origin)) >= self.min_distance
+            ]
+            if not candidates:
+                continue
+            m = candidates[0]
+            if len(candidates) == 1 or m.distance < self.ratio * candidates[1].distance:
+                pairs.append((query_idx, m.trainIdx))
+
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+
+        pairs = np.sort(np.array(pairs, dtype=np.int64), axis=1)
+        return np.unique(pairs, axis=0)
+
+    def _cluster_regions(self, points: np.ndarray, pairs: np.ndarray, gray_image: np.ndarray,
+                         line_pitch: Optional[float] = None) -> Tuple[int, List[List[int]]]:
+        """
+        Group matched pairs by displacement; a copied region moves all of its
+        keypoints by (nearly) the same offset. Each displacement group is split
+        into spatially connected patches, and a patch is kept when it has
+        min_cluster_size matches, both sides of at least the minimum region size,
+        pixels correlated with the patch at its offset and, if it is no taller
+        than two text lines, an offset that is not a whole number of line
+        pitches (zero included). Boxes cover the whole verified match. Returns the number of clustered matches and
+        [x1, y1, x2, y2] boxes for both source and target regions.
+        """
+        if len(pairs) == 0:
+            return 0, []
+
+        src, dst = points[pairs[:, 0]], points[pairs[:, 1]]
+        offsets = dst - src
+
+        # Orient every pair so that (dx, dy) and (-dx, -dy) land in the same bin
+        flip = (offsets[:, 0] < 0) | ((offsets[:, 0] == 0) & (offsets[:, 1] < 0))
+        src[flip], dst[flip] = dst[flip].copy(), src[flip].copy()
+        offsets[flip] = -offsets[flip]
+
+        bins = np.round(offsets / self.cluster_tolerance).astype(np.int64)
+        _, labels, counts = np.unique(bins, axis=0, return_inverse=True, return_counts=True)
+        labels = labels.reshape(-1)
+
+        longest = float(max(gray_image.shape[:2]))
+        min_side = self.min_region_fraction * longest
+        link = self.link_fraction * longest
+
+        clustered = 0
+        regions = []
+        for label in np.flatnonzero(counts >= self.min_cluster_size):
+            members = np.flatnonzero(labels == label)
+            for patch in _connected_groups(src[members], link):
+                if len(patch) < self.min_cluster_size:
+                    continue
+                patch = members[patch]
+                offset = offsets[patch].mean(axis=0)
+                x1, y1 = np.floor(src[patch].min(axis=0)).astype(int)
+                x2, y2 = np.ceil(src[patch].max(axis=0)).astype(int)
+                box = _verified_region(gray_image, [x1, y1, x2, y2], offset, max(int(min_side // 2), 1))
+                if box is None or min(box[2] - box[0], box[3] - box[1]) < min_side:
+                    continue
+                # Repeated words: a text-sized match shifted along its line or by whole lines
+                if line_pitch and box[3] - box[1] < 2 * line_pitch and _is_line_shift(offset[1], line_pitch,
+                                                                                       self.cluster_tolerance):
+                    continue
+                clustered += len(patch)
+                dx, dy = (int(round(v)) for v in offset)
+                regions.append(box)
+                regions.append([box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy])
+
+        return clustered, regions
+
+    def detect(self, gray_image: np.ndarray) -> Dict[str, Any]:
+        """
+        Run copy-move detection on a grayscale image.
+        Returns {"score", "regions", "keypoints", "matches"}.
+        """
+        points, descriptors = self.extract(gray_image)
+        result = {"score": 0.0, "regions": [], "keypoints": int(len(points)), "matches": 0}
+
+        if descriptors is None or len(descriptors) < 10:
+            return result
+
+        pairs = self._match_pairs(points, descriptors)
+        clustered, regions = self._cluster_regions(points, pairs, gray_image, text_line_pitch(gray_image))
+
+        # Share of the page covered by duplicated regions (source and target, overlaps counted once)
+        covered = np.zeros(gray_image.shape[:2], dtype=bool)
+        for x1, y1, x2, y2 in regions:
+            covered[y1:y2, x1:x2] = True
+        duplicated = covered.mean() if regions else 0.0
+        result.update({
+            "score": min(duplicated / self.full_score_area, 1.0),
+            "regions": regions,
+            "matches": int(len(pairs))
+        })
+        return result
+
+
+def _connected_groups(points: np.ndarray, link: float) -> List[np.ndarray]:
+    """Index groups of points chained together by steps of at most link (single linkage)"""
+    near = np.hypot(*(points[:, None, :] - points[None, :, :]).transpose(2, 0, 1)) <= link
+    unvisited = np.ones(len(points), dtype=bool)
+    groups = []
+    for start in range(len(points)):
+        if not unvisited[start]:
+            continue
+        group, frontier = [start], [start]
+        unvisited[start] = False
+        while frontier:
+            reached = np.flatnonzero(near[frontier].any(axis=0) & unvisited)
+            unvisited[reached] = False
+            group.extend(reached.tolist())
+            frontier = reached.tolist()
+        groups.append(np.array(group, dtype=np.int64))
+    return groups
+
+
+def _clip_to_offset(box: List[int], dx: int, dy: int, w: int, h: int) -> Optional[List[int]]:
+    """Part of a box that stays inside the image both in place and moved by (dx, dy)"""
+    x1, y1 = max(box[0], -dx, 0), max(box[1], -dy, 0)
+    x2, y2 = min(box[2], w - dx, w), min(box[3], h - dy, h)
+    return [x1, y1, x2, y2] if x2 > x1 and y2 > y1 else None
+
+
+def _patch_correlation(gray_image: np.ndarray, box: List[int], dx: int, dy: int) -> float:
+    """
+    Normalised correlation between the pixels of a box and of the box moved by
+    (dx, dy); 0 when either side is flat (blank paper matches anything)
+    """
+    x1, y1, x2, y2 = box
+    source = gray_image[y1:y2, x1:x2].astype(np.float32)
+    target = gray_image[y1 + dy:y2 + dy, x1 + dx:x2 + dx].astype(np.float32)
+    source -= source.mean()
+    target -= target.mean()
+    source_energy, target_energy = float((source * source).sum()), float((target * target).sum())
+    if min(source_energy, target_energy) < MIN_PATCH_VARIANCE * source.size:
+        return 0.0
+    return float((source * target).sum()) / np.sqrt(source_energy * target_energy)
+
+
+def _verified_region(gray_image: np.ndarray, box: List[int], offset: np.ndarray, step: int) -> Optional[List[int]]:
+    """
+    The keypoint box grown strip by strip (step pixels per side) while each new
+    strip still matches its counterpart at the offset; None when the box itself
+    does not match
+    """
+    h, w = gray_image.shape[:2]
+    dx, dy = (int(round(v)) for v in offset)
+    box = _clip_to_offset(box, dx, dy, w, h)
+    if box is None or _patch_correlation(gray_image, box, dx, dy) < MIN_PATCH_CORRELATION:
+        return None
+
+    growing = [True] * 4
+    while any(growing):
+        for side in range(4):
+            if not growing[side]:
+                continue
+            strip, grown = list(box), list(box)
+            if side < 2:
+                strip[side + 2] = box[side]
+                strip[side] = grown[side] = box[side] - step
+            else:
+                strip[side - 2] = box[side]
+                strip[side] = grown[side] = box[side] + step
+            strip = _clip_to_offset(strip, dx, dy, w, h)
+            if strip is None or strip[side % 2 + 2] - strip[side % 2] < step or \
+                    _patch_correlation(gray_image, strip, dx, dy) < MIN_PATCH_CORRELATION:
+                growing[side] = False
+            else:
+                box = _clip_to_offset(grown, dx, dy, w, h)
+    return [int(v) for v in box]
+
+
+def _is_line_shift(dy: float, pitch: float, tolerance: float) -> bool:
+    """Whether a vertical offset is a whole number of text-line pitches (zero included)"""
+    lines = round(abs(dy) / pitch)
+    # Line spacing drifts by a few pixels over a page
+    return abs(abs(dy) - lines * pitch) <= tolerance + LINE_PITCH_DRIFT * abs(dy)
+
+
+def text_line_pitch(gray_image: np.ndarray, max_side: int = 1024) -> Optional[float]:
+    """
+    Spacing of regularly set text lines in full-resolution pixels (None when the
+    row profile has no clear period): the strongest autocorrelation peak of the
+    per-row ink count, measured on a copy downscaled to max_side
+    """
+    h, w = gray_image.shape[:2]
+    scale = min(max_side / float(max(h, w)), 1.0)
+    small = cv2.resize(gray_image, (max(int(w * scale), 1), max(int(h * scale), 1)), interpolation=cv2.INTER_AREA)
+    _, ink = cv2.threshold(small, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    profile = ink.sum(axis=1, dtype=np.float64)
+    profile -= profile.mean()
+    energy = float(np.dot(profile, profile))
+    if energy == 0:
+        return None
+    size = 1 << int(2 * len(profile) - 1).bit_length()
+    spectrum = np.fft.rfft(profile, size)
+    correlation = np.fft.irfft(spectrum * np.conj(spectrum), size)[:len(profile) // 4] / energy
+
+    # Local maxima past the central peak; multiples of the pitch peak as well, so take
+    # the first one nearly as strong as the best
+    peaks = np.flatnonzero((correlation[1:-1] > correlation[:-2]) & (correlation[1:-1] >= correlation[2:])) + 1
+    if len(peaks) == 0 or correlation[peaks].max() < LINE_PITCH_MIN_CORRELATION:
+        return None
+    lag = peaks[np.argmax(correlation[peaks] >= 0.9 * correlation[peaks].max())]
+
+    # Parabolic refinement: the error of a whole-sample lag adds up over many lines
+    left, centre, right = correlation[lag - 1:lag + 2]
+    curvature = left - 2 * centre + right
+    shift = 0.5 * (left - right) / curvature if curvature < 0 else 0.0
+    return (lag + shift) / scale
@@ -0,0 +1,249 @@
+"""
+Compiled field scanner for OCR text
+All field patterns of a pack are compiled once and each runs a single
+search over the whole normalised OCR text, keeping the legacy semantics
+(leftmost match per pattern, best confidence per field, earlier pattern on
+ties). Patterns without upper-case literals search a once-lowercased copy of
+the text case-sensitively, which CPython's re runs several times faster than
+IGNORECASE, and values are cut from the original text by span.
+
+Institution packs (JSON, see load_pattern_packs) add or replace patterns for
+one issuer and are compiled once and cached
+"""
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+FieldPatterns = Dict[str, List[str]]
+
+DEFAULT_PACK = "default"
+
+DEFAULT_FIELD_PATTERNS: FieldPatterns = {
+    'name': [
+        r'(?:name|student|candidate)[\s:]+([a-zA-Z\s]+)',
+        r'(?:this is to certify that)[\s]*([a-zA-Z\s]+)',
+        r'(?:mr|ms|miss)[\s\.]*([a-zA-Z\s]+)'
+    ],
+    'roll_no': [
+        r'(?:roll|reg|registration)[\s]*(?:no|number)[\s:]*([a-zA-Z0-9]+)',
+        r'(?:student id|id)[\s:]*([a-zA-Z0-9]+)'
+    ],
+    'certificate_id': [
+        r'(?:certificate|cert)[\s]*(?:no|number|id)[\s:]*([a-zA-Z0-9-]+)',
+        r'(?:serial|ref)[\s]*(?:no|number)[\s:]*([a-zA-Z0-9-]+)'
+    ],
+    'course_name': [
+        r'(?:course|program|degree|bachelor|master|diploma)[\s:]*([a-zA-Z\s&]+)',
+        r'(?:in the field of|majoring in)[\s]*([a-zA-Z\s&]+)'
+    ],
+    'institution': [
+        r'(?:university|college|institute|school)[\s]*(?:of|for)?[\s]*([a-zA-Z\s&]+)',
+        # Anchored at the start of each letter run: same leftmost match, no quadratic backtracking
+        r'((?<![a-zA-Z\s&])[a-zA-Z\s&]*university|college|institute)'
+    ],
+    'issue_date': [
+        r'(?:issued|dated|given)[\s]*(?:on|this)?[\s]*([0-9]{1,2}[/-][0-9]{1,2}[/-][0-9]{2,4})',
+        r'([0-9]{1,2}[\s]*(?:st|nd|rd|th)?[\s]*[a-zA-Z]+[\s]*[0-9]{2,4})',
+        r'([0-9]{4}[/-][0-9]{1,2}[/-][0-9]{1,2})'
+    ],
+    'year': [
+        r'(?:year|class of|batch)[\s]*([0-9]{4})',
+        r'(?:academic year)[\s]*([0-9]{4}-?[0-9]{2,4}?)'
+    ],
+    'grade': [
+        r'(?:grade|cgpa|gpa|percentage|marks)[\s:]*([a-zA-Z0-9\.\s%]+)',
+        r'(?:first class|second class|third class|distinction|honors)',
+        r'([0-9]\.[0-9]+)[\s]*(?:cgpa|gpa)'
+    ]
+}
+
+_LETTERS_ONLY = re.compile(r'^[A-Za-z\s]+$')
+_ESCAPES_AND_LETTER_RANGES = re.compile(r'\\.|a-zA-Z|A-Za-z')
+
+
+def pattern_confidence(pattern: str, value: str) -> float:
+    """Confidence of one match: pattern specificity plus value quality"""
+    return min(_pattern_base_confidence(pattern) + _value_bonus(value), 1.0)
+
+
+def _pattern_base_confidence(pattern: str) -> float:
+    base_confidence = 0.5
+    if 'certificate' in pattern.lower():
+        base_confidence += 0.2
+    if 'name' in pattern.lower():
+        base_confidence += 0.15
+    return base_confidence
+
+
+def _value_bonus(value: str) -> float:
+    bonus = 0.0
+    if len(value) > 3:
+        bonus += 0.1
+    if _LETTERS_ONLY.match(value):  # Only letters and spaces
+        bonus += 0.1
+    return bonus
+
+
+def _matches_lowercased(pattern: str) -> bool:
+    """True when the pattern can run case-sensitively on lower-cased text (no upper-case literals)"""
+    stripped = _ESCAPES_AND_LETTER_RANGES.sub("", pattern)
+    return stripped == stripped.lower()
+
+
+class FieldMatch(NamedTuple):
+    """Best candidate for one field: value, confidence and the value's span in the scanned text"""
+    value: str
+    confidence: float
+    start: int
+    end: int
+
+
+class _CompiledPattern(NamedTuple):
+    field: str
+    regex: Pattern
+    lowercased: bool
+    value_group: int
+    base_confidence: float
+
+
+class FieldScanner:
+    """All field patterns of one pack, compiled once"""
+
+    def __init__(self, patterns: FieldPatterns):
+        self._patterns: List[_CompiledPattern] = []
+        for field, field_patterns in patterns.items():
+            for pattern in field_patterns:
+                lowercased = _matches_lowercased(pattern)
+                regex = re.compile(pattern) if lowercased else re.compile(pattern, re.IGNORECASE)
+                self._patterns.append(_CompiledPattern(
+                    field,
+                    regex,
+                    lowercased,
+                    1 if regex.groups else 0,  # Whole match for patterns without a group
+                    _pattern_base_confidence(pattern)
+                ))
+
+    def scan(self, text: str) -> Dict[str, FieldMatch]:
+        """Best match per field, one search per pattern over the whole text"""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Rare case-folding that changes length: spans would not line up
+            lowered = None
+
+        best: Dict[str, FieldMatch] = {}
+        for compiled in self._patterns:
+            if compiled.lowercased and lowered is not None:
+                match = compiled.regex.search(lowered)
+            else:
+                match = compiled.regex.search(text)
+            if not match:
+                continue
+
+            start, end = match.span(compiled.value_group)
+            if start < 0:
+                continue
+            raw = text[start:end]
+            value = raw.strip()
+            if not value:
+                continue
+
+            confidence = min(compiled.base_confidence + _value_bonus(value), 1.0)
+            current = best.get(compiled.field)
+            if current is None or confidence > current.confidence:
+                start += len(raw) - len(raw.lstrip())
+                best[compiled.field] = FieldMatch(value, confidence, start, start + len(value))
+
+        return best
+
+
+class PatternPack(NamedTuple):
+    """Extra (or replacement) field patterns for documents mentioning one of its institution keywords"""
+    name: str
+    institutions: Tuple[str, ...]
+    patterns: FieldPatterns
+    replace: bool
+
+
+def load_pattern_packs(path: Optional[str]) -> Dict[str, PatternPack]:
+    """
+    Institution packs from a JSON file:
+        {"<pack>": {"institutions": ["university of technology", ...],
+                    "patterns": {"certificate_id": ["UT[\\s-]*([0-9]{4}-[0-9]+)"]},
+                    "replace": false}}
+    Pack patterns go ahead of the defaults for their fields, or replace them
+    when "replace" is true. A missing or invalid file yields no packs.
+    """
+    if not path:
+        return {}
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load field pattern packs from {path}: {str(e)}")
+        return {}
+
+    packs = {}
+    for name, spec in raw.items():
+        try:
+            patterns = {field: list(values) for field, values in spec.get("patterns", {}).items()}
+            for values in patterns.values():
+                for pattern in values:
+                    re.compile(pattern)
+            packs[name] = PatternPack(
+                name,
+                tuple(keyword.lower() for keyword in spec.get("institutions", [])),
+                patterns,
+                bool(spec.get("replace", False))
+            )
+        except (AttributeError, TypeError, re.error) as e:
+            logger.warning(f"Skipping field pattern pack {name}: {str(e)}")
+
+    logger.info(f"Loaded {len(packs)} field pattern packs from {path}")
+    return packs
+
+
+def merge_patterns(base: FieldPatterns, pack: PatternPack) -> FieldPatterns:
+    merged = {field: list(values) for field, values in base.items()}
+    for field, values in pack.patterns.items():
+        merged[field] = list(values) if pack.replace else list(values) + merged.get(field, [])
+    return merged
+
+
+class FieldScannerRegistry:
+    """Default scanner plus lazily compiled, cached scanners for institution packs"""
+
+    def __init__(self, packs: Optional[Dict[str, PatternPack]] = None,
+                 default_patterns: Optional[FieldPatterns] = None):
+        self.packs = packs or {}
+        self.default_patterns = default_patterns or DEFAULT_FIELD_PATTERNS
+        self._scanner = lru_cache(maxsize=None)(self._compile)
+
+    def _compile(self, pack_name: str) -> FieldScanner:
+        pack = self.packs.get(pack_name)
+        if pack is None:
+            return FieldScanner(self.default_patterns)
+        return FieldScanner(merge_patterns(self.default_patterns, pack))
+
+    def scanner(self, pack_name: str = DEFAULT_PACK) -> FieldScanner:
+        return self._scanner(pack_name)
+
+    def pack_for(self, text: str) -> Optional[str]:
+        """Name of the first pack with an institution keyword in the text"""
+        text = text.lower()
+        for pack in self.packs.values():
+            if any(keyword in text for keyword in pack.institutions):
+                return pack.name
+        return None
+
+    def scan(self, text: str, pack_name: Optional[str] = None) -> Tuple[Dict[str, FieldMatch], str]:
+        """
+        Scan with the given pack, else with the pack whose institution keywords
+        appear in the text (defaults when none does).
+        Returns the matches and the name of the pack used.
+        """
+        pack_name = pack_name or self.pack_for(text) or DEFAULT_PACK
+        return self.scanner(pack_name).scan(text), pack_name
@@ -0,0 +1,71 @@
+"""
+Canonical image fingerprints shared by issuance and verification
+SHA-256 over the raw RGB pixel buffer (no re-encoding) plus the phash, ahash
+and dhash perceptual hashes in imagehash's hex format, all resized from one
+shared full-resolution grayscale so they equal imagehash's own output and the
+hashes stored for earlier certificates
+"""
+import hashlib
+from typing import Dict, Union
+
+import numpy as np
+from PIL import Image
+from scipy.fft import dct
+
+HASH_SIZE = 8
+PHASH_SIZE = HASH_SIZE * 4
+
+
+def canonical_rgb(image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    """C-contiguous (H, W, 3) uint8 RGB pixels"""
+    if isinstance(image, Image.Image):
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image = np.asarray(image)
+    return np.ascontiguousarray(image, dtype=np.uint8)
+
+
+def pixel_sha256(rgb: np.ndarray) -> str:
+    """
+    SHA-256 of the raw RGB buffer, streamed through hashlib without a copy.
+    Non-RGB images (RGBA, L, P, CMYK) are converted to RGB first, so the digest
+    equals a hash of Image.tobytes() only for images that were already RGB.
+    """
+    return hashlib.sha256(memoryview(canonical_rgb(rgb)).cast("B")).hexdigest()
+
+
+def _bits_to_hex(bits: np.ndarray) -> str:
+    """Row-major bit array as hex, most significant bit first (imagehash str())"""
+    return np.packbits(bits.ravel()).tobytes().hex()
+
+
+def hash_base(rgb: np.ndarray) -> Image.Image:
+    """
+    Full-resolution grayscale (PIL 'L') shared by the perceptual hashes.
+    Not pre-reduced: a box reduction ahead of the Lanczos resize moves phash
+    bits away from imagehash.phash of the same image.
+    """
+    return Image.fromarray(canonical_rgb(rgb)).convert("L")
+
+
+def perceptual_hashes(base: Image.Image) -> Dict[str, str]:
+    """phash, ahash and dhash (64-bit, imagehash algorithms) of a hash_base image"""
+    pixels = np.asarray(base.resize((PHASH_SIZE, PHASH_SIZE), Image.LANCZOS), dtype=np.float64)
+    low_freq = dct(dct(pixels, axis=0), axis=1)[:HASH_SIZE, :HASH_SIZE]
+
+    average = np.asarray(base.resize((HASH_SIZE, HASH_SIZE), Image.LANCZOS))
+    gradient = np.asarray(base.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS))
+
+    return {
+        "phash": _bits_to_hex(low_freq > np.median(low_freq)),
+        "ahash": _bits_to_hex(average > average.mean()),
+        "dhash": _bits_to_hex(gradient[:, 1:] > gradient[:, :-1]),
+    }
+
+
+def compute_fingerprints(image: Union[Image.Image, np.ndarray]) -> Dict[str, str]:
+    """sha256, phash, ahash and dhash of an image (PIL or RGB array)"""
+    rgb = canonical_rgb(image)
+    fingerprints = {"sha256": pixel_sha256(rgb)}
+    fingerprints.update(perceptual_hashes(hash_base(rgb)))
+    return fingerprints
@@ -0,0 +1,131 @@
+"""
+Bounding-box geometry shared by the verification layers
+Boxes are [x1, y1, x2, y2] lists or (N, 4) arrays. Provides a vectorized IoU
+matrix, greedy non-maximum suppression and a sweep-line / union-find merger
+that resolves transitive overlaps
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def as_box_array(boxes: Sequence[Sequence[float]]) -> np.ndarray:
+    """(N, 4) float64 array view of a list of boxes"""
+    array = np.asarray(boxes, dtype=np.float64)
+    return array.reshape(-1, 4)
+
+
+def box_areas(boxes: np.ndarray) -> np.ndarray:
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def iou_matrix(boxes_a: Sequence[Sequence[float]], boxes_b: Sequence[Sequence[float]]) -> np.ndarray:
+    """Pairwise Intersection over Union, shape (len(boxes_a), len(boxes_b))"""
+    a, b = as_box_array(boxes_a), as_box_array(boxes_b)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    union = box_areas(a)[:, None] + box_areas(b)[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def non_max_suppression(boxes: Sequence[Sequence[float]], scores: Optional[Sequence[float]] = None,
+                        iou_threshold: float = 0.5) -> List[int]:
+    """
+    Greedy NMS. Returns indices of the kept boxes, highest score first;
+    ties (or no scores) keep the input order.
+    """
+    array = as_box_array(boxes)
+    if len(array) == 0:
+        return []
+
+    if scores is None:
+        order = np.arange(len(array))
+    else:
+        order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+
+    ious = iou_matrix(array, array)
+    suppressed = np.zeros(len(array), dtype=bool)
+    keep = []
+    for idx in order:
+        if suppressed[idx]:
+            continue
+        keep.append(int(idx))
+        suppressed |= ious[idx] > iou_threshold
+    return keep
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Path compression
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i: int, j: int):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[rj] = ri
+
+
+def _merge_pass(boxes: np.ndarray) -> np.ndarray:
+    """One sweep over x: union every pair of touching/overlapping boxes and take component bounds"""
+    order = np.argsort(boxes[:, 0], kind="stable")
+    boxes = boxes[order]
+    n = len(boxes)
+
+    # Candidates for box i are the later boxes whose x1 does not pass i's x2
+    ends = np.searchsorted(boxes[:, 0], boxes[:, 2], side="right")
+
+    uf = _UnionFind(n)
+    for i in range(n):
+        if ends[i] <= i + 1:
+            continue
+        candidates = boxes[i + 1:ends[i]]
+        overlapping = (candidates[:, 1] <= boxes[i, 3]) & (candidates[:, 3] >= boxes[i, 1])
+        for j in np.flatnonzero(overlapping):
+            uf.union(i, i + 1 + int(j))
+
+    roots = np.array([uf.find(i) for i in range(n)])
+    _, labels = np.unique(roots, return_inverse=True)
+    labels = labels.reshape(-1)
+
+    count = labels.max() + 1
+    merged = np.empty((count, 4), dtype=boxes.dtype)
+    merged[:, :2] = np.inf
+    merged[:, 2:] = -np.inf
+    np.minimum.at(merged[:, 0], labels, boxes[:, 0])
+    np.minimum.at(merged[:, 1], labels, boxes[:, 1])
+    np.maximum.at(merged[:, 2], labels, boxes[:, 2])
+    np.maximum.at(merged[:, 3], labels, boxes[:, 3])
+    return merged
+
+
+def merge_overlapping_boxes(boxes: Sequence[Sequence[float]]) -> List[List[int]]:
+    """
+    Merge touching or overlapping boxes into their union bounds, including
+    transitive chains (A-B, B-C). Passes repeat until merged bounds no longer
+    overlap each other. Returned boxes are sorted by x1.
+    """
+    array = as_box_array(boxes)
+    if len(array) == 0:
+        return []
+
+    while True:
+        merged = _merge_pass(array)
+        if len(merged) == len(array):
+            break
+        array = merged
+
+    merged = merged[np.argsort(merged[:, 0], kind="stable")]
+    return merged.astype(int).tolist()
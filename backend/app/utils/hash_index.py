@@ -0,0 +1,270 @@
+"""
+Near-duplicate index over 64-bit perceptual hashes
+Multi-index hashing: every hash is split into four 16-bit chunks, each with
+its own sorted table. Two hashes within Hamming distance r agree to within
+r // 4 bits on at least one chunk (pigeonhole), so a query only probes the
+chunk values inside that radius and verifies the candidates it hits.
+Recent additions sit in a small unsorted tail that is scanned directly and
+folded into the tables once it fills. Each key can also carry the SHA-256
+digests of its images, so a match can tell an identical re-upload from an
+edited copy. On disk the index is an .npz snapshot plus an append-only
+journal of the entries added since.
+"""
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+CHUNK_BITS = 16
+NUM_CHUNKS = HASH_BITS // CHUNK_BITS
+DIGEST_HEX_LENGTH = 64  # SHA-256
+
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def hash_to_int(value: str) -> int:
+    """64-bit integer of a hex perceptual hash (imagehash str() format)"""
+    if len(value) != HASH_BITS // 4:
+        raise ValueError(f"Expected a {HASH_BITS}-bit hex hash, got {value!r}")
+    return int(value, 16)
+
+
+def hamming_distances(hashes: np.ndarray, query: int) -> np.ndarray:
+    """Bit distance between each uint64 hash and the query"""
+    diff = np.bitwise_xor(hashes, np.uint64(query))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).astype(np.int64)
+    return _BYTE_POPCOUNT[diff.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int64)
+
+
+@lru_cache(maxsize=8)
+def _flip_masks(radius: int) -> np.ndarray:
+    """Every chunk-wide mask with at most radius bits set"""
+    values = np.arange(1 << CHUNK_BITS, dtype=np.uint32)
+    weights = hamming_distances(values.astype(np.uint64), 0)
+    masks = values[weights <= radius].astype(np.uint16)
+    masks.setflags(write=False)
+    return masks
+
+
+def _expand_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, end) over all ranges, without a Python loop"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(total) - np.repeat(offsets - starts, lengths)
+
+
+def _chunk(hashes: np.ndarray, index: int) -> np.ndarray:
+    return ((hashes >> np.uint64(index * CHUNK_BITS)) & np.uint64(0xFFFF)).astype(np.uint16)
+
+
+class PerceptualHashIndex:
+    """
+    Hamming-radius index mapping perceptual hashes to certificate keys.
+    Thread-safe; pass a path (without extension) to persist it.
+    """
+
+    def __init__(self, path: Optional[str] = None, tail_size: int = 4096):
+        self.path = path
+        self.tail_size = tail_size
+        self._lock = threading.RLock()
+
+        # Sorted multi-index tables over the compacted entries
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._keys: List[str] = []
+        self._chunk_values = [np.empty(0, dtype=np.uint16)] * NUM_CHUNKS
+        self._chunk_positions = [np.empty(0, dtype=np.int64)] * NUM_CHUNKS
+
+        # Recent additions, scanned linearly until compacted
+        self._tail = np.empty(tail_size, dtype=np.uint64)
+        self._tail_keys: List[str] = []
+
+        # Image digests per key (keys indexed without one have no entry)
+        self._digests: Dict[str, Set[str]] = {}
+
+        if path:
+            self.load()
+
+    @property
+    def snapshot_path(self) -> str:
+        return f"{self.path}.npz"
+
+    @property
+    def journal_path(self) -> str:
+        return f"{self.path}.journal"
+
+    def __len__(self) -> int:
+        return len(self._keys) + len(self._tail_keys)
+
+    def add(self, key: str, phash: str, digest: Optional[str] = None):
+        """Index a certificate's perceptual hash and image digest (journaled when persistent)"""
+        value = hash_to_int(phash)
+        with self._lock:
+            self._append(key, value)
+            self._add_digest(key, digest)
+            if self.path:
+                self._ensure_directory()
+                with open(self.journal_path, "a", encoding="utf-8") as journal:
+                    journal.write(f"{key}\t{phash}\t{digest}\n" if digest else f"{key}\t{phash}\n")
+            if len(self._tail_keys) >= self.tail_size:
+                self._compact()
+                if self.path:
+                    self.save()
+
+    def add_many(self, entries: Iterable[Tuple[str, ...]]):
+        """Bulk-load (key, phash) or (key, phash, digest) entries and rebuild the tables once"""
+        with self._lock:
+            self._compact()
+            keys, values = list(self._keys), [self._hashes]
+            batch = []
+            for key, phash, *digest in entries:
+                try:
+                    batch.append(hash_to_int(phash))
+                    keys.append(key)
+                except (TypeError, ValueError):
+                    logger.warning(f"Skipping invalid perceptual hash for {key}")
+                    continue
+                self._add_digest(key, digest[0] if digest else None)
+            values.append(np.array(batch, dtype=np.uint64))
+            self._build(np.concatenate(values), keys)
+
+    def search(self, phash: str, max_distance: int = 10) -> List[Tuple[str, int]]:
+        """(key, distance) of every entry within max_distance bits, closest first"""
+        query = hash_to_int(phash)
+        with self._lock:
+            matches = self._search_tables(query, max_distance) + self._search_tail(query, max_distance)
+        return sorted(matches, key=lambda match: match[1])
+
+    def nearest(self, phash: str, max_distance: int = 10) -> Optional[Tuple[str, int]]:
+        """Closest (key, distance) within max_distance bits, if any"""
+        matches = self.search(phash, max_distance)
+        return matches[0] if matches else None
+
+    def digests(self, key: str) -> Set[str]:
+        """SHA-256 digests recorded for a key (empty when none were indexed)"""
+        with self._lock:
+            return set(self._digests.get(key, ()))
+
+    def _add_digest(self, key: str, digest: Optional[str]):
+        if digest and len(digest) == DIGEST_HEX_LENGTH:
+            self._digests.setdefault(key, set()).add(digest)
+
+    def _append(self, key: str, value: int):
+        self._tail[len(self._tail_keys)] = value
+        self._tail_keys.append(key)
+
+    def _search_tables(self, query: int, max_distance: int) -> List[Tuple[str, int]]:
+        if len(self._hashes) == 0:
+            return []
+
+        masks = _flip_masks(min(max_distance // NUM_CHUNKS, CHUNK_BITS))
+        query_array = np.array([query], dtype=np.uint64)
+
+        hits = []
+        for c in range(NUM_CHUNKS):
+            probes = masks ^ _chunk(query_array, c)[0]
+            values = self._chunk_values[c]
+            lo = np.searchsorted(values, probes, side="left")
+            hi = np.searchsorted(values, probes, side="right")
+            hits.append(self._chunk_positions[c][_expand_ranges(lo, hi)])
+
+        # Candidates may repeat across chunks; only the verified matches are deduplicated
+        candidates = np.concatenate(hits)
+        distances = hamming_distances(self._hashes[candidates], query)
+        close = distances <= max_distance
+        matches = dict(zip(candidates[close].tolist(), distances[close].tolist()))
+        return [(self._keys[i], d) for i, d in matches.items()]
+
+    def _search_tail(self, query: int, max_distance: int) -> List[Tuple[str, int]]:
+        count = len(self._tail_keys)
+        if count == 0:
+            return []
+        distances = hamming_distances(self._tail[:count], query)
+        return [(self._tail_keys[i], int(distances[i])) for i in np.flatnonzero(distances <= max_distance)]
+
+    def _build(self, hashes: np.ndarray, keys: List[str]):
+        self._hashes = hashes
+        self._keys = keys
+        self._tail_keys = []
+        for c in range(NUM_CHUNKS):
+            values = _chunk(hashes, c)
+            order = np.argsort(values, kind="stable")
+            self._chunk_values[c] = values[order]
+            self._chunk_positions[c] = order
+
+    def _compact(self):
+        """Fold the tail into the sorted tables"""
+        count = len(self._tail_keys)
+        if count == 0:
+            return
+        self._build(np.concatenate([self._hashes, self._tail[:count]]), self._keys + self._tail_keys)
+
+    def _ensure_directory(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def save(self):
+        """Write a snapshot of every entry and truncate the journal"""
+        if not self.path:
+            return
+        with self._lock:
+            self._compact()
+            self._ensure_directory()
+            temp_path = f"{self.path}.tmp.npz"
+            with open(temp_path, "wb") as f:
+                digest_pairs = [(key, digest) for key, digests in self._digests.items() for digest in sorted(digests)]
+                np.savez(
+                    f, hashes=self._hashes, keys=np.array(self._keys, dtype=str),
+                    digest_keys=np.array([key for key, _ in digest_pairs], dtype=str),
+                    digest_values=np.array([digest for _, digest in digest_pairs], dtype=str)
+                )
+            os.replace(temp_path, self.snapshot_path)
+            open(self.journal_path, "w").close()
+        logger.info(f"Perceptual hash index saved with {len(self._keys)} entries")
+
+    def load(self):
+        """Read the snapshot and replay the journal"""
+        with self._lock:
+            if os.path.exists(self.snapshot_path):
+                with np.load(self.snapshot_path) as data:
+                    self._build(data["hashes"].astype(np.uint64), data["keys"].tolist())
+                    # Snapshots written before digests were recorded have no digest arrays
+                    if "digest_keys" in data.files:
+                        for key, digest in zip(data["digest_keys"].tolist(), data["digest_values"].tolist()):
+                            self._add_digest(key, digest)
+
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, encoding="utf-8") as journal:
+                    for line in journal:
+                        key, _, entry = line.rstrip("\n").partition("\t")
+                        phash, _, digest = entry.partition("\t")
+                        try:
+                            self._append(key, hash_to_int(phash))
+                        except ValueError:
+                            continue  # Torn final write
+                        self._add_digest(key, digest)
+                        if len(self._tail_keys) >= self.tail_size:
+                            self._compact()
+
+            logger.info(f"Perceptual hash index loaded with {len(self)} entries")
+
+
+_index: Optional[PerceptualHashIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_phash_index(path: Optional[str] = None) -> PerceptualHashIndex:
+    """Process-wide index, loaded from path on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PerceptualHashIndex(path or None)
+        return _index
@@ -0,0 +1,168 @@
+"""
+Per-request decoded image bundle
+Decodes an upload once and lazily memoizes every representation the
+verification layers need (RGB array, BGR, grayscale, YUV, downscaled levels,
+the pre-processed OCR page)
+"""
+import io
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .ocr_preprocess import OCRPage, preprocess_for_ocr, source_dpi
+
+
+class ImageBundle:
+    """
+    Lazily evaluated, memoized views of one certificate image.
+    All arrays are read-only and shared between layers, so callers must copy
+    before modifying them. Safe to read from executor threads concurrently.
+    """
+
+    def __init__(self, image: Optional[Image.Image] = None, data: Optional[bytes] = None):
+        # Normalise once so every layer sees the same 3-channel image
+        if image is not None and image.mode != "RGB":
+            image = image.convert("RGB")
+        self._pil = image
+        self.data = data
+        self._cache: Dict[Any, np.ndarray] = {}
+        self._levels: Dict[int, "ImageBundle"] = {}
+        self._ocr_pages: Dict[Any, OCRPage] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_bytes(cls, image_data: bytes) -> "ImageBundle":
+        """Decode uploaded bytes into a bundle, keeping the raw bytes for hashing"""
+        image = Image.open(io.BytesIO(image_data))
+        image.load()
+        return cls(image, data=image_data)
+
+    @classmethod
+    def from_arrays(cls, **arrays: np.ndarray) -> "ImageBundle":
+        """
+        Bundle over already-computed views (e.g. rgb=..., gray=..., y_channel=...).
+        The PIL image is only materialised if a caller asks for it, which requires rgb.
+        """
+        bundle = cls()
+        for name, array in arrays.items():
+            bundle._cache["y" if name == "y_channel" else name] = array
+        return bundle
+
+    @classmethod
+    def ensure(cls, image: Union[Image.Image, "ImageBundle"]) -> "ImageBundle":
+        """Return the bundle unchanged, or wrap a bare PIL image"""
+        if isinstance(image, ImageBundle):
+            return image
+        return cls(image)
+
+    def _memoize(self, key: Any, factory: Callable[[], np.ndarray]) -> np.ndarray:
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                cached = factory()
+                cached.setflags(write=False)
+                self._cache[key] = cached
+            return cached
+
+    @property
+    def pil(self) -> Image.Image:
+        """RGB PIL image"""
+        if self._pil is None:
+            with self._lock:
+                if self._pil is None:
+                    self._pil = Image.fromarray(np.ascontiguousarray(self._cache["rgb"]))
+        return self._pil
+
+    @property
+    def size(self):
+        """(width, height) of the image"""
+        if self._pil is not None:
+            return self._pil.size
+        h, w = next(iter(self._cache.values())).shape[:2]
+        return w, h
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """HxWx3 uint8 RGB array, materialised once"""
+        return self._memoize("rgb", lambda: np.asarray(self.pil))
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """OpenCV-ordered BGR array"""
+        return self._memoize("bgr", lambda: cv2.cvtColor(self.rgb, cv2.COLOR_RGB2BGR))
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Single-channel luminance (cv2 BGR2GRAY weights)"""
+        return self._memoize("gray", lambda: cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY))
+
+    @property
+    def yuv(self) -> np.ndarray:
+        """YUV conversion of the BGR array"""
+        return self._memoize("yuv", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2YUV))
+
+    @property
+    def y_channel(self) -> np.ndarray:
+        """Contiguous Y plane of the YUV conversion"""
+        return self._memoize("y", lambda: np.ascontiguousarray(self.yuv[:, :, 0]))
+
+    def gray_level(self, level: int) -> np.ndarray:
+        """Grayscale downscaled by 2**level (level 0 is full resolution)"""
+        if level <= 0:
+            return self.gray
+
+        def build() -> np.ndarray:
+            parent = self.gray_level(level - 1)
+            h, w = parent.shape
+            return cv2.resize(parent, (max(w // 2, 1), max(h // 2, 1)), interpolation=cv2.INTER_AREA)
+
+        return self._memoize(("gray", level), build)
+
+    def downscaled(self, level: int) -> "ImageBundle":
+        """Bundle over the RGB image downscaled by 2**level (level 0 returns self)"""
+        if level <= 0:
+            return self
+        with self._lock:
+            if level not in self._levels:
+                h, w = self.rgb.shape[:2]
+                scale = 2 ** level
+                size = (max(w // scale, 1), max(h // scale, 1))
+                rgb = cv2.resize(self.rgb, size, interpolation=cv2.INTER_AREA)
+                rgb.setflags(write=False)
+                self._levels[level] = ImageBundle.from_arrays(rgb=rgb)
+            return self._levels[level]
+
+    def gray_max_side(self, max_side: int) -> np.ndarray:
+        """Grayscale downscaled (never upscaled) so the longer side is at most max_side"""
+        h, w = self.gray.shape
+        longest = max(h, w)
+        if longest <= max_side:
+            return self.gray
+
+        def build() -> np.ndarray:
+            scale = max_side / float(longest)
+            size = (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1))
+            return cv2.resize(self.gray, size, interpolation=cv2.INTER_AREA)
+
+        return self._memoize(("gray_max", max_side), build)
+
+    def ocr_page(self, target_dpi: int = 300, max_skew: float = 5.0, crop_margins: bool = True) -> OCRPage:
+        """Grayscale normalised for OCR (DPI, deskew, margin crop) and its binarisation, built once"""
+        key = (target_dpi, max_skew, crop_margins)
+        page = self._ocr_pages.get(key)
+        if page is not None:
+            return page
+        with self._lock:
+            if key not in self._ocr_pages:
+                info_dpi = self._pil.info.get("dpi") if self._pil is not None else None
+                dpi, dpi_source = source_dpi(self.size, info_dpi)
+                page = preprocess_for_ocr(self.gray, dpi, target_dpi, max_skew, crop_margins)
+                page.params["dpi_source"] = dpi_source
+                self._ocr_pages[key] = page
+            return self._ocr_pages[key]
@@ -0,0 +1,165 @@
+"""
+Text-block layout analysis for region-of-interest OCR
+Finds text lines on a binarised page by smearing ink horizontally into
+connected components, so OCR only sees the crops that hold text instead of
+the whole page. Photo, seal and signature regions taller than a text line
+are taken out of the ink before smearing and blocks mostly inside one are
+dropped; a component still spanning several lines (a stamp outline the
+detectors missed) is split back into lines by its row profile. Boxes are
+[x1, y1, x2, y2] in page pixels, returned in reading order
+"""
+from typing import List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from .geometry import as_box_array, box_areas, merge_overlapping_boxes
+
+# Sizes in inches, converted with the page DPI
+SMEAR_WIDTH_INCHES = 0.12    # Joins the characters and words of one line
+SMEAR_HEIGHT_INCHES = 0.015
+MIN_LINE_HEIGHT_INCHES = 0.04
+MAX_LINE_HEIGHT_INCHES = 1.0
+MIN_LINE_WIDTH_INCHES = 0.05
+BLOCK_PADDING_INCHES = 0.03
+
+# A block at least this much inside an excluded region is that region, not text
+EXCLUDED_COVERAGE = 0.5
+
+# Detections shorter than this are round letters or words, not a photo, seal or signature
+MIN_REGION_HEIGHT_INCHES = 0.8
+REGION_MARGIN_INCHES = 0.03  # Detected boxes hug the stroke centres; the outline's edge lies just outside
+
+# Rows of a multi-line component holding less than this share of its widest row lie between lines
+LINE_ROW_FILL = 0.25
+
+
+def _inches(value: float, dpi: float) -> int:
+    return max(int(round(value * dpi)), 1)
+
+
+def _layout_regions(regions: Sequence[Sequence[int]], dpi: float) -> List[List[int]]:
+    """Photo, seal and signature detections tall enough to be one (the heuristics also fire inside text lines)"""
+    min_height = _inches(MIN_REGION_HEIGHT_INCHES, dpi)
+    return [list(region) for region in regions if region[3] - region[1] >= min_height]
+
+
+def detect_text_blocks(binary: np.ndarray, dpi: float,
+                       excluded: Optional[Sequence[Sequence[float]]] = None) -> List[List[int]]:
+    """
+    Text-line boxes on a binarised page (ink black on white), without the
+    blocks that are mostly inside one of the excluded regions. Excluded
+    regions no taller than a text line are ignored.
+    """
+    h, w = binary.shape
+    ink = cv2.bitwise_not(binary)
+    ink = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+    margin = _inches(REGION_MARGIN_INCHES, dpi)
+    excluded = as_box_array(_layout_regions(excluded if excluded is not None else [], dpi))
+    excluded = np.clip(excluded + [-margin, -margin, margin, margin], 0, [w, h, w, h])
+    for x1, y1, x2, y2 in excluded.astype(int):
+        # A stamp crossing lines would otherwise smear them into one component
+        ink[y1:y2, x1:x2] = 0
+
+    kernel = cv2.getStructuringElement(
+        cv2.MORPH_RECT, (_inches(SMEAR_WIDTH_INCHES, dpi), _inches(SMEAR_HEIGHT_INCHES, dpi))
+    )
+    smeared = cv2.dilate(ink, kernel)
+
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(smeared, connectivity=8)
+    if count <= 1:
+        return []
+
+    stats = stats[1:, :4]
+    max_height = _inches(MAX_LINE_HEIGHT_INCHES, dpi)
+    tall = np.flatnonzero(stats[:, 3] > max_height)
+    if len(tall):
+        lines = [_split_lines(labels, label + 1, stats[label]) for label in tall]
+        stats = np.concatenate([np.delete(stats, tall, axis=0)] + lines)
+
+    lefts, tops, widths, heights = stats.T
+    keep = (
+        (heights >= _inches(MIN_LINE_HEIGHT_INCHES, dpi)) &
+        (heights <= max_height) &
+        (widths >= _inches(MIN_LINE_WIDTH_INCHES, dpi))
+    )
+    if not keep.any():
+        return []
+
+    pad = _inches(BLOCK_PADDING_INCHES, dpi)
+    x1 = np.clip(lefts[keep] - pad, 0, w)
+    y1 = np.clip(tops[keep] - pad, 0, h)
+    x2 = np.clip(lefts[keep] + widths[keep] + pad, 0, w)
+    y2 = np.clip(tops[keep] + heights[keep] + pad, 0, h)
+    boxes = np.stack([x1, y1, x2, y2], axis=1).astype(np.float64)
+
+    if len(excluded):
+        boxes = boxes[_excluded_coverage(boxes, excluded) < EXCLUDED_COVERAGE]
+        boxes = _extend_into_excluded(boxes, excluded, _inches(SMEAR_WIDTH_INCHES, dpi))
+
+    # Padding can make neighbouring lines touch; fuse them rather than OCR the overlap twice
+    return reading_order(merge_overlapping_boxes(boxes))
+
+
+def _split_lines(labels: np.ndarray, label: int, stat: np.ndarray) -> np.ndarray:
+    """
+    (left, top, width, height) of the text lines inside one multi-line component:
+    runs of rows filled like a smeared line, the thin strokes of whatever joined
+    them falling below LINE_ROW_FILL
+    """
+    left, top, width, height = (int(v) for v in stat)
+    mask = labels[top:top + height, left:left + width] == label
+    profile = mask.sum(axis=1)
+    rows = np.concatenate([[False], profile >= LINE_ROW_FILL * profile.max(), [False]])
+    edges = np.flatnonzero(np.diff(rows.astype(np.int8)))
+
+    lines = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        columns = np.flatnonzero(mask[start:end].any(axis=0))
+        lines.append([left + columns[0], top + start, columns[-1] - columns[0] + 1, end - start])
+    return np.array(lines, dtype=stat.dtype).reshape(-1, 4)
+
+
+def _extend_into_excluded(boxes: np.ndarray, excluded: np.ndarray, reach: int) -> np.ndarray:
+    """
+    Stretch blocks across the excluded regions their line runs into, so the
+    words under a stamp stay inside a crop (pieces of one line then overlap and merge)
+    """
+    boxes = boxes.copy()
+    heights = boxes[:, 3] - boxes[:, 1]
+    for x1, y1, x2, y2 in excluded:
+        on_line = np.minimum(boxes[:, 3], y2) - np.maximum(boxes[:, 1], y1) > 0.5 * heights
+        into_right = on_line & (boxes[:, 0] < x1) & (boxes[:, 2] >= x1 - reach) & (boxes[:, 2] < x2)
+        into_left = on_line & (boxes[:, 2] > x2) & (boxes[:, 0] <= x2 + reach) & (boxes[:, 0] > x1)
+        boxes[into_right, 2] = x2
+        boxes[into_left, 0] = x1
+    return boxes
+
+
+def _same_line(a: Sequence[int], b: Sequence[int]) -> bool:
+    """Boxes sharing most of the shorter one's height"""
+    return min(a[3], b[3]) - max(a[1], b[1]) > 0.5 * min(a[3] - a[1], b[3] - b[1])
+
+
+def _excluded_coverage(boxes: np.ndarray, excluded: np.ndarray) -> np.ndarray:
+    """Largest fraction of each box's area lying inside any one excluded box"""
+    if len(excluded) == 0:
+        return np.zeros(len(boxes))
+    ix = np.clip(np.minimum(boxes[:, None, 2], excluded[None, :, 2]) -
+                 np.maximum(boxes[:, None, 0], excluded[None, :, 0]), 0, None)
+    iy = np.clip(np.minimum(boxes[:, None, 3], excluded[None, :, 3]) -
+                 np.maximum(boxes[:, None, 1], excluded[None, :, 1]), 0, None)
+    areas = np.maximum(box_areas(boxes), 1.0)
+    return (ix * iy).max(axis=1) / areas
+
+
+def reading_order(boxes: Sequence[Sequence[int]]) -> List[List[int]]:
+    """Top-to-bottom rows (boxes sharing most of their height), left-to-right within a row"""
+    remaining = sorted((list(box) for box in boxes), key=lambda box: (box[1], box[0]))
+    ordered = []
+    while remaining:
+        top = remaining[0]
+        row = [box for box in remaining if _same_line(box, top)]
+        ordered.extend(sorted(row, key=lambda box: box[0]))
+        remaining = [box for box in remaining if box not in row]
+    return ordered
@@ -0,0 +1,164 @@
+"""
+Local statistics engine built on summed-area tables
+Integral images of a signal and its square give the mean/variance of any
+axis-aligned block in O(1), so block grids at any size and stride are fully vectorized
+"""
+import cv2
+import numpy as np
+from typing import Any, Dict, Iterable, Tuple
+
+from .tiling import Tile
+
+
+class LocalStatistics:
+    """
+    Block statistics over a single-channel float signal (e.g. a noise residual).
+    Build once, then query variance/std grids for any block size and stride.
+    """
+
+    def __init__(self, signal: np.ndarray):
+        signal = np.ascontiguousarray(signal, dtype=np.float32)
+        self.shape: Tuple[int, int] = signal.shape[:2]
+
+        # (h+1, w+1) tables with a zero first row/column
+        self.sum_table, self.sq_sum_table = cv2.integral2(signal, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+    def block_origins(self, block_size: int, stride: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-left corners of the block grid (same walk as range(0, h - block_size, stride))"""
+        h, w = self.shape
+        ys = np.arange(0, max(h - block_size, 0), stride)
+        xs = np.arange(0, max(w - block_size, 0), stride)
+        return ys, xs
+
+    def _block_sums(self, table: np.ndarray, ys: np.ndarray, xs: np.ndarray, block_size: int) -> np.ndarray:
+        y0, x0 = ys[:, None], xs[None, :]
+        y1, x1 = y0 + block_size, x0 + block_size
+        return table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+
+    def region_sums(self, rows: slice, cols: slice) -> Tuple[float, float]:
+        """Sum and sum of squares of the signal over a rectangle"""
+        y0, y1, _ = rows.indices(self.shape[0])
+        x0, x1, _ = cols.indices(self.shape[1])
+        return tuple(float(t[y1, x1] - t[y0, x1] - t[y1, x0] + t[y0, x0])
+                     for t in (self.sum_table, self.sq_sum_table))
+
+    def moments_at(self, ys: np.ndarray, xs: np.ndarray, block_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean and (population) variance grids of the blocks at the given origins"""
+        if len(ys) == 0 or len(xs) == 0:
+            empty = np.zeros((len(ys), len(xs)), dtype=np.float64)
+            return empty, empty.copy()
+
+        area = float(block_size * block_size)
+        means = self._block_sums(self.sum_table, ys, xs, block_size) / area
+        sq_means = self._block_sums(self.sq_sum_table, ys, xs, block_size) / area
+        variances = np.maximum(sq_means - means ** 2, 0.0)
+        return means, variances
+
+    def block_moments(self, block_size: int, stride: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-block mean and (population) variance grids, shape (len(ys), len(xs))"""
+        return self.moments_at(*self.block_origins(block_size, stride), block_size)
+
+    def variance_map(self, block_size: int, stride: int) -> np.ndarray:
+        """Per-block variance grid"""
+        return self.block_moments(block_size, stride)[1]
+
+    def std_map(self, block_size: int, stride: int) -> np.ndarray:
+        """Per-block standard deviation grid"""
+        return np.sqrt(self.variance_map(block_size, stride))
+
+    def global_std(self) -> float:
+        """Standard deviation of the whole signal, read from the table corners"""
+        h, w = self.shape
+        if h == 0 or w == 0:
+            return 0.0
+        n = float(h * w)
+        mean = self.sum_table[h, w] / n
+        return float(np.sqrt(max(self.sq_sum_table[h, w] / n - mean ** 2, 0.0)))
+
+    def deviation_mask(self, block_size: int, stride: int, threshold: float) -> np.ndarray:
+        """Blocks whose std differs from the global std by more than threshold * global std"""
+        global_std = self.global_std()
+        return np.abs(self.std_map(block_size, stride) - global_std) > threshold * global_std
+
+    def heatmap(self, block_size: int, stride: int, decimals: int = 3) -> Dict[str, Any]:
+        """
+        Relative deviation of each block's std from the global std, for reviewer overlays.
+        Cell (r, c) covers pixels [c*stride, r*stride, c*stride+block_size, r*stride+block_size].
+        """
+        global_std = self.global_std()
+        std_map = self.std_map(block_size, stride)
+        if global_std > 0:
+            values = np.abs(std_map - global_std) / global_std
+        else:
+            values = np.zeros_like(std_map)
+
+        return {
+            "block_size": block_size,
+            "stride": stride,
+            "values": np.round(values, decimals).tolist()
+        }
+
+
+class StitchedStatistics(LocalStatistics):
+    """
+    Block statistics of a large signal assembled from per-tile summed-area tables.
+    Only the (block_size, stride) grids gathered from the tiles can be queried;
+    every block is measured inside the one tile whose core holds its origin, so
+    tiles must carry a halo of at least the block size.
+    """
+
+    def __init__(self, shape: Tuple[int, int], grids: Iterable[Tuple[int, int]]):
+        self.shape = tuple(shape[:2])
+        self.grids = tuple(grids)
+        self._sum = 0.0
+        self._sq_sum = 0.0
+        self._moments: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _grid_moments(self, grid: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        # Allocated on first use, so per-tile workers can build the layout cheaply
+        if grid not in self._moments:
+            ys, xs = self.block_origins(*grid)
+            self._moments[grid] = (np.zeros((len(ys), len(xs))), np.zeros((len(ys), len(xs))))
+        return self._moments[grid]
+
+    def tile_partial(self, signal: np.ndarray, tile: Tile) -> Dict[str, Any]:
+        """Core sums and grid block moments one tile contributes, from the signal over its padded box"""
+        local = LocalStatistics(signal)
+        rows, cols = tile.core_slices
+        x1, y1, x2, y2 = tile.core
+        px, py = tile.padded[:2]
+
+        blocks = {}
+        for block_size, stride in self.grids:
+            ys, xs = self.block_origins(block_size, stride)
+            r = np.flatnonzero((ys >= y1) & (ys < y2))
+            c = np.flatnonzero((xs >= x1) & (xs < x2))
+            means, variances = local.moments_at(ys[r] - py, xs[c] - px, block_size)
+            first_row, first_col = (int(r[0]) if len(r) else 0), (int(c[0]) if len(c) else 0)
+            blocks[(block_size, stride)] = (first_row, first_col, means, variances)
+
+        return {"sums": local.region_sums(rows, cols), "blocks": blocks}
+
+    def add(self, partial: Dict[str, Any]):
+        """Fold one tile_partial result into the global grids"""
+        core_sum, core_sq_sum = partial["sums"]
+        self._sum += core_sum
+        self._sq_sum += core_sq_sum
+        for grid, (row, col, means, variances) in partial["blocks"].items():
+            rows, cols = means.shape
+            grid_means, grid_variances = self._grid_moments(grid)
+            grid_means[row:row + rows, col:col + cols] = means
+            grid_variances[row:row + rows, col:col + cols] = variances
+
+    def block_moments(self, block_size: int, stride: int) -> Tuple[np.ndarray, np.ndarray]:
+        if (block_size, stride) not in self.grids:
+            raise KeyError(f"Block grid {(block_size, stride)} was not gathered from the tiles")
+        return self._grid_moments((block_size, stride))
+
+    def global_std(self) -> float:
+        h, w = self.shape
+        if h == 0 or w == 0:
+            return 0.0
+        n = float(h * w)
+        mean = self._sum / n
+        return float(np.sqrt(max(self._sq_sum / n - mean ** 2, 0.0)))
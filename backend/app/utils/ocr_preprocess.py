@@ -0,0 +1,171 @@
+"""
+OCR page pre-processing
+Brings a scanned or photographed certificate to what the OCR engines are
+tuned for: resampled to a target DPI (phone photos arrive at 2-3x the
+resolution OCR needs), deskewed by projection-profile search, cropped to the
+printed area and adaptively binarised. The page keeps the affine transform
+from original to processed pixels so boxes found on it map back to the upload
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Longer side of A4 in inches: certificates without DPI metadata are assumed to fill the frame
+A4_LONG_SIDE_INCHES = 11.69
+
+# Scale changes smaller than this are not worth a resample
+MIN_RESCALE = 0.1
+MAX_UPSCALE = 2.0
+
+# Skew search runs on a copy downscaled to this longer side
+SKEW_SEARCH_SIDE = 800
+SKEW_STEP_DEGREES = 0.25
+MIN_DESKEW_DEGREES = 0.2
+
+MARGIN_PADDING_INCHES = 0.08
+
+
+class OCRPage(NamedTuple):
+    """Pre-processed page: normalised grayscale, its binarisation and how both were derived"""
+    gray: np.ndarray
+    binary: np.ndarray
+    transform: np.ndarray  # 2x3 affine, original pixels -> page pixels
+    params: Dict[str, Any]
+
+    def to_original(self, box: List[float]) -> List[int]:
+        """Axis-aligned [x1, y1, x2, y2] in original pixels covering a page-space box"""
+        return _map_box(cv2.invertAffineTransform(self.transform), box)
+
+    def to_page(self, box: List[float]) -> List[int]:
+        """Axis-aligned [x1, y1, x2, y2] in page pixels covering an original-space box"""
+        return _map_box(self.transform, box)
+
+
+def _map_box(matrix: np.ndarray, box: List[float]) -> List[int]:
+    x1, y1, x2, y2 = box
+    corners = np.array([[x1, y1], [x2, y1], [x1, y2], [x2, y2]], dtype=np.float64)
+    mapped = corners @ matrix[:, :2].T + matrix[:, 2]
+    lo = np.floor(mapped.min(axis=0)).astype(int)
+    hi = np.ceil(mapped.max(axis=0)).astype(int)
+    return [int(lo[0]), int(lo[1]), int(hi[0]), int(hi[1])]
+
+
+def source_dpi(size: Tuple[int, int], info_dpi: Optional[Tuple[float, float]] = None) -> Tuple[float, str]:
+    """DPI from image metadata when plausible, else estimated from an A4-sized page"""
+    if info_dpi:
+        try:
+            dpi = float(max(info_dpi))
+            # 72/96 are screen defaults written by many tools, not scan resolutions
+            if dpi >= 100:
+                return dpi, "metadata"
+        except (TypeError, ValueError):
+            pass
+    return max(size) / A4_LONG_SIDE_INCHES, "estimated"
+
+
+def _otsu_ink(gray: np.ndarray) -> np.ndarray:
+    """Ink mask (text white on black) with speckle removed"""
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+
+
+def estimate_skew(gray: np.ndarray, max_angle: float) -> float:
+    """
+    Skew angle in degrees (rotating by it levels the text lines): the angle
+    whose row projection of the ink is sharpest, searched on a small copy
+    """
+    if max_angle <= 0:
+        return 0.0
+    h, w = gray.shape
+    scale = min(SKEW_SEARCH_SIDE / float(max(h, w)), 1.0)
+    small = cv2.resize(gray, (max(int(w * scale), 1), max(int(h * scale), 1)), interpolation=cv2.INTER_AREA)
+    ink = _otsu_ink(small)
+    if cv2.countNonZero(ink) == 0:
+        return 0.0
+
+    sh, sw = ink.shape
+    center = (sw / 2.0, sh / 2.0)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + 1e-9, SKEW_STEP_DEGREES):
+        rotation = cv2.getRotationMatrix2D(center, float(angle), 1.0)
+        rotated = cv2.warpAffine(ink, rotation, (sw, sh), flags=cv2.INTER_NEAREST)
+        profile = rotated.sum(axis=1, dtype=np.float64)
+        score = float(np.square(np.diff(profile)).sum())
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def content_box(gray: np.ndarray, padding: int) -> Tuple[int, int, int, int]:
+    """[x1, y1, x2, y2] of the printed area plus padding (the whole image when nothing is printed)"""
+    h, w = gray.shape
+    points = cv2.findNonZero(_otsu_ink(gray))
+    if points is None:
+        return 0, 0, w, h
+    x, y, bw, bh = cv2.boundingRect(points)
+    return max(x - padding, 0), max(y - padding, 0), min(x + bw + padding, w), min(y + bh + padding, h)
+
+
+def preprocess_for_ocr(gray: np.ndarray, dpi: float, target_dpi: int = 300, max_skew: float = 5.0,
+                       crop_margins: bool = True, binarize_c: int = 10) -> OCRPage:
+    """
+    Resample to target_dpi, deskew (up to max_skew degrees), crop margins and
+    binarise with a Gaussian adaptive threshold sized to the character height
+    """
+    transform = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+
+    scale = min(target_dpi / dpi, MAX_UPSCALE) if dpi > 0 else 1.0
+    if abs(scale - 1.0) >= MIN_RESCALE:
+        h, w = gray.shape
+        size = (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1))
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        gray = cv2.resize(gray, size, interpolation=interpolation)
+        transform = np.array([[size[0] / w, 0.0, 0.0], [0.0, size[1] / h, 0.0]])
+    else:
+        scale = 1.0
+
+    angle = estimate_skew(gray, max_skew)
+    if abs(angle) >= MIN_DESKEW_DEGREES:
+        h, w = gray.shape
+        rotation = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, 1.0)
+        gray = cv2.warpAffine(gray, rotation, (w, h), flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+        transform = _compose(rotation, transform)
+    else:
+        angle = 0.0
+
+    h, w = gray.shape
+    crop = [0, 0, w, h]
+    if crop_margins:
+        crop = list(content_box(gray, int(MARGIN_PADDING_INCHES * target_dpi)))
+        x1, y1, x2, y2 = crop
+        gray = gray[y1:y2, x1:x2]
+        transform = _compose(np.array([[1.0, 0.0, -x1], [0.0, 1.0, -y1]]), transform)
+
+    # Neighbourhood of roughly one text line at the target resolution
+    block_size = max(int(target_dpi / 10) | 1, 3)
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                   block_size, binarize_c)
+
+    gray = np.ascontiguousarray(gray)
+    gray.setflags(write=False)
+    binary.setflags(write=False)
+    params = {
+        "source_dpi": round(float(dpi), 1),
+        "target_dpi": target_dpi,
+        "page_dpi": round(float(dpi * scale), 1),
+        "scale": round(float(scale), 4),
+        "deskew_degrees": round(float(angle), 2),
+        "crop": [int(v) for v in crop],
+        "binarization": "adaptive_gaussian",
+        "block_size": block_size,
+        "threshold_c": binarize_c,
+        "size": [int(gray.shape[1]), int(gray.shape[0])]
+    }
+    return OCRPage(gray, binary, transform, params)
+
+
+def _compose(outer: np.ndarray, inner: np.ndarray) -> np.ndarray:
+    """Affine outer(inner(p)) as a 2x3 matrix"""
+    return (np.vstack([outer, [0.0, 0.0, 1.0]]) @ np.vstack([inner, [0.0, 0.0, 1.0]]))[:2]
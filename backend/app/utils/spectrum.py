@@ -0,0 +1,76 @@
+"""
+Frequency-domain helpers for resampling forensics
+Windowed real FFTs over power-of-two square planes, with Hann windows and
+polar sampling maps built once per plane size. Planes are cropped at native
+resolution rather than resized (interpolation wipes out the periodic traces
+being measured), so only a handful of sizes ever occur and the caches stay small
+"""
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def next_power_of_two(n: int) -> int:
+    return 1 << max(int(n) - 1, 0).bit_length()
+
+
+def previous_power_of_two(n: int) -> int:
+    return 1 << max(int(n).bit_length() - 1, 0)
+
+
+def power_of_two_square(plane: np.ndarray, max_side: Optional[int] = None) -> np.ndarray:
+    """Centre crop to the largest power-of-two square that fits (and is at most max_side)"""
+    h, w = plane.shape[:2]
+    side = previous_power_of_two(min(h, w, max_side) if max_side else min(h, w))
+    y, x = (h - side) // 2, (w - side) // 2
+    return plane[y:y + side, x:x + side]
+
+
+@lru_cache(maxsize=4)
+def hann_window(side: int) -> np.ndarray:
+    """Separable 2D Hann window over a side x side plane (read-only, cached per size)"""
+    window = np.outer(np.hanning(side), np.hanning(side)).astype(np.float32)
+    window.setflags(write=False)
+    return window
+
+
+@lru_cache(maxsize=8)
+def polar_indices(shape: Tuple[int, int], angle_step: int = 15) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (row, col) indices into an rfft2 half-spectrum of a full spectrum with the
+    given shape, sampling radial lines at angles 0, angle_step, ... < 180 degrees
+    from the DC term out to the inscribed radius.
+    Lines in the left half-plane are folded onto the stored half through
+    conjugate symmetry, |F(ky, kx)| == |F(-ky, -kx)|.
+    """
+    h, w = shape
+    angles = np.radians(np.arange(0, 180, angle_step))
+    radii = np.arange(1, min(h, w) // 2)
+
+    ky = np.rint(np.outer(np.sin(angles), radii)).astype(np.int64)
+    kx = np.rint(np.outer(np.cos(angles), radii)).astype(np.int64)
+
+    flip = kx < 0
+    ky[flip], kx[flip] = -ky[flip], -kx[flip]
+
+    rows = (ky % h).ravel()
+    cols = kx.ravel()
+    rows.setflags(write=False)
+    cols.setflags(write=False)
+    return rows, cols
+
+
+def radial_log_spectrum(plane: np.ndarray, angle_step: int = 15) -> np.ndarray:
+    """
+    Log-magnitude spectrum (dB-like, 20*log(|F|+1)) sampled along radial lines
+    of the Hann-windowed power-of-two centre square of a plane
+    """
+    square = power_of_two_square(plane)
+    side = square.shape[0]
+
+    windowed = square.astype(np.float32) * hann_window(side)
+    spectrum = np.fft.rfft2(windowed)
+
+    rows, cols = polar_indices((side, side), angle_step)
+    return 20 * np.log(np.abs(spectrum[rows, cols]) + 1)
@@ -0,0 +1,50 @@
+"""
+Overlapping tile layout for large-scan forensics
+Core tiles partition the image exactly and each is read with a halo of
+surrounding context, so per-tile results restricted to the cores stitch back
+into the same global statistics as a full-frame pass, while every stage only
+ever holds one tile-sized working set
+"""
+import math
+from typing import List, NamedTuple, Tuple
+
+Box = Tuple[int, int, int, int]
+
+
+class Tile(NamedTuple):
+    """Core box (owned pixels) and padded box (core plus halo), both [x1, y1, x2, y2]"""
+    core: Box
+    padded: Box
+
+    @property
+    def core_slices(self) -> Tuple[slice, slice]:
+        """(rows, cols) slices of the core inside the padded crop"""
+        x1, y1, x2, y2 = self.core
+        px, py = self.padded[:2]
+        return slice(y1 - py, y2 - py), slice(x1 - px, x2 - px)
+
+    def crop(self, plane):
+        """View of the padded box of a full-frame plane"""
+        x1, y1, x2, y2 = self.padded
+        return plane[y1:y2, x1:x2]
+
+
+def tile_side_for_budget(budget_bytes: int, bytes_per_pixel: int, halo: int, alignment: int) -> int:
+    """Largest aligned core side whose padded tile fits the per-tile memory budget"""
+    side = int(math.sqrt(budget_bytes / float(bytes_per_pixel))) - 2 * halo
+    return max((side // alignment) * alignment, alignment)
+
+
+def tile_layout(width: int, height: int, tile_size: int, halo: int) -> List[Tile]:
+    """
+    Row-major tiles with cores on a tile_size lattice from the image origin.
+    Keep tile_size and halo multiples of every block size the stages rely on,
+    so each padded crop starts on the same block grid as the full image.
+    """
+    tiles = []
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            x2, y2 = min(x + tile_size, width), min(y + tile_size, height)
+            padded = (max(x - halo, 0), max(y - halo, 0), min(x2 + halo, width), min(y2 + halo, height))
+            tiles.append(Tile((x, y, x2, y2), padded))
+    return tiles
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Layer 2 forensics benchmark and accuracy suite
+Renders certificates with the issuance template, applies controlled tampering
+(copy-move, splice, text overwrite, recompression, resampling) and reports
+per-detector latency (p50/p95), peak memory and ROC/AUC as JSON, so runs can
+be compared across commits
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.certificate_issuance import CertificateIssuanceService
+from app.services.layer2_forensics import Layer2ForensicsService
+from app.utils.image_bundle import ImageBundle
+
+TAMPER_TYPES = ["copy_move", "splice", "text_overwrite", "recompression", "resampling"]
+DETECTORS = ["noise", "resampling", "hashes", "double_compression", "jpeg_artifacts", "ela", "copy_move"]
+
+FIRST_NAMES = ["Aarav", "Priya", "John", "Maria", "Wei", "Fatima", "Lucas", "Ananya", "Kenji", "Amara"]
+LAST_NAMES = ["Sharma", "Smith", "Garcia", "Chen", "Khan", "Silva", "Patel", "Okafor", "Tanaka", "Muller"]
+COURSES = ["Bachelor of Technology", "Master of Science", "Data Structures", "Organic Chemistry",
+           "Machine Learning", "Financial Accounting", "Civil Engineering", "Modern History"]
+INSTITUTIONS = ["State University", "Institute of Technology", "College of Arts and Science"]
+
+# Template text rows (y at full template size) used to place local tampering
+NAME_ROW = 1000
+COURSE_ROW = 1400
+FINAL_QUALITY = 90
+
+
+# ---------------------------------------------------------------- generation
+
+def certificate_data(rng: np.random.Generator) -> dict:
+    """Random but reproducible certificate fields"""
+    return {
+        "student_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "course_name": str(rng.choice(COURSES)),
+        "institution": str(rng.choice(INSTITUTIONS)),
+        "grade": str(rng.choice(["A", "A+", "B", "B+", "First Class"])),
+        "issue_date": f"20{rng.integers(15, 25)}-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d}",
+        "certificate_id": f"CERT-{rng.integers(100000, 999999)}",
+    }
+
+
+def jpeg_round_trip(rgb: np.ndarray, quality: int) -> np.ndarray:
+    buffer = io.BytesIO()
+    Image.fromarray(rgb).save(buffer, format="JPEG", quality=int(quality))
+    buffer.seek(0)
+    return np.asarray(Image.open(buffer).convert("RGB")).copy()
+
+
+def render_scan(issuer: CertificateIssuanceService, rng: np.random.Generator, scale: float,
+                noise_sigma: float = None, quality: int = None) -> np.ndarray:
+    """Issuance template as a noisy, JPEG-compressed scan"""
+    template = issuer._generate_basic_template(certificate_data(rng))
+    if scale != 1.0:
+        size = (int(template.width * scale), int(template.height * scale))
+        template = template.resize(size, Image.LANCZOS)
+
+    sigma = noise_sigma if noise_sigma is not None else rng.uniform(1.5, 3.5)
+    rgb = np.asarray(template, dtype=np.float32) + rng.normal(0, sigma, (template.height, template.width, 1))
+    rgb = np.clip(rgb, 0, 255).astype(np.uint8)
+    return jpeg_round_trip(rgb, quality or rng.integers(85, 96))
+
+
+def row_box(rgb: np.ndarray, row: int, scale: float, rng: np.random.Generator) -> list:
+    """[x1, y1, x2, y2] box over a centred text row of the template"""
+    h, w = rgb.shape[:2]
+    half_w = int(w * rng.uniform(0.2, 0.3))
+    half_h = max(int(60 * scale), 8)
+    cy = int(row * scale)
+    return [w // 2 - half_w, cy - half_h, w // 2 + half_w, cy + half_h]
+
+
+def tamper_copy_move(rgb, issuer, rng, scale):
+    """Duplicate the name row over the empty band below it"""
+    x1, y1, x2, y2 = row_box(rgb, NAME_ROW, scale, rng)
+    dy = int(rng.uniform(90, 130) * scale)
+    out = rgb.copy()
+    out[y1 + dy:y2 + dy, x1:x2] = rgb[y1:y2, x1:x2]
+    return out, [x1, y1 + dy, x2, y2 + dy]
+
+
+def tamper_splice(rgb, issuer, rng, scale):
+    """Paste the name row of another certificate scanned with different noise and quality"""
+    donor = render_scan(issuer, rng, scale, noise_sigma=rng.uniform(5.0, 8.0), quality=rng.integers(55, 70))
+    box = row_box(rgb, NAME_ROW, scale, rng)
+    x1, y1, x2, y2 = box
+    out = rgb.copy()
+    out[y1:y2, x1:x2] = donor[y1:y2, x1:x2]
+    return out, box
+
+
+def tamper_text_overwrite(rgb, issuer, rng, scale):
+    """White-out the name row and typeset a new name without scan noise"""
+    box = row_box(rgb, NAME_ROW, scale, rng)
+    image = Image.fromarray(rgb.copy())
+    draw = ImageDraw.Draw(image)
+    draw.rectangle(box, fill="white")
+    try:
+        font = ImageFont.truetype("arial.ttf", max(int(80 * scale), 10))
+    except Exception:
+        font = ImageFont.load_default()
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    draw.text((rgb.shape[1] // 2, int(NAME_ROW * scale)), name, fill="black", font=font, anchor="mm")
+    return np.asarray(image), box
+
+
+def tamper_recompression(rgb, issuer, rng, scale):
+    """Whole-image recompression at a low quality on a shifted grid"""
+    shift = int(rng.integers(1, 8))
+    shifted = jpeg_round_trip(np.ascontiguousarray(rgb[shift:, shift:]), rng.integers(50, 70))
+    out = rgb.copy()
+    out[shift:, shift:] = shifted
+    return out, None
+
+
+def tamper_resampling(rgb, issuer, rng, scale):
+    """Enlarge the course row in place (interpolation traces)"""
+    box = row_box(rgb, COURSE_ROW, scale, rng)
+    x1, y1, x2, y2 = box
+    patch = rgb[y1:y2, x1:x2]
+    factor = rng.uniform(1.15, 1.5)
+    h, w = patch.shape[:2]
+    enlarged = cv2.resize(patch, (int(w * factor), int(h * factor)), interpolation=cv2.INTER_LINEAR)
+    oy, ox = (enlarged.shape[0] - h) // 2, (enlarged.shape[1] - w) // 2
+    out = rgb.copy()
+    out[y1:y2, x1:x2] = enlarged[oy:oy + h, ox:ox + w]
+    return out, box
+
+
+TAMPERERS = {
+    "copy_move": tamper_copy_move,
+    "splice": tamper_splice,
+    "text_overwrite": tamper_text_overwrite,
+    "recompression": tamper_recompression,
+    "resampling": tamper_resampling,
+}
+
+
+def generate_samples(samples: int, seed: int, scale: float, tamper_types: list):
+    """Yield (label, tamper_type, box, PIL image): clean and tampered certificates, all saved as final uploads"""
+    issuer = CertificateIssuanceService(supabase_client=None)
+    rng = np.random.default_rng(seed)
+    for i in range(samples):
+        for tamper_type in ["clean"] + tamper_types:
+            rgb = render_scan(issuer, rng, scale)
+            box = None
+            if tamper_type != "clean":
+                rgb, box = TAMPERERS[tamper_type](rgb, issuer, rng, scale)
+            upload = Image.fromarray(jpeg_round_trip(np.ascontiguousarray(rgb), FINAL_QUALITY))
+            yield int(tamper_type != "clean"), tamper_type, box, upload
+
+
+# ---------------------------------------------------------------- metrics
+
+def percentiles(values: list) -> dict:
+    values = np.asarray(values, dtype=np.float64) * 1000.0
+    if values.size == 0:
+        return {}
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "mean_ms": round(float(values.mean()), 2),
+    }
+
+
+def roc_curve(labels: np.ndarray, scores: np.ndarray) -> list:
+    """[fpr, tpr, threshold] points, one per distinct score (descending)"""
+    order = np.argsort(-scores, kind="mergesort")
+    labels, scores = labels[order], scores[order]
+    distinct = np.r_[np.flatnonzero(np.diff(scores)), labels.size - 1]
+    tps = np.cumsum(labels)[distinct]
+    fps = (distinct + 1) - tps
+    positives, negatives = max(labels.sum(), 1), max(labels.size - labels.sum(), 1)
+    points = [[0.0, 0.0, None]]
+    points += [[round(float(f / negatives), 4), round(float(t / positives), 4), round(float(s), 4)]
+               for f, t, s in zip(fps, tps, scores[distinct])]
+    return points
+
+
+def auc(labels: np.ndarray, scores: np.ndarray) -> float:
+    """Area under the ROC curve (Mann-Whitney, ties counted half)"""
+    positives, negatives = scores[labels == 1], scores[labels == 0]
+    if positives.size == 0 or negatives.size == 0:
+        return None
+    greater = (positives[:, None] > negatives[None, :]).sum()
+    ties = (positives[:, None] == negatives[None, :]).sum()
+    return round(float((greater + 0.5 * ties) / (positives.size * negatives.size)), 4)
+
+
+def accuracy_report(records: list, score_names: list) -> dict:
+    labels = np.array([r["label"] for r in records])
+    types = np.array([r["tamper_type"] for r in records])
+    report = {}
+    for name in score_names:
+        scores = np.array([r["scores"].get(name, 0.0) for r in records], dtype=np.float64)
+        by_type = {}
+        for tamper_type in sorted(set(types) - {"clean"}):
+            subset = (types == "clean") | (types == tamper_type)
+            by_type[tamper_type] = auc(labels[subset], scores[subset])
+        report[name] = {
+            "auc": auc(labels, scores),
+            "auc_by_tamper": by_type,
+            "roc": roc_curve(labels, scores),
+        }
+    return report
+
+
+def boxes_overlap(a: list, b: list) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+# ---------------------------------------------------------------- runner
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def time_detectors(service: Layer2ForensicsService, image: Image.Image, measure_memory: bool):
+    """Run every detector once on a pre-decoded bundle: (scores, seconds, peak MB)"""
+    bundle = ImageBundle.ensure(image)
+    bundle.rgb, bundle.gray, bundle.y_channel  # Shared views are paid once per request, not per detector
+
+    scores, seconds, memory = {}, {}, {}
+    for name in DETECTORS:
+        if measure_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = service._process_detector_sync(name, bundle)
+        seconds[name] = time.perf_counter() - start
+        if measure_memory:
+            memory[name] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+        if name != "hashes":
+            scores[name] = service._detector_score(result)
+    return scores, seconds, memory
+
+
+async def run_benchmark(args) -> dict:
+    service = Layer2ForensicsService()
+    service.early_exit = False  # Score every detector for the ROC
+    service.time_budget = None
+
+    records, latencies, memory = [], {name: [] for name in DETECTORS + ["analyze_image"]}, {}
+    localization = {tamper_type: [] for tamper_type in args.tampers}
+    image_size = None
+
+    for i, (label, tamper_type, box, image) in enumerate(generate_samples(args.samples, args.seed, args.scale, args.tampers)):
+        scores, seconds, peaks = time_detectors(service, image, i < args.memory_samples)
+        for name, value in seconds.items():
+            latencies[name].append(value)
+        for name, value in peaks.items():
+            memory[name] = max(memory.get(name, 0.0), value)
+
+        start = time.perf_counter()
+        analysis = await service.analyze_image(image, time_budget=None, pyramid_level=args.pyramid_level)
+        latencies["analyze_image"].append(time.perf_counter() - start)
+        scores["tamper_probability"] = analysis.tamper_probability
+
+        if box is not None:
+            localization[tamper_type].append(any(boxes_overlap(box, region) for region in analysis.suspicious_regions))
+
+        records.append({"label": label, "tamper_type": tamper_type, "scores": scores})
+        image_size = list(image.size)
+        print(f"  [{i + 1}] {tamper_type:<15} p={analysis.tamper_probability:.3f} "
+              f"t={latencies['analyze_image'][-1]:.2f}s")
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "samples_per_class": args.samples,
+            "seed": args.seed,
+            "scale": args.scale,
+            "pyramid_level": args.pyramid_level,
+            "tamper_types": args.tampers,
+            "image_size": image_size,
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+        },
+        "latency": {name: percentiles(values) for name, values in latencies.items()},
+        "peak_memory_mb": {name: round(value, 1) for name, value in memory.items()},
+        "process_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        "accuracy": accuracy_report(records, [name for name in DETECTORS if name != "hashes"] + ["tamper_probability"]),
+        "localization_hit_rate": {
+            tamper_type: round(float(np.mean(hits)), 3) for tamper_type, hits in localization.items() if hits
+        },
+    }
+
+
+def print_summary(report: dict, baseline: dict = None):
+    """Latency and AUC table, with deltas against a previous run if given"""
+    def delta(value, previous):
+        if previous is None or value is None:
+            return ""
+        return f" ({value - previous:+.2f})"
+
+    print(f"\n📊 Forensics benchmark @ {report['meta']['commit']}")
+    print(f"{'detector':<20}{'p50 ms':>16}{'p95 ms':>16}{'peak MB':>10}{'AUC':>16}")
+    for name in DETECTORS + ["analyze_image", "tamper_probability"]:
+        latency = report["latency"].get(name, {})
+        previous = (baseline or {}).get("latency", {}).get(name, {})
+        accuracy = report["accuracy"].get(name, {}).get("auc")
+        previous_auc = (baseline or {}).get("accuracy", {}).get(name, {}).get("auc")
+        p50, p95 = latency.get("p50_ms"), latency.get("p95_ms")
+        print(f"{name:<20}"
+              f"{(f'{p50:.1f}' + delta(p50, previous.get('p50_ms'))) if p50 is not None else '-':>16}"
+              f"{(f'{p95:.1f}' + delta(p95, previous.get('p95_ms'))) if p95 is not None else '-':>16}"
+              f"{report['peak_memory_mb'].get(name, '-'):>10}"
+              f"{(f'{accuracy:.3f}' + delta(accuracy, previous_auc)) if accuracy is not None else '-':>16}")
+    print(f"Localization hit rate: {report['localization_hit_rate']}")
+    print(f"Process peak RSS: {report['process_peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Layer 2 forensic speed and detection quality")
+    parser.add_argument("--samples", type=int, default=10, help="Certificates per class (clean and each tamper type)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="Template scale (1.0 = A4 at 300 DPI)")
+    parser.add_argument("--tampers", nargs="+", choices=TAMPER_TYPES, default=TAMPER_TYPES)
+    parser.add_argument("--pyramid-level", type=int, default=None, help="Coarse-to-fine level (default: settings)")
+    parser.add_argument("--memory-samples", type=int, default=2, help="Images traced for per-detector peak memory")
+    parser.add_argument("--output", default=None, help="JSON report path (default: benchmarks/forensics_<commit>.json)")
+    parser.add_argument("--baseline", default=None, help="Previous JSON report to diff against")
+    args = parser.parse_args()
+
+    print(f"🚀 Benchmarking Layer 2 forensics on {args.samples * (len(args.tampers) + 1)} certificates...")
+    report = asyncio.run(run_benchmark(args))
+
+    output = args.output or os.path.join("benchmarks", f"forensics_{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_summary(report, baseline)
+    print(f"✅ Report saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
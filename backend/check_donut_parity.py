@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Parity check between the PyTorch and ONNX Runtime Donut backends
+Runs both extractors on sample certificates (rendered with the issuance
+template, or the images given on the command line) and compares every field
+"""
+import argparse
+import os
+import sys
+import time
+
+from PIL import Image
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.services.certificate_issuance import CertificateIssuanceService
+from app.services.llm_client import LLMClient
+
+FIELDS = ("name", "institution", "course_name", "issue_date", "certificate_id", "grade", "additional_fields")
+
+SAMPLE_CERTIFICATES = [
+    {"student_name": "John Doe", "course_name": "Computer Science", "institution": "University of Technology",
+     "grade": "A+", "issue_date": "2023-06-15", "certificate_id": "CERT-2023-001"},
+    {"student_name": "Priya Sharma", "course_name": "Master of Science", "institution": "State University",
+     "grade": "First Class", "issue_date": "2022-11-30", "certificate_id": "CERT-2022-417"},
+    {"student_name": "Maria Garcia", "course_name": "Civil Engineering", "institution": "Institute of Technology",
+     "grade": "B+", "issue_date": "2021-04-02", "certificate_id": "CERT-2021-088"},
+]
+
+
+def sample_images(paths):
+    """Certificates from disk, or rendered from the issuance template"""
+    if paths:
+        return [(os.path.basename(path), Image.open(path).convert("RGB")) for path in paths]
+
+    issuer = CertificateIssuanceService(supabase_client=None)
+    return [(data["certificate_id"], issuer._generate_basic_template(data)) for data in SAMPLE_CERTIFICATES]
+
+
+def extract_all(client: LLMClient, images):
+    """Fields and seconds per image (first call includes warm-up)"""
+    results = []
+    for _, image in images:
+        start = time.perf_counter()
+        fields = client._extract_fields_sync(image)
+        results.append((fields, time.perf_counter() - start))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Donut field outputs between PyTorch and ONNX Runtime")
+    parser.add_argument("images", nargs="*", help="Certificate images (default: rendered samples)")
+    parser.add_argument("--fp32", action="store_true", help="Compare the unquantized ONNX graphs")
+    parser.add_argument("--min-match", type=float, default=1.0, help="Required fraction of matching fields")
+    args = parser.parse_args()
+
+    if args.fp32:
+        settings.DONUT_ONNX_QUANTIZE = False
+
+    images = sample_images(args.images)
+    print(f"🔍 Comparing Donut backends on {len(images)} certificates "
+          f"(ONNX {'int8' if settings.DONUT_ONNX_QUANTIZE else 'fp32'})")
+
+    torch_client = LLMClient(backend="torch")
+    onnx_client = LLMClient(backend="onnx")
+    loaded = [client.wait_until_ready() for client in (torch_client, onnx_client)]
+    if not all(loaded) or onnx_client.backend != "onnx":
+        print("❌ Both backends must load (is optimum[onnxruntime] installed?)")
+        return False
+
+    torch_results = extract_all(torch_client, images)
+    onnx_results = extract_all(onnx_client, images)
+
+    matched, total = 0, 0
+    for (label, _), (torch_fields, torch_time), (onnx_fields, onnx_time) in zip(images, torch_results, onnx_results):
+        print(f"\n📄 {label}: torch {torch_time:.2f}s, onnx {onnx_time:.2f}s")
+        for field in FIELDS:
+            expected, actual = getattr(torch_fields, field), getattr(onnx_fields, field)
+            total += 1
+            if expected == actual:
+                matched += 1
+            else:
+                print(f"   ❌ {field}: torch={expected!r} onnx={actual!r}")
+
+    # Steady-state latency (skip each backend's first, warm-up image)
+    def mean_time(results):
+        times = [seconds for _, seconds in results[1:]] or [results[0][1]]
+        return sum(times) / len(times)
+
+    match_rate = matched / total if total else 1.0
+    print(f"\n📊 Field match: {matched}/{total} ({match_rate:.1%})")
+    print(f"⏱️  Mean latency: torch {mean_time(torch_results):.2f}s, onnx {mean_time(onnx_results):.2f}s")
+
+    if match_rate >= args.min_match:
+        print("✅ ONNX backend matches the PyTorch backend")
+        return True
+    print(f"❌ Match rate below {args.min_match:.0%}")
+    return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Rebuild the perceptual-hash near-duplicate index from issued certificates
+One full pass over issued_certificates; afterwards issuance keeps the index current.
+Only certificate images are indexed: the QR image hashes kept alongside them in
+image_hashes are never what a holder presents. Certificates issued before their
+fingerprints were recorded are hashed from the stored certificate image; that
+copy is watermarked, so no pixel digest is indexed for them.
+"""
+import io
+import os
+import sys
+import requests
+from PIL import Image
+from supabase import create_client, Client
+
+# Add the app directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.config import settings
+from app.utils.hash_index import PerceptualHashIndex
+from app.utils.fingerprint import compute_fingerprints
+
+PAGE_SIZE = 1000
+DOWNLOAD_TIMEOUT = 30
+
+def stored_image_phash(image_url: str) -> str:
+    """Perceptual hash of a stored certificate image"""
+    response = requests.get(image_url, timeout=DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    return compute_fingerprints(Image.open(io.BytesIO(response.content)))["phash"]
+
+def fetch_perceptual_hashes(client: Client):
+    """Yield (certificate_id, perceptual_hash, sha256) of the certificate image of every issued certificate"""
+    start = 0
+    while True:
+        result = client.table("issued_certificates") \
+            .select("certificate_id, image_url, image_hashes") \
+            .range(start, start + PAGE_SIZE - 1) \
+            .execute()
+
+        for row in result.data or []:
+            certificate_id = row.get("certificate_id")
+            if not certificate_id:
+                continue
+
+            fingerprints = (row.get("image_hashes") or {}).get("certificate") or {}
+            phash, digest = fingerprints.get("phash"), fingerprints.get("sha256")
+            if not phash and row.get("image_url"):
+                try:
+                    phash = stored_image_phash(row["image_url"])
+                except Exception as e:
+                    print(f"⚠️  Could not hash stored image for {certificate_id}: {str(e)}")
+            if phash:
+                yield certificate_id, phash, digest
+
+        if not result.data or len(result.data) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+
+def rebuild_index():
+    """Replace the on-disk index with the hashes currently in the database"""
+    if not settings.PHASH_INDEX_PATH:
+        print("❌ PHASH_INDEX_PATH is not set")
+        return False
+
+    try:
+        client: Client = create_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_SERVICE_ROLE_KEY
+        )
+        print(f"✅ Connected to Supabase: {settings.SUPABASE_URL}")
+
+        index = PerceptualHashIndex()
+        index.add_many(fetch_perceptual_hashes(client))
+
+        index.path = settings.PHASH_INDEX_PATH
+        index.save()
+
+        print(f"🎉 Indexed {len(index)} perceptual hashes into {index.snapshot_path}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Index rebuild failed: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    sys.exit(0 if rebuild_index() else 1)
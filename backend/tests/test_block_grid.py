@@ -0,0 +1,62 @@
+"""
+JPEG grid alignment on a clean certificate: near-blank shaded paper must not
+vote a grid of its own, while a pasted block on a shifted grid still does
+"""
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.utils.block_grid import GradientField, GridAlignment
+
+SIZE = 1536
+MIN_CONTRAST = 0.15
+MIN_ENERGY = 0.1
+
+
+def jpeg_round_trip(gray, quality):
+    buffer = io.BytesIO()
+    Image.fromarray(gray).save(buffer, format='JPEG', quality=quality)
+    buffer.seek(0)
+    return np.asarray(Image.open(buffer).convert('L'))
+
+
+def render_page(shading):
+    """Light paper with a radial shading of the given depth (gray levels) and a few text rows"""
+    yy, xx = np.mgrid[0:SIZE, 0:SIZE]
+    page = 245.0 - shading * np.hypot(yy - SIZE / 2, xx - SIZE / 2) / np.hypot(SIZE / 2, SIZE / 2)
+    page = np.clip(page, 0, 255).astype(np.uint8)
+    for y in range(500, 1300, 70):
+        cv2.putText(page, "Certificate of Completion 2024 awarded", (300, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.3, 30, 2)
+    return page
+
+
+@pytest.mark.parametrize("shading", [3, 6, 12])
+@pytest.mark.parametrize("quality", [85, 90])
+def test_shaded_blank_paper_is_not_misaligned(shading, quality):
+    grid = GridAlignment(GradientField(jpeg_round_trip(render_page(shading), quality)))
+
+    # The contrast ratio alone flags the blank margins
+    assert grid.misaligned_mask(MIN_CONTRAST).any()
+    assert grid.misaligned_regions(MIN_CONTRAST, MIN_ENERGY) == []
+
+
+def test_shifted_grid_patch_is_misaligned():
+    rng = np.random.default_rng(0)
+    texture = cv2.GaussianBlur(rng.normal(128, 60, (1024, 1024)).astype(np.float32), (0, 0), 10)
+    texture = np.clip(texture - texture.mean() + 128, 0, 255).astype(np.uint8)
+
+    # A coarser-compressed patch cropped off its grid by (3, 5), pasted and re-saved
+    page = jpeg_round_trip(texture, 90).copy()
+    page[512:1024, 512:1024] = jpeg_round_trip(texture, 50)[3:3 + 512, 5:5 + 512]
+    page = jpeg_round_trip(page, 95)
+
+    grid = GridAlignment(GradientField(page))
+    mask = grid.misaligned_mask(MIN_CONTRAST, MIN_ENERGY)
+    t = grid.tile_size
+    patch = mask[512 // t:1024 // t, 512 // t:1024 // t]
+    assert patch.mean() > 0.5
+    assert mask.sum() == patch.sum()
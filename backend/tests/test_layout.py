@@ -0,0 +1,85 @@
+"""
+Layout analysis on a rendered A4 certificate at 300 dpi: every text row must
+come back as a block, with and without a seal stamped across the rows
+"""
+import cv2
+import numpy as np
+import pytest
+
+from app.utils.layout import detect_text_blocks
+
+DPI = 300
+ROWS = [
+    "CERTIFICATE OF COMPLETION",
+    "This is to certify that Jane Doe",
+    "has successfully completed the course",
+    "Advanced Machine Learning",
+    "Issued on 12 March 2024",
+    "Certificate ID CERT-2024-00123",
+    "Example University",
+]
+FIRST_BASELINE = 600
+LINE_PITCH = 110
+TEXT_LEFT = 300
+SEAL_RADIUS = 200
+
+
+def render_certificate(seal_center=None):
+    """Binarised page with the rows typeset and an optional seal outline; also the row baselines"""
+    page = np.full((3508, 2480), 255, np.uint8)
+    baselines = []
+    for i, row in enumerate(ROWS):
+        baseline = FIRST_BASELINE + i * LINE_PITCH
+        cv2.putText(page, row, (TEXT_LEFT, baseline), cv2.FONT_HERSHEY_SIMPLEX, 2.0, 0, 5, cv2.LINE_AA)
+        baselines.append(baseline)
+    if seal_center is not None:
+        cv2.circle(page, seal_center, SEAL_RADIUS, 0, 10)
+    _, binary = cv2.threshold(page, 128, 255, cv2.THRESH_BINARY)
+    return binary, baselines
+
+
+def row_widths(blocks, baselines):
+    """Horizontal extent covered by blocks holding each row (0 when the row is missing)"""
+    return [
+        sum(x2 - x1 for x1, y1, x2, y2 in blocks if y1 <= baseline - 30 and y2 >= baseline)
+        for baseline in baselines
+    ]
+
+
+def seal_box(center):
+    x, y = center
+    return [x - SEAL_RADIUS, y - SEAL_RADIUS, x + SEAL_RADIUS, y + SEAL_RADIUS]
+
+
+def test_clean_page_finds_every_row():
+    binary, baselines = render_certificate()
+    blocks = detect_text_blocks(binary, DPI)
+    assert len(blocks) == len(ROWS)
+    assert all(row_widths(blocks, baselines))
+
+
+# Seal outlines crossing the "Advanced Machine Learning" to "Example University" rows
+@pytest.mark.parametrize("seal_center", [(900, 1110), (600, 1050), (1200, 1200)])
+@pytest.mark.parametrize("detected", [False, True])
+def test_seal_across_rows_keeps_every_row(seal_center, detected):
+    binary, baselines = render_certificate(seal_center)
+    excluded = [seal_box(seal_center)] if detected else None
+    blocks = detect_text_blocks(binary, DPI, excluded)
+    assert all(row_widths(blocks, baselines))
+
+    # The words under a detected seal stay inside their row's block
+    certificate_id_row = ROWS.index("Certificate ID CERT-2024-00123")
+    clean_blocks = detect_text_blocks(render_certificate()[0], DPI)
+    clean_width = row_widths(clean_blocks, baselines)[certificate_id_row]
+    assert row_widths(blocks, baselines)[certificate_id_row] >= clean_width
+
+
+def test_line_sized_detection_does_not_remove_text():
+    """A false-positive seal on round letters is no taller than a line and is ignored"""
+    binary, baselines = render_certificate()
+    course_row = ROWS.index("has successfully completed the course")
+    baseline = baselines[course_row]
+    false_seal = [1100, baseline - 60, 1270, baseline + 20]
+
+    blocks = detect_text_blocks(binary, DPI, [false_seal])
+    assert row_widths(blocks, baselines) == row_widths(detect_text_blocks(binary, DPI), baselines)